@@ -1204,3 +1204,17 @@ void fg_frequency_peak_harmonic_product_spectrum_w(int16_t *in_array, float *out
     input_params.size = num_params;
     fg_frequency_peak_harmonic_product_spectrum(&kb_model, &input_columns, &input_params, out_array);
 }
+
+// Batched Feature Generator
+// Calls a feature generator wrapper once per segment for all segments of a shard.
+// Segment i starts at in_array[offsets[i]] and holds lengths[i] rows for each of
+// num_cols columns (column major), its features are written to row i of out_array.
+typedef void (*fg_wrapper_t)(int16_t *, float *, float *, int32_t, int32_t, int32_t);
+
+void fg_batch_w(fg_wrapper_t function, int16_t *in_array, int64_t *offsets, int32_t *lengths, int32_t num_segments, float *out_array, int32_t num_outputs, float *params, int32_t num_params, int32_t num_cols)
+{
+    for (int32_t i = 0; i < num_segments; i++)
+    {
+        function(in_array + offsets[i], out_array + (int64_t)i * num_outputs, params, num_params, num_cols, lengths[i]);
+    }
+}
@@ -46,6 +46,7 @@ def use_dummy_cache_dir(settings):
         SERVER_BASE_DIRECTORY, "model_store"
     )
     settings.SERVER_CACHE_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "pipelinecache")
+    settings.SERVER_STEP_CACHE_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "stepcache")
     settings.SERVER_QUERY_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "querydata")
     settings.SERVER_FEATURE_FILE_ROOT = os.path.join(
         SERVER_BASE_DIRECTORY, "featurefile"
@@ -60,6 +61,7 @@ def use_dummy_cache_dir(settings):
         settings.SERVER_DATA_ROOT,
         settings.SERVER_MODEL_STORE_ROOT,
         settings.SERVER_CACHE_ROOT,
+        settings.SERVER_STEP_CACHE_ROOT,
         settings.SERVER_QUERY_ROOT,
         settings.SERVER_FEATURE_FILE_ROOT,
         settings.SERVER_CODEGEN_ROOT,
@@ -75,6 +77,15 @@ def use_dummy_cache_dir(settings):
     shutil.rmtree(FILE_DIR)
 
 
+@pytest.fixture(autouse=True)
+def clear_transform_cache():
+    """Transforms created by a test are rolled back without signals"""
+    from engine.base.utils import transform_cache, transform_cache_version
+
+    transform_cache.clear()
+    transform_cache_version.update(version=None, checked=None)
+
+
 @pytest.fixture
 def client(request):
     """Django Rest Framework APIClient"""
@@ -0,0 +1,375 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+from datamanager.datastore import memmap_npz_member, write_stored_npz
+from datamanager.utils.file_reader import sanitize_fields
+from logger.log_handler import LogHandler
+from pandas import DataFrame, Index
+
+logger = LogHandler(logging.getLogger(__name__))
+
+CAPTURE_STORE_EXTENSION = ".npz"
+
+# Columns of a capture file that do not hold sensor samples
+NON_SAMPLE_COLUMNS = ["sequence", "timestamp"]
+
+# Storage type of the capture sample schema types
+SCHEMA_DTYPES = {"int16": np.int16, "int": np.int32, "float": np.float32}
+
+# Storage types from narrowest to widest, a column is widened along this order
+DTYPE_ORDER = [np.dtype(x) for x in [np.int16, np.int32, np.int64, np.float32]]
+
+# Number of samples converted at a time when a column is widened
+CHUNK_SIZE = 1000000
+
+
+def get_capture_store_path(capture_file):
+    """The column store of a capture is a sidecar of the capture file."""
+    return capture_file + CAPTURE_STORE_EXTENSION
+
+
+def get_column_dtype(values, column_type):
+    """Returns the storage type of a column from its schema type, integer columns
+    that do not fit in the schema type are stored as int64."""
+    if column_type not in SCHEMA_DTYPES:
+        column_type = "float" if np.issubdtype(values.dtype, np.floating) else "int"
+
+    dtype = SCHEMA_DTYPES[column_type]
+    if np.issubdtype(dtype, np.integer):
+        if not np.issubdtype(values.dtype, np.integer):
+            return np.float32
+        info = np.iinfo(dtype)
+        if values.size and (values.min() < info.min or values.max() > info.max):
+            return np.int64
+
+    return dtype
+
+
+def promote_dtype(dtype, other):
+    """Returns the storage type that holds the values of both types."""
+    return max(dtype, other, key=lambda x: DTYPE_ORDER.index(np.dtype(x)))
+
+
+class CaptureStoreWriter(object):
+    """Writes the column store of a capture from chunks of samples.
+
+    Every chunk is appended to a raw file per column in a temporary folder, so the
+    capture never has to be held in memory. The storage type of a column starts from
+    its schema type and is widened when a later chunk does not fit in it. The raw
+    files are memory mapped into the store by close.
+
+    Args:
+        capture_file: path of the capture file
+        schema: capture sample schema, selects the storage type of each column
+        fmt: format of the capture file, WAV samples are always stored as int16
+    """
+
+    def __init__(self, capture_file, schema=None, fmt=".csv"):
+        self._store_path = get_capture_store_path(capture_file)
+        self._schema = schema if schema else {}
+        self._fmt = fmt
+
+        self._temp_dir = tempfile.mkdtemp(
+            prefix=".capture_store.", dir=os.path.dirname(self._store_path) or None
+        )
+        self._sequence_file = open(os.path.join(self._temp_dir, "sequence"), "wb")
+
+        self._columns = None
+        self._dtypes = []
+        self._files = []
+        self._length = 0
+        self._sequence_start = None
+        self._last_sequence = None
+        self._contiguous = True
+        self._sorted = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.abort()
+
+    def _column_path(self, index):
+        return os.path.join(self._temp_dir, "column_{}".format(index))
+
+    def _promote(self, index, dtype):
+        """Rewrites the samples written so far for a column with a wider type."""
+        self._files[index].close()
+
+        path = self._column_path(index)
+        values = self._map(path, self._dtypes[index])
+        with open(path + ".promote", "wb") as fid:
+            for start in range(0, len(values), CHUNK_SIZE):
+                values[start : start + CHUNK_SIZE].astype(dtype).tofile(fid)
+        os.replace(path + ".promote", path)
+
+        self._dtypes[index] = dtype
+        self._files[index] = open(path, "ab")
+
+    def append(self, data):
+        """Appends a DataFrame of samples indexed by sequence to the store."""
+        data = data.drop(
+            [column for column in NON_SAMPLE_COLUMNS if column in data.columns], axis=1
+        )
+        data = data.rename(sanitize_fields(data.columns), axis=1)
+
+        if self._columns is None:
+            self._columns = list(data.columns)
+            self._dtypes = [None] * len(self._columns)
+            self._files = [
+                open(self._column_path(index), "wb")
+                for index in range(len(self._columns))
+            ]
+        elif list(data.columns) != self._columns:
+            raise ValueError("Chunk columns do not match the capture columns")
+
+        sequence = np.asarray(data.index, dtype=np.int64)
+        if sequence.size == 0:
+            return
+
+        if self._last_sequence is None:
+            self._sequence_start = int(sequence[0])
+        else:
+            self._contiguous &= bool(sequence[0] == self._last_sequence + 1)
+            self._sorted &= bool(sequence[0] >= self._last_sequence)
+        diff = np.diff(sequence)
+        self._contiguous &= bool(np.all(diff == 1))
+        self._sorted &= bool(np.all(diff >= 0))
+        self._last_sequence = int(sequence[-1])
+        sequence.tofile(self._sequence_file)
+
+        for index, column in enumerate(self._columns):
+            values = data[column].values
+            column_type = (
+                "int16"
+                if self._fmt == ".wav"
+                else self._schema.get(column, {}).get("type")
+            )
+            dtype = get_column_dtype(values, column_type)
+            if self._dtypes[index] is None:
+                self._dtypes[index] = dtype
+            elif promote_dtype(self._dtypes[index], dtype) != self._dtypes[index]:
+                self._promote(index, promote_dtype(self._dtypes[index], dtype))
+
+            np.ascontiguousarray(values, dtype=self._dtypes[index]).tofile(
+                self._files[index]
+            )
+
+        self._length += sequence.size
+
+    def _map(self, path, dtype):
+        if not self._length:
+            return np.empty(0, dtype=dtype)
+
+        return np.memmap(path, dtype=dtype, mode="r", shape=(self._length,))
+
+    def close(self):
+        """Writes the store next to the capture file and returns its path."""
+        for fid in [self._sequence_file] + self._files:
+            fid.close()
+
+        columns = self._columns if self._columns is not None else []
+        arrays = {"__columns__": np.array(columns, dtype=str)}
+        if self._contiguous:
+            arrays["__sequence_start__"] = np.array(
+                self._sequence_start if self._length else 0
+            )
+            arrays["__length__"] = np.array(self._length)
+        else:
+            arrays["sequence"] = self._map(self._sequence_file.name, np.int64)
+            arrays["__sorted__"] = np.array(self._sorted)
+
+        for index in range(len(columns)):
+            arrays["column_{}".format(index)] = self._map(
+                self._column_path(index), self._dtypes[index]
+            )
+
+        # the arrays are streamed from the memory mapped files into the archive, it is
+        # moved in place once complete so readers never see a partial file
+        temp_path = os.path.join(self._temp_dir, "store")
+        with open(temp_path, "wb") as fid:
+            write_stored_npz(fid, arrays)
+        os.replace(temp_path, self._store_path)
+
+        return self._store_path
+
+    def abort(self):
+        """Deletes the temporary files of the writer."""
+        for fid in [self._sequence_file] + self._files:
+            fid.close()
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+
+def write_capture_store(capture_file, data, schema=None, fmt=".csv"):
+    """Writes the samples of a capture to its column store.
+
+    Every sample column is stored as a separate uncompressed array that can be memory
+    mapped, so readers only touch the columns and sample ranges they need. The
+    sequence numbers are stored as the first sequence number when they are
+    contiguous, which is the case for every WAV file and most CSV files.
+
+    Args:
+        capture_file: path of the capture file
+        data: DataFrame of the capture indexed by sequence
+        schema: capture sample schema, selects the storage type of each column
+        fmt: format of the capture file, WAV samples are always stored as int16
+    """
+    with CaptureStoreWriter(capture_file, schema, fmt) as writer:
+        writer.append(data)
+        return writer.close()
+
+
+def open_capture_store(capture_file, datastore=None):
+    """Returns the column store of a capture, or None when the capture does not have
+    one (captures uploaded before the store existed and not backfilled yet)."""
+    store_path = get_capture_store_path(capture_file)
+
+    if datastore is not None and datastore.is_remote and not os.path.exists(store_path):
+        try:
+            datastore.get(os.path.basename(store_path), store_path)
+        except Exception:
+            return None
+
+    if not os.path.exists(store_path):
+        return None
+
+    try:
+        return CaptureStore(store_path)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        logger.warn(
+            {
+                "message": "Capture store could not be read",
+                "data": {"path": store_path, "error": str(e)},
+                "log_type": "datamanager",
+            }
+        )
+        return None
+
+
+class CaptureStore(object):
+    """Memory mapped column store of a capture.
+
+    Columns are mapped when the store is opened and only the pages of the requested
+    sample ranges are read from disk.
+    """
+
+    def __init__(self, path):
+        self._path = path
+
+        with zipfile.ZipFile(path) as archive, np.load(path) as npz:
+            self._columns = [str(column) for column in npz["__columns__"]]
+            self._data = [
+                memmap_npz_member(path, archive, "column_{}".format(index))
+                for index in range(len(self._columns))
+            ]
+
+            if "__sequence_start__" in npz.files:
+                self._sequence_start = int(npz["__sequence_start__"])
+                self._length = int(npz["__length__"])
+                self._sequence = None
+                self._sorted = True
+            else:
+                self._sequence = memmap_npz_member(path, archive, "sequence")
+                self._sequence_start = None
+                self._length = self._sequence.shape[0]
+                self._sorted = bool(npz["__sorted__"])
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def get_positions(self, start=None, end=None):
+        """Positions of the samples with start <= sequence <= end, as a slice when the
+        sequence is sorted."""
+        if self._sequence is None:
+            first = 0 if start is None else int(start) - self._sequence_start
+            last = self._length if end is None else int(end) - self._sequence_start + 1
+            return slice(
+                min(max(first, 0), self._length), min(max(last, 0), self._length)
+            )
+
+        if self._sorted:
+            first = (
+                0 if start is None else np.searchsorted(self._sequence, start, "left")
+            )
+            last = (
+                self._length
+                if end is None
+                else np.searchsorted(self._sequence, end, "right")
+            )
+            return slice(int(first), int(last))
+
+        mask = np.ones(self._length, dtype=bool)
+        if start is not None:
+            mask &= self._sequence >= start
+        if end is not None:
+            mask &= self._sequence <= end
+
+        return np.flatnonzero(mask)
+
+    def get_sequence(self, positions):
+        """Returns the sequence numbers of the samples at positions."""
+        if self._sequence is None:
+            return np.arange(self._sequence_start, self._sequence_start + self._length)[
+                positions
+            ]
+
+        return np.array(self._sequence[positions])
+
+    def read_array(self, columns=None, start=None, end=None, dtype=None):
+        """Returns the samples of columns between the sequence numbers start and end
+        (inclusive) as an array of shape (number of columns, number of samples)."""
+        columns = self._columns if columns is None else columns
+        positions = self.get_positions(start, end)
+
+        if not columns:
+            return np.empty((0, len(self.get_sequence(positions))), dtype=dtype)
+
+        return np.array(
+            [self._data[self._columns.index(column)][positions] for column in columns],
+            dtype=dtype,
+        )
+
+    def read_dataframe(self, columns=None, start=None, end=None, index=False):
+        """Returns the samples of columns between the sequence numbers start and end
+        (inclusive) as a DataFrame, indexed by sequence when index is True and with a
+        default index otherwise."""
+        columns = self._columns if columns is None else columns
+        positions = self.get_positions(start, end)
+
+        return DataFrame(
+            {
+                column: np.array(self._data[self._columns.index(column)][positions])
+                for column in columns
+            },
+            columns=columns,
+            index=(
+                Index(self.get_sequence(positions), name="sequence") if index else None
+            ),
+        )
@@ -20,7 +20,6 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 import gzip
 import pickle
 from collections import defaultdict
-from copy import deepcopy
 from typing import Optional
 
 import numpy as np
@@ -63,6 +62,215 @@ class DataSegment(object):
         return self._data.shape[0]
 
 
+class ColumnarDataSegments(object):
+    """Columnar storage for a shard of data segments.
+
+    The samples of every segment are held in a single contiguous
+    (num_columns x total_samples) buffer, the segment boundaries in an offsets
+    array of length num_segments + 1 and the segment metadata in a table with one
+    list of values per metadata column.
+
+    Indexing and iteration return the dict layout used by the rest of the engine
+    ({"columns", "metadata", "statistics", "data"}) where "data" is a view into the
+    buffer, so existing dict based functions keep working without copying samples.
+    """
+
+    def __init__(self, data, offsets, columns, metadata, statistics=None):
+        self._data = data
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._columns = list(columns)
+        self._metadata = metadata
+        self._statistics = statistics
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Builds the columnar representation from a list of segment dicts.
+
+        Raises:
+            ValueError: if the segments do not share the same columns, metadata
+                names and data type
+        """
+        if not segments:
+            raise ValueError("Cannot create columnar datasegments from an empty list.")
+
+        columns = segments[0]["columns"]
+        metadata_columns = list(segments[0]["metadata"].keys())
+        has_data = segments[0].get("data") is not None
+        dtype = segments[0]["data"].dtype if has_data else None
+
+        for segment in segments:
+            if (
+                segment["columns"] != columns
+                or list(segment["metadata"].keys()) != metadata_columns
+                or (segment.get("data") is not None) != has_data
+            ):
+                raise ValueError(
+                    "Segments must share the same columns and metadata to be stored as columns."
+                )
+            if has_data and (
+                segment["data"].dtype != dtype
+                or segment["data"].ndim != 2
+                or segment["data"].shape[0] != len(columns)
+            ):
+                raise ValueError(
+                    "Segments must share the same data layout to be stored as columns."
+                )
+
+        offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+        if has_data:
+            np.cumsum(
+                [segment["data"].shape[1] for segment in segments], out=offsets[1:]
+            )
+            data = np.ascontiguousarray(
+                np.concatenate([segment["data"] for segment in segments], axis=1)
+            )
+        else:
+            data = None
+
+        metadata = {
+            name: [segment["metadata"][name] for segment in segments]
+            for name in metadata_columns
+        }
+
+        statistics = [segment.get("statistics", {}) for segment in segments]
+        if not any(statistics):
+            statistics = None
+
+        return cls(data, offsets, columns, metadata, statistics)
+
+    @classmethod
+    def from_dataframe(cls, input_data, data_columns, group_columns, dtype=np.int32):
+        """Builds the columnar representation directly from a DataFrame, one segment
+        per group. Segments are ordered the same way as dataframe_to_datasegments."""
+        validate_datasegment_columns(input_data, data_columns, group_columns)
+
+        codes = input_data.groupby(group_columns).ngroup().values
+        valid = codes >= 0
+        order = np.argsort(codes[valid], kind="stable")
+        rows = np.flatnonzero(valid)[order]
+
+        lengths = np.bincount(
+            codes[valid], minlength=codes.max() + 1 if len(codes) else 0
+        )
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        data = np.ascontiguousarray(
+            input_data[data_columns].values[rows].astype(dtype).T
+        )
+
+        first_rows = input_data[group_columns].iloc[rows[offsets[:-1]]]
+        metadata = {name: first_rows[name].tolist() for name in group_columns}
+
+        return cls(data, offsets, data_columns, metadata)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.segment(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self.take(range(start, stop, step))
+
+            stop = max(start, stop)
+            return ColumnarDataSegments(
+                (
+                    None
+                    if self._data is None
+                    else self._data[:, self._offsets[start] : self._offsets[stop]]
+                ),
+                self._offsets[start : stop + 1] - self._offsets[start],
+                self._columns,
+                {name: values[start:stop] for name, values in self._metadata.items()},
+                self._statistics[start:stop] if self._statistics else None,
+            )
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("datasegment index out of range")
+
+        return self.segment(index)
+
+    @property
+    def columns(self):
+        return self._columns
+
+    @property
+    def data(self):
+        """The (num_columns x total_samples) sample buffer shared by all segments."""
+        return self._data
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def lengths(self):
+        return np.diff(self._offsets)
+
+    @property
+    def metadata_columns(self):
+        return list(self._metadata.keys())
+
+    @property
+    def metadata(self):
+        return DataFrame(self._metadata, columns=self.metadata_columns)
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+    def metadata_values(self, name):
+        """Returns the list of values of a metadata column, one per segment."""
+        return self._metadata[name]
+
+    def column_data(self, column):
+        """Returns the samples of every segment for a single column as a 1-D view."""
+        return self._data[self._columns.index(column)]
+
+    def segment(self, index):
+        return {
+            "columns": list(self._columns),
+            "metadata": {
+                name: values[index] for name, values in self._metadata.items()
+            },
+            "statistics": dict(self._statistics[index]) if self._statistics else {},
+            "data": (
+                None
+                if self._data is None
+                else self._data[:, self._offsets[index] : self._offsets[index + 1]]
+            ),
+        }
+
+    def take(self, indexes):
+        """Returns a new columnar container holding a copy of the selected segments."""
+        return ColumnarDataSegments.from_segments([self.segment(i) for i in indexes])
+
+    def to_list(self):
+        """Compatibility view as a list of segment dicts sharing this sample buffer."""
+        return [self.segment(index) for index in range(len(self))]
+
+    def to_dataframe(self):
+        if self._data is None:
+            return self.metadata
+
+        rows = np.repeat(np.arange(len(self)), self.lengths)
+
+        return concat(
+            [
+                DataFrame(self._data.T, columns=self._columns),
+                self.metadata.iloc[rows].reset_index(drop=True),
+            ],
+            axis=1,
+        )
+
+
 class DataSegments(object):
     def __init__(self, data):
         self._data = data
@@ -80,9 +288,12 @@ class DataSegments(object):
     def to_dataframe(self):
         M = []
 
-        if not self._data:
+        if not len(self._data):
             return None
 
+        if isinstance(self._data, ColumnarDataSegments):
+            return self._data.to_dataframe()
+
         if self.only_metadata:
             for segment in self._data:
                 M.append(segment["metadata"])
@@ -96,6 +307,11 @@ class DataSegments(object):
         return concat(M).reset_index(drop=True)
 
     def apply(self, func, **kwargs):
+        if isinstance(self._data, ColumnarDataSegments) and getattr(
+            func, "supports_batch", False
+        ):
+            return self._apply_batch(func, **kwargs)
+
         feature_vectors = []
         for segment in self._data:
             if sum([x == 0 for x in segment["data"].shape]) == 0:
@@ -104,6 +320,20 @@ class DataSegments(object):
 
         return concat(feature_vectors).reset_index(drop=True)
 
+    def _apply_batch(self, func, **kwargs):
+        """Calls func once with every non empty segment and attaches the metadata."""
+        segments = self._data
+        non_empty = (segments.lengths > 0) & bool(len(segments.columns))
+        if not non_empty.any():
+            raise ValueError("No objects to concatenate")
+
+        if not non_empty.all():
+            segments = segments.take(np.flatnonzero(non_empty))
+
+        feature_vectors = func(segments, **kwargs).reset_index(drop=True)
+
+        return concat([feature_vectors, segments.metadata], axis=1)
+
     def iter_dataframe(self):
         if self.only_metadata:
             for segment in self._data:
@@ -118,6 +348,23 @@ class DataSegments(object):
         distribution_segments = defaultdict(int)
         total_samples = 0
         distribution_samples = defaultdict(int)
+
+        if isinstance(self._data, ColumnarDataSegments):
+            labels = self._data._metadata.get("Label", ["Label"] * len(self._data))
+            has_data = self._data.data is not None
+            for label, length in zip(labels, self._data.lengths.tolist()):
+                distribution_segments[str(label)] += 1
+                if has_data:
+                    distribution_samples[str(label)] += length
+                    total_samples += length
+
+            return {
+                "total_segments": len(self._data),
+                "total_samples": total_samples,
+                "distribution_segments": dict(distribution_segments),
+                "distribution_samples": dict(distribution_samples),
+            }
+
         for data_segment in self._data:
             distribution_segments[
                 str(data_segment.get("metadata", dict()).get("Label", "Label"))
@@ -136,10 +383,7 @@ class DataSegments(object):
         }
 
 
-def dataframe_to_datasegments(input_data, data_columns, group_columns, dtype=np.int32):
-    groups = input_data.groupby(group_columns)
-
-    M = []
+def validate_datasegment_columns(input_data, data_columns, group_columns):
     if sorted(data_columns) != sorted(
         [x for x in input_data.columns if x not in group_columns]
     ):
@@ -151,6 +395,13 @@ def dataframe_to_datasegments(input_data, data_columns, group_columns, dtype=np.
             )
         )
 
+
+def dataframe_to_datasegments(input_data, data_columns, group_columns, dtype=np.int32):
+    groups = input_data.groupby(group_columns)
+
+    M = []
+    validate_datasegment_columns(input_data, data_columns, group_columns)
+
     for key, tmp_df in groups:
         tmp_seg = {}
         tmp_seg["data"] = tmp_df[data_columns].values.astype(dtype).T
@@ -175,10 +426,23 @@ def dict_to_datasegments(input_dict: dict, dtype=np.int32):
     return DataSegments(DataSegment(data=data, columns=columns, segment_id=0))
 
 
+def to_columnar_datasegments(data):
+    """Converts a list of segment dicts to ColumnarDataSegments when the segments
+    share a layout, otherwise the data is returned unchanged."""
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        try:
+            return ColumnarDataSegments.from_segments(data)
+        except (ValueError, KeyError, AttributeError):
+            return data
+
+    return data
+
+
 def template_datasegment(segment):
+    # metadata values are scalars, a shallow copy is enough to decouple segments
     return {
-        "columns": deepcopy(segment["columns"]),
-        "metadata": deepcopy(segment["metadata"]),
+        "columns": list(segment["columns"]),
+        "metadata": dict(segment["metadata"]),
         "statistics": {},
         "data": None,
     }
@@ -213,6 +477,9 @@ def get_datasegments_columns(datasegments):
 
 
 def get_datasegment_col_indexes(datasegments, column_names):
+    if isinstance(datasegments, ColumnarDataSegments):
+        return [datasegments.columns.index(col) for col in column_names]
+
     if isinstance(datasegments, list):
         return [datasegments[0]["columns"].index(col) for col in column_names]
 
@@ -229,6 +496,9 @@ def get_dataframe_datatype(data):
 
 
 def is_datasegments(data):
+    if isinstance(data, ColumnarDataSegments):
+        return True
+
     if (
         data
         and isinstance(data, list)
@@ -22,10 +22,14 @@ import json
 import logging
 import os
 import pickle
+import struct
+import zipfile
 from io import BytesIO
 from shutil import copyfile, rmtree
 from pathlib import Path
 
+import numpy as np
+from datamanager.datasegments import ColumnarDataSegments
 from logger.log_handler import LogHandler
 from pandas import DataFrame, read_csv
 
@@ -57,6 +61,217 @@ def validate_dataframe(data):
         raise Exception("No data was generated for this step!")
 
 
+# Files written with np.savez are zip archives
+NPZ_MAGIC = b"PK\x03\x04"
+NPY_ALIGNMENT = 64
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_EXTRA_HEADER_SIZE = 4
+ZIP64_EXTRA_SIZE = 20
+ZIP_PADDING_EXTRA_ID = 0xA220
+
+
+def is_npz_file(path):
+    with open(path, "rb") as fid:
+        return fid.read(len(NPZ_MAGIC)) == NPZ_MAGIC
+
+
+def get_cache_format(data, fmt, cache_format):
+    """Returns the save_data format for a cache entry. DataFrames and columnar data
+    segments are stored as npz archives when the cache format is "npz", or as
+    uncompressed, memory mappable npz archives when it is "mmap"."""
+    if isinstance(data, (DataFrame, ColumnarDataSegments)):
+        if cache_format == "npz":
+            return ".npz"
+        if cache_format == "mmap":
+            return ".npz.stored"
+
+    return fmt
+
+
+def save_npz(data, fid, compress=True):
+    """Stores a DataFrame or ColumnarDataSegments as typed numpy arrays in a zip
+    archive, one entry per column so they can be loaded independently."""
+    if isinstance(data, DataFrame):
+        validate_dataframe(data)
+        arrays = {
+            "__format__": np.array("DataFrame"),
+            "__columns__": np.array(list(data.columns), dtype=object),
+        }
+        for index in range(data.shape[1]):
+            arrays["c{}".format(index)] = data.iloc[:, index].to_numpy()
+
+    elif isinstance(data, ColumnarDataSegments):
+        arrays = {
+            "__format__": np.array("DataSegments"),
+            "__columns__": np.array(data.columns, dtype=object),
+            "__metadata_columns__": np.array(data.metadata_columns, dtype=object),
+            "offsets": data.offsets,
+        }
+        if data.data is not None:
+            arrays["data"] = data.data
+        for index, name in enumerate(data.metadata_columns):
+            arrays["m{}".format(index)] = object_array(data.metadata_values(name))
+        if data.statistics is not None:
+            arrays["statistics"] = object_array(data.statistics)
+
+    else:
+        raise Exception("data must be a DataFrame or DataSegments to save to npz")
+
+    if compress:
+        np.savez_compressed(fid, **arrays)
+    else:
+        write_stored_npz(fid, arrays)
+
+
+def write_stored_npz(fid, arrays):
+    """Writes the arrays to an uncompressed npz archive. Each entry is padded so that
+    the array data starts on a NPY_ALIGNMENT boundary and can be memory mapped."""
+    with zipfile.ZipFile(fid, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for name, array in arrays.items():
+            info = zipfile.ZipInfo(name + ".npy", date_time=(1980, 1, 1, 0, 0, 0))
+            info.file_size = array.nbytes
+            zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT
+
+            # local file header, file name, zip64 extra field, padding extra field
+            start = (
+                archive.fp.tell()
+                + ZIP_LOCAL_HEADER_SIZE
+                + len(info.filename)
+                + (ZIP64_EXTRA_SIZE if zip64 else 0)
+                + ZIP_EXTRA_HEADER_SIZE
+            )
+            padding = -start % NPY_ALIGNMENT
+            info.extra = struct.pack("<HH", ZIP_PADDING_EXTRA_ID, padding) + (
+                b"\0" * padding
+            )
+
+            with archive.open(info, mode="w", force_zip64=zip64) as member:
+                np.lib.format.write_array(member, np.asanyarray(array))
+
+
+class DataProjection(object):
+    """Reference to columns of a DataFrame stored in the npz format. Reading a
+    projection reads only these columns of the source entry."""
+
+    def __init__(self, source, columns):
+        self.source = source
+        self.columns = list(columns)
+
+    def select(self, columns=None):
+        if columns is None:
+            return self.columns
+
+        missing = [column for column in columns if column not in self.columns]
+        if missing:
+            raise KeyError("Columns {} are not in the projection".format(missing))
+
+        return list(columns)
+
+
+def save_projection(projection, fid):
+    np.savez(
+        fid,
+        __format__=np.array("Projection"),
+        __source__=np.array(projection.source),
+        __columns__=np.array(projection.columns, dtype=object),
+    )
+
+
+def memmap_npz_member(path, archive, name):
+    """Memory maps an array stored uncompressed in an npz archive, returns None when
+    the member is compressed. Pages are copied on write so the cached file is never
+    modified."""
+    info = archive.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(path, "rb") as fid:
+        fid.seek(info.header_offset)
+        header = fid.read(ZIP_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        fid.seek(name_length + extra_length, os.SEEK_CUR)
+
+        if np.lib.format.read_magic(fid) == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fid)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fid)
+        if dtype.hasobject:
+            return None
+
+        offset = fid.tell()
+
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="c",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+def load_npz(path, columns=None):
+    """Loads a file written by save_npz. Only the arrays of the requested columns are
+    read when columns is set."""
+    with np.load(path, allow_pickle=True) as npz:
+        if str(npz["__format__"]) == "DataSegments":
+            return load_npz_datasegments(npz, columns, path=path)
+
+        if str(npz["__format__"]) == "Projection":
+            return DataProjection(str(npz["__source__"]), npz["__columns__"])
+
+        names = list(npz["__columns__"])
+        indexes = (
+            range(len(names))
+            if columns is None
+            else [names.index(column) for column in columns]
+        )
+
+        data = DataFrame({i: npz["c{}".format(i)] for i in indexes})
+        data.columns = [names[i] for i in indexes]
+
+    return data
+
+
+def load_npz_datasegments(npz, columns=None, path=None):
+    """Builds ColumnarDataSegments from an npz archive. The sample buffer of
+    uncompressed archives is memory mapped, so processes reading the same file share
+    the page cache and only the pages of the selected columns are read."""
+    data_columns = list(npz["__columns__"])
+    metadata_columns = list(npz["__metadata_columns__"])
+
+    data = None
+    if "data" in npz.files:
+        if path is not None:
+            data = memmap_npz_member(path, npz.zip, "data")
+        if data is None:
+            data = npz["data"]
+
+    if columns is not None:
+        indexes = [data_columns.index(column) for column in columns]
+        data_columns = list(columns)
+        if data is not None:
+            data = np.ascontiguousarray(data[indexes])
+
+    metadata = {
+        name: npz["m{}".format(index)].tolist()
+        for index, name in enumerate(metadata_columns)
+    }
+    statistics = npz["statistics"].tolist() if "statistics" in npz.files else None
+
+    return ColumnarDataSegments(
+        data, npz["offsets"], data_columns, metadata, statistics
+    )
+
+
+def object_array(values):
+    # np.array would build a multidimensional array from nested lists or dicts
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+
+    return array
+
+
 class ObjectFactory:
     def __init__(self):
         self._builders = {}
@@ -105,13 +320,33 @@ class LocalDataStoreService:
 
         return key
 
-    def get_data(self, key):
+    def get_data(self, key, columns=None):
+        """Reads the data stored at key. Cache entries written in the npz format keep
+        the name of the format they replace, so the content is checked first.
+        Projections are read from the columns of their source entry.
+
+        Args:
+            key: path of the file relative to the datastore folder
+            columns: optional list of columns to read, DataFrames are projected on
+                these columns and data segments on these data columns
+        """
         print(f"DATASTORE SERVICE: Retrieving data from {self._fold(key)}")
-        if key.split(".")[-1] == "gz":
-            data = read_csv(self._fold(key), compression="gzip", sep="\t")
+        if is_npz_file(self._fold(key)):
+            data = load_npz(self._fold(key), columns=columns)
+            if isinstance(data, DataProjection):
+                data = self.get_data(data.source, columns=data.select(columns))
+
+        elif key.split(".")[-1] == "gz":
+            data = read_csv(
+                self._fold(key), compression="gzip", sep="\t", usecols=columns
+            )
+            if columns is not None:
+                data = data[columns]
 
         elif key.split(".")[-1] == "csv":
-            data = read_csv(self._fold(key), sep=",")
+            data = read_csv(self._fold(key), sep=",", usecols=columns)
+            if columns is not None:
+                data = data[columns]
 
         elif key.split(".")[-1] == "json":
             with open(self._fold(key), "r") as fid:
@@ -126,6 +361,24 @@ class LocalDataStoreService:
 
         return data
 
+    def is_npz_dataframe(self, key):
+        """True when key holds a DataFrame stored in the npz format, whose columns can
+        be read independently of each other."""
+        if not os.path.exists(self._fold(key)) or not is_npz_file(self._fold(key)):
+            return False
+
+        with np.load(self._fold(key), allow_pickle=True) as npz:
+            return str(npz["__format__"]) == "DataFrame"
+
+    def is_npz_projection(self, key):
+        """True when key holds a DataProjection, which references the columns of
+        another cache entry instead of storing them."""
+        if not os.path.exists(self._fold(key)) or not is_npz_file(self._fold(key)):
+            return False
+
+        with np.load(self._fold(key), allow_pickle=True) as npz:
+            return str(npz["__format__"]) == "Projection"
+
     def get_json(self, key):
 
         f = open(self._fold(key), "r")
@@ -166,6 +419,14 @@ class LocalDataStoreService:
             with open(self._fold(key), "w") as obj:
                 obj.write(json.dumps(data))
 
+        elif fmt in (".npz", ".npz.stored"):
+            with open(self._fold(key), "wb") as obj:
+                save_npz(data, obj, compress=fmt == ".npz")
+
+        elif fmt == ".npz.projection":
+            with open(self._fold(key), "wb") as obj:
+                save_projection(data, obj)
+
         elif fmt == ".pkl":
             gz_body = BytesIO()
 
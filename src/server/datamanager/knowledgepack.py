@@ -82,10 +82,12 @@ def _check_parents(user, project_id, sandbox_id):
     ).exists()
 
 
-def locate_knowledgepack(user, project_id, knowledgepack_id=None):
+def locate_knowledgepack(user, project_id, knowledgepack_id=None, defer=()):
+    """Returns the knowledgepack, or all the knowledgepacks of the project. The defer
+    fields are only read from the database when they are accessed."""
     knowledgepacks = KnowledgePack.objects.with_user(
         user=user, project__uuid=project_id
-    )
+    ).defer(*defer)
     if knowledgepack_id is not None:
         return knowledgepacks.get(uuid=knowledgepack_id)
     else:
@@ -0,0 +1,88 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+
+from datamanager.capture_store import get_capture_store_path, write_capture_store
+from datamanager.models import Capture
+from datamanager.query import get_capture_file
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    python manage.py backfill_capture_store [--project <uuid>] [--overwrite]
+    """
+
+    help = "Write the column store of captures uploaded before it existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            nargs="*",
+            type=str,
+            help="only backfill the captures of these projects",
+        )
+
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="rewrite the column store of captures that already have one",
+        )
+
+    def handle(self, *args, **options):
+        captures = Capture.objects.select_related("project").order_by("project")
+        if options.get("project"):
+            captures = captures.filter(project__uuid__in=options["project"])
+
+        written = 0
+        failed = 0
+        for capture in captures.iterator():
+            if not options.get("overwrite") and os.path.exists(
+                get_capture_store_path(capture.file)
+            ):
+                continue
+
+            try:
+                data = get_capture_file(
+                    project_uuid=capture.project.uuid,
+                    capture_file=capture.file,
+                    ext=capture.format,
+                    use_capture_store=False,
+                )
+                write_capture_store(
+                    capture.file,
+                    data,
+                    (
+                        capture.schema
+                        if capture.schema
+                        else capture.project.capture_sample_schema
+                    ),
+                    capture.format,
+                )
+                written += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(
+                    "{} ({}): {}".format(capture.name, capture.uuid, str(e))
+                )
+
+        self.stdout.write(
+            "Wrote {} capture stores, {} captures failed".format(written, failed)
+        )
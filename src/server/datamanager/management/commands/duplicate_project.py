@@ -23,6 +23,7 @@ import shutil
 from uuid import uuid4
 
 from datamanager import utils
+from datamanager.capture_store import get_capture_store_path
 from datamanager.models import (
     Capture,
     CaptureConfiguration,
@@ -104,6 +105,13 @@ class Command(BaseCommand):
             shutil.copyfile(
                 capture.file, os.path.join(new_folder, os.path.basename(capture.file))
             )
+            if os.path.exists(get_capture_store_path(capture.file)):
+                shutil.copyfile(
+                    get_capture_store_path(capture.file),
+                    get_capture_store_path(
+                        os.path.join(new_folder, os.path.basename(capture.file))
+                    ),
+                )
             capture.file = os.path.join(new_folder, os.path.basename(capture.file))
             capture.save()
             capture_dict[tmp_uuid] = capture
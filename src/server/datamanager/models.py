@@ -20,6 +20,7 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 import os
 from uuid import uuid4
 
+from datamanager.capture_store import get_capture_store_path
 from datamanager.managers import TeamLimitedManager, TeamMemberManager
 from datamanager.datastore import get_datastore
 from django.conf import settings
@@ -37,6 +38,7 @@ from engine.base import model_store
 def delete_capture_from_disk(sender, instance, **kwargs):
     datastore = get_datastore()
     datastore.delete(instance.file)
+    datastore.delete_path(get_capture_store_path(instance.file))
 
 
 def delete_capture_video_from_disk(sender, instance, **kwargs):
@@ -18,6 +18,7 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import binascii
+import hashlib
 import json
 import logging
 import os
@@ -27,7 +28,11 @@ from copy import deepcopy
 
 import datamanager.utils as utils
 import numpy as np
-from datamanager.datasegments import generate_segment_template
+from datamanager.capture_store import open_capture_store
+from datamanager.datasegments import (
+    generate_segment_template,
+    to_columnar_datasegments,
+)
 from datamanager.models import (
     Capture,
     CaptureLabelValue,
@@ -37,7 +42,11 @@ from datamanager.models import (
     Query,
 )
 from datamanager.queryparser import VALUE_NOT_PRESENT, QueryParser
-from datamanager.datastore import get_datastore, get_datastore_basedir
+from datamanager.datastore import (
+    get_cache_format,
+    get_datastore,
+    get_datastore_basedir,
+)
 from datamanager.utils.file_reader import sanitize_fields
 from django.conf import settings
 from django.db import connection, transaction
@@ -296,17 +305,27 @@ def _get_row_memory_estimate(number_of_columns):
     return 8 * number_of_columns / 1e6
 
 
-def get_capture_file(project_uuid: str, capture_file: str, ext: str) -> DataFrame:
+def get_capture_file(
+    project_uuid: str, capture_file: str, ext: str, use_capture_store: bool = True
+) -> DataFrame:
     """
     Returns the capture as a dataframe
 
     Args:
         capture_name (str): name of capture
+        use_capture_store (bool): read from the column store of the capture when it
+            has one, otherwise the capture file is parsed
 
     """
 
     # TODO: DATASTORE Convert this to the datastore get_data
     datastore = get_datastore(folder=os.path.join("capture", str(project_uuid)))
+
+    if use_capture_store:
+        capture_store = open_capture_store(capture_file, datastore=datastore)
+        if capture_store is not None:
+            return capture_store.read_dataframe(index=True)
+
     if datastore.is_remote:
         datastore.get("{}".format(os.path.basename(capture_file)), capture_file)
 
@@ -351,6 +370,8 @@ def query_driver_from_csv_to_datasegments(
     query_data = []
     start_time = time.time()
 
+    datastore = get_datastore(folder=os.path.join("capture", str(project_id)))
+
     include_metadata = []
     for column in query_info["metadata"]:
         if exclude_metadata_value and column in exclude_metadata_value:
@@ -360,19 +381,29 @@ def query_driver_from_csv_to_datasegments(
     for index, segment in enumerate(query_info["query_info"]):
         if cached_df != segment[capture_index]:
             capture_file_start_time = time.time()
-            tmp_df = get_capture_file(
-                project_uuid=project_id,
-                capture_file=segment[capture_index],
-                ext=segment["capture_format"],
+            # captures with a column store are read one segment range at a time
+            capture_store = open_capture_store(
+                segment[capture_index], datastore=datastore
             )
+            if capture_store is not None:
+                tmp_df = None
+                data_columns = capture_store.columns
+            else:
+                tmp_df = get_capture_file(
+                    project_uuid=project_id,
+                    capture_file=segment[capture_index],
+                    ext=segment["capture_format"],
+                )
+                data_columns = tmp_df.columns
 
             validate_query_capture_columns(
                 query_info["columns"],
-                tmp_df.columns,
+                data_columns,
                 os.path.basename(segment[capture_index]),
             )
 
-            tmp_df = tmp_df[query_info["columns"]]
+            if tmp_df is not None:
+                tmp_df = tmp_df[query_info["columns"]]
 
             logger.debug(
                 {
@@ -390,10 +421,18 @@ def query_driver_from_csv_to_datasegments(
             cached_df = segment[capture_index]
 
         seg_dict = generate_segment_template()
-        seg_dict["data"] = tmp_df.loc[
-            segment["seg_start"] : segment["seg_end"]
-        ].values.T.astype(np.int32)
-        seg_dict["columns"] = tmp_df.columns.tolist()
+        if capture_store is not None:
+            seg_dict["data"] = capture_store.read_array(
+                query_info["columns"],
+                segment["seg_start"],
+                segment["seg_end"],
+            ).astype(np.int32)
+            seg_dict["columns"] = list(query_info["columns"])
+        else:
+            seg_dict["data"] = tmp_df.loc[
+                segment["seg_start"] : segment["seg_end"]
+            ].values.T.astype(np.int32)
+            seg_dict["columns"] = tmp_df.columns.tolist()
 
         for column in include_metadata:
             seg_dict["metadata"][column] = segment[column]
@@ -423,7 +462,68 @@ def query_driver_from_csv_to_datasegments(
     return query_data
 
 
-def partition_query(query):
+# Name of the file recording which captures each query partition was built from
+QUERY_MANIFEST_NAME = "partitions.json"
+
+
+def get_query_datastore(query_id):
+    return get_datastore(
+        folder=os.path.join(
+            get_datastore_basedir(settings.SERVER_QUERY_ROOT), str(query_id)
+        )
+    )
+
+
+def materialize_query_partition(
+    query_id, query_info, project_id, pipeline_id, task_id, exclude_metadata_value=None
+):
+    """Builds the data segments of a query partition and saves them to the query
+    datastore. Returns the query cache entry of the partition."""
+    partition_name = query_info["outputs"][0]
+
+    data = query_driver_from_csv_to_datasegments(
+        task_id=task_id,
+        query_info=query_info,
+        project_id=project_id,
+        pipeline_id=pipeline_id,
+        exclude_metadata_value=exclude_metadata_value,
+    )
+
+    num_segments = len(data)
+    data = to_columnar_datasegments(data)
+    get_query_datastore(query_id).save_data(
+        data=data,
+        key=partition_name,
+        fmt=get_cache_format(data, ".pkl", settings.CACHE_FILE_FORMAT),
+    )
+
+    return [num_segments, partition_name]
+
+
+def query_partition_driver(
+    input_data, step, team_id, project_id, pipeline_id, user_id, task_id, **kwargs
+):
+    """Pipeline step function that materializes one query partition on a pipeline step
+    worker. The partition is read from the plan file saved by querydata_async."""
+    query_info = get_query_datastore(step["query_id"]).get_data(step["plan"])
+
+    result = materialize_query_partition(
+        step["query_id"],
+        query_info,
+        project_id,
+        pipeline_id,
+        task_id,
+        exclude_metadata_value=step.get("exclude_metadata_value"),
+    )
+
+    return result, None
+
+
+def get_query_profile(query):
+    """Runs the profile query, which lists the segments selected by the query with
+    their capture and metadata. Returns the query parser, the profile, the memory
+    estimate of a sample row and whether the capture uuid has to be dropped from the
+    segment metadata."""
     column_names = json.loads(query.columns)
     metadata_column_names = json.loads(query.metadata_columns)
 
@@ -455,14 +555,24 @@ def partition_query(query):
         query_parser.cursor_id, "Q", query.uuid, query_string, query_params
     )
 
+    return query_parser, profile_df, row_memory_size, drop_capture_uuid
+
+
+def pack_query_partitions(capture_groups, row_memory_size):
+    """Packs the segments of each capture into partitions that fit in
+    SHARD_MEMORY_SPLIT_SIZE and SHARD_SEGMENT_SPLIT_SIZE, the segments of a capture
+    always end up in the same partition.
+
+    Args:
+        capture_groups: iterable of (capture id, DataFrame of the capture segments)
+        row_memory_size: memory estimate of a sample row in MB
+    """
     #  Define partitions using the query profile
     group_template = {"memory_size": 0, "num_segments": 0, "segments": []}
 
     group_list = [deepcopy(group_template)]
 
-    profile_groupby = profile_df.groupby("capture_id")
-
-    for group_name, capture_group in profile_groupby:
+    for group_name, capture_group in capture_groups:
         placed = False
         placed_index = None
         capture_group_num_segments = capture_group.shape[0]
@@ -492,13 +602,106 @@ def partition_query(query):
         )
 
     # Create capture_id filter for each partition.
-    filter_list = [part["segments"] for part in group_list if part["segments"]]
+    return [part["segments"] for part in group_list if part["segments"]]
+
+
+def partition_query(query):
+    query_parser, profile_df, row_memory_size, drop_capture_uuid = get_query_profile(
+        query
+    )
+
+    filter_list = pack_query_partitions(
+        profile_df.groupby("capture_id"), row_memory_size
+    )
 
     json.dump(filter_list, open("test2.json", "w"))
 
     return query_parser, filter_list, drop_capture_uuid
 
 
+def get_query_definition_key(query, query_parser, drop_capture_uuid):
+    """Hash of everything that shapes the content of the query partitions besides the
+    segments themselves, partitions built for another definition are never reused."""
+    definition = {
+        "columns": query_parser._columns,
+        "metadata": query_parser._metadata,
+        "label": query_parser._label,
+        "segment_uuid": query_parser.return_segment_uuid,
+        "drop_capture_uuid": drop_capture_uuid,
+        "segmenter": query.segmenter_id,
+        "metadata_filter": query.metadata_filter,
+        "combine_labels": query.combine_labels,
+        "cache_format": settings.CACHE_FILE_FORMAT,
+    }
+
+    return hashlib.sha256(
+        json.dumps(definition, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def get_capture_group_key(capture_group):
+    """Hash of the segments, labels and metadata a query selects from one capture. It
+    changes whenever a segment of the capture is added, removed or relabeled."""
+    capture_group = capture_group.sort_values(by=["seg_start", "seg_end", "segmentid"])
+
+    return hashlib.sha256(
+        capture_group.to_json(orient="values", date_format="iso").encode("utf-8")
+    ).hexdigest()
+
+
+def load_query_manifest(query_id):
+    """Returns the partition manifest of the last build of a query, or None."""
+    datastore = get_query_datastore(query_id)
+    if not datastore.key_exists(QUERY_MANIFEST_NAME):
+        return None
+
+    try:
+        return datastore.get_data(QUERY_MANIFEST_NAME)
+    except ValueError:
+        return None
+
+
+def plan_query_partitions(manifest, definition_key, profile_df, row_memory_size):
+    """Splits a query build into the partitions of the previous build that can be kept
+    and the partitions that have to be built.
+
+    A partition is kept when the query definition did not change and every capture it
+    was built from still selects exactly the same segments. The captures of the other
+    partitions and the captures that were added since the previous build are packed
+    into new partitions.
+
+    Returns:
+        tuple: (manifest entries of the kept partitions, segments of each partition
+        to build, key of every capture in the profile)
+    """
+    capture_groups = [
+        (str(name), group) for name, group in profile_df.groupby("capture_id")
+    ]
+    capture_keys = {
+        name: get_capture_group_key(group) for name, group in capture_groups
+    }
+
+    kept = []
+    if manifest is not None and manifest["definition"] == definition_key:
+        kept = [
+            partition
+            for partition in manifest["partitions"]
+            if all(
+                capture_keys.get(name) == key
+                for name, key in partition["captures"].items()
+            )
+        ]
+
+    kept_captures = set(name for partition in kept for name in partition["captures"])
+
+    partitions = pack_query_partitions(
+        [(name, group) for name, group in capture_groups if name not in kept_captures],
+        row_memory_size,
+    )
+
+    return kept, partitions, capture_keys
+
+
 def make_statistics(
     captures, project, metadata_column_names=None, segmenter_id=None, events=True
 ):
@@ -42,7 +42,8 @@ logger = logging.getLogger(__name__)
 
 def feature_recognition(request, project_uuid, sandbox_uuid, uuid):
     feature_vector = request.data
-    kp = locate_knowledgepack(request.user, project_uuid, uuid)
+    # the model is only read when it is not in the worker model cache
+    kp = locate_knowledgepack(request.user, project_uuid, uuid, defer=["neuron_array"])
     # Try to get the knowledgepack and start the new instance
     r = RecognitionEngine(None, request.user, project_uuid, feature_vector, kp)
     results = json.dumps(r.recognize())
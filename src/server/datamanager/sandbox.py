@@ -761,6 +761,11 @@ class SandboxAsyncMixin(object):
 
                 elif sandbox.result_type == "grid_search":
                     result_name = "grid_result.{}".format(sandbox_uuid)
+                    summary_name = "grid_promotion_trace.{}".format(sandbox_uuid)
+                    (summary, _) = cache_manager.get_result_from_cache_with_sample_size(
+                        variable_name=summary_name,
+                        sample_size=sample_size,
+                    )
                     summary_key = "search_summary"
 
                 elif sandbox.result_type == "auto":
@@ -19,16 +19,16 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 import logging
 import os
-import tempfile
 import time
-from shutil import copyfile
+from shutil import copyfile, move
 from uuid import uuid4
 
 from datamanager import utils
+from datamanager.capture_store import CaptureStoreWriter, get_capture_store_path
 from datamanager.fields import AsyncTaskResult, AsyncTaskState, CurrentProjectDefault
 from datamanager.models import Capture, CaptureConfiguration, DataTypes
 from datamanager.datastore import get_datastore
-from datamanager.utils.file_reader import CSVFileReader, WaveFileReader
+from datamanager.utils.file_reader import CSVFileStreamReader, WaveFileStreamReader
 from django.conf import settings
 from django.db import transaction
 from logger.data_logger import usage_log
@@ -52,45 +52,75 @@ def parse_capture_datatype(schema):
     return DataTypes.INT32
 
 
-def validate_capture_file(capture, tmp_name):
-    # TODO: look at doing this validation without reading into memory
-
+def read_capture_file(capture, tmp_name):
+    """Streams an uploaded capture through validation and into its column store,
+    the store is written next to the uploaded file. Returns the reader and the path
+    of the store, which is None when the store could not be written."""
     if capture.format == ".csv":
-        reader = CSVFileReader(tmp_name)
-
+        reader = CSVFileStreamReader(tmp_name)
     elif capture.format == ".wav":
-        wave_reader = WaveFileReader(tmp_name)
-        f = tempfile.NamedTemporaryFile("w", delete=True)
-        tmp_name = f.name
-        reader = wave_reader.to_CSVFileReader(tmp_name)
-        f.close()
+        reader = WaveFileStreamReader(tmp_name)
     else:
         raise Exception("File type not supported")
 
-    if not capture.project.capture_sample_schema:
+    writer = CaptureStoreWriter(tmp_name, reader.schema, capture.format)
+    try:
+        for chunk in reader.chunks():
+            if writer is not None:
+                try:
+                    writer.append(chunk)
+                except Exception as e:
+                    log_capture_store_error(capture, e)
+                    writer.abort()
+                    writer = None
+
+        store_path = None
+        if writer is not None:
+            try:
+                store_path = writer.close()
+            except Exception as e:
+                log_capture_store_error(capture, e)
+    finally:
+        if writer is not None:
+            writer.abort()
+
+    return reader, store_path
+
+
+def log_capture_store_error(capture, error):
+    # the store only speeds up reads, a capture without one is read from its file
+    logger.warn(
+        {
+            "message": "Capture store could not be written",
+            "data": {"capture": capture.name, "error": str(error)},
+            "log_type": "datamanager",
+        }
+    )
+
+
+def validate_capture_schema(project, schema):
+    if not project.capture_sample_schema:
         # TODO: Could have a potential race condition here, would prefer to
         # post the schema to the project instead of create here
-        capture.project.capture_sample_schema = reader.schema
-        capture.project.save(update_fields=["capture_sample_schema"])
+        project.capture_sample_schema = schema
+        project.save(update_fields=["capture_sample_schema"])
 
     else:
         update_capture_sample_schema = False
         # TODO: for backwards compatibility we can update old schemas
-        for index, (key, item) in enumerate(
-            capture.project.capture_sample_schema.items()
-        ):
+        for index, (key, item) in enumerate(project.capture_sample_schema.items()):
             if item.get("index"):
                 item.pop("index")
                 update_capture_sample_schema = True
 
-        for key in reader.schema.keys():
-            if key not in capture.project.capture_sample_schema:
-                capture.project.capture_sample_schema[key] = reader.schema[key]
+        for key in schema.keys():
+            if key not in project.capture_sample_schema:
+                project.capture_sample_schema[key] = schema[key]
                 update_capture_sample_schema = True
 
-        if capture.project.lock_schema:
-            project_columns = sorted(list(capture.project.capture_sample_schema.keys()))
-            capture_columns = sorted(list(reader.schema.keys()))
+        if project.lock_schema:
+            project_columns = sorted(list(project.capture_sample_schema.keys()))
+            capture_columns = sorted(list(schema.keys()))
             if project_columns != capture_columns:
                 raise serializers.ValidationError(
                     "Uploaded file does not match project schema {project_schema}. The uploaded file schema is: {capture_schema}".format(
@@ -99,12 +129,24 @@ def validate_capture_file(capture, tmp_name):
                 )
 
         if update_capture_sample_schema:
-            capture.project.save(update_fields=["capture_sample_schema"])
+            project.save(update_fields=["capture_sample_schema"])
+
+
+def validate_capture_file(capture, tmp_name):
+    reader, store_path = read_capture_file(capture, tmp_name)
+
+    try:
+        validate_capture_schema(capture.project, reader.schema)
+    except Exception:
+        if store_path:
+            os.remove(store_path)
+        raise
 
     return (
         reader.num_samples,
-        reader._dataframe.index[-1],
+        reader.max_sequence,
         reader.schema,
+        store_path,
     )
 
 
@@ -184,6 +226,7 @@ class CaptureSerializer(serializers.ModelSerializer):
             capture.number_samples,
             capture.max_sequence,
             capture.schema,
+            store_path,
         ) = validate_capture_file(capture, uploaded_file.file.name)
 
         capture.datatype = parse_capture_datatype(capture.schema)
@@ -191,6 +234,12 @@ class CaptureSerializer(serializers.ModelSerializer):
         datastore = get_datastore(folder=folder)
         # TODO: implement this in datastore
         if datastore.is_remote:
+            if store_path:
+                datastore.save(
+                    os.path.basename(get_capture_store_path(key)),
+                    store_path,
+                    delete=True,
+                )
             datastore.save(key, uploaded_file.file.name, delete=True)
             capture.file = datastore._fold(key)
         else:
@@ -203,6 +252,8 @@ class CaptureSerializer(serializers.ModelSerializer):
                 os.mkdir(folder)
             copyfile(uploaded_file.file.name, os.path.join(folder, key))
             capture.file = os.path.join(folder, key)
+            if store_path:
+                move(store_path, get_capture_store_path(capture.file))
 
         capture.save()
 
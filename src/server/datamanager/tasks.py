@@ -367,13 +367,16 @@ def querydata_async(
     # add worker id to sandbox status in redis
     from datamanager.models import Query
     from datamanager.query import (
+        QUERY_MANIFEST_NAME,
         _compute_statistics,
         _get_query_segment_statistics,
-        partition_query,
-        query_driver_from_csv_to_datasegments,
+        get_query_datastore,
+        get_query_definition_key,
+        get_query_profile,
+        load_query_manifest,
+        materialize_query_partition,
+        plan_query_partitions,
     )
-    from datamanager.datastore import get_datastore, get_datastore_basedir
-    from django.conf import settings
     from pandas import DataFrame
 
     logger.userlog(
@@ -400,11 +403,39 @@ def querydata_async(
         ):
             raise Exception("Query returned no segments.")
 
-        query_parser, partitions, drop_capture_uuid = partition_query(query)
+        (
+            query_parser,
+            profile_df,
+            row_memory_size,
+            drop_capture_uuid,
+        ) = get_query_profile(query)
+
+        # partitions whose captures did not change since the last build are kept
+        datastore = get_query_datastore(query.uuid)
+        manifest = load_query_manifest(query.uuid)
+        definition_key = get_query_definition_key(
+            query, query_parser, drop_capture_uuid
+        )
+        kept, partitions, capture_keys = plan_query_partitions(
+            manifest, definition_key, profile_df, row_memory_size
+        )
+
+        if kept:
+            next_partition = manifest["next_partition"]
+            segment_count = manifest["next_segment"]
+        else:
+            # a full rebuild reuses the partition names, the old manifest would
+            # describe the new files if the build stopped half way
+            if manifest is not None:
+                datastore.delete(QUERY_MANIFEST_NAME)
+            next_partition = 0
+            segment_count = 0
 
         logger.userlog(
             {
-                "message": " Querying in {} parts".format(len(partitions)),
+                "message": " Querying in {} parts, {} cached parts kept".format(
+                    len(partitions), len(kept)
+                ),
                 "log_type": "PID",
                 "sandbox_uuid": pipeline_id if pipeline_id is not None else query_id,
                 "task_id": task_id if task_id is not None else self.request.id,
@@ -412,17 +443,10 @@ def querydata_async(
             }
         )
 
-        segment_count = 0
-
-        datastore = get_datastore(
-            folder=os.path.join(
-                get_datastore_basedir(settings.SERVER_QUERY_ROOT), str(query_id)
-            )
-        )
-
-        cache = []
+        query_infos = []
+        new_partitions = []
 
-        for index, partition in enumerate(partitions):
+        for index, partition in enumerate(partitions, start=next_partition):
             fmt = ".pkl"
             partition_name = "{}.{}{}".format(query_id, index, fmt)
 
@@ -435,18 +459,55 @@ def querydata_async(
             tmp_query["segment_uuid"] = query_parser.return_segment_uuid
             tmp_query["segment_start"] = segment_count
 
+            new_partitions.append(
+                {
+                    "name": partition_name,
+                    "segment_start": segment_count,
+                    "captures": {
+                        str(segment["capture_id"]): capture_keys[
+                            str(segment["capture_id"])
+                        ]
+                        for segment in partition
+                    },
+                }
+            )
+
             segment_count += len(partition)
 
-            data = query_driver_from_csv_to_datasegments(
-                task_id=task_id if task_id is not None else self.request.id,
-                query_info=tmp_query,
-                project_id=project_id,
-                pipeline_id=pipeline_id if pipeline_id is not None else query_id,
-                exclude_metadata_value=["capture_uuid"] if drop_capture_uuid else None,
+            query_infos.append(tmp_query)
+
+        exclude_metadata_value = ["capture_uuid"] if drop_capture_uuid else None
+
+        if len(query_infos) > 1:
+            new_cache = build_query_partitions_parallel(
+                query,
+                query_infos,
+                user.id,
+                pipeline_id if pipeline_id is not None else query_id,
+                task_id if task_id is not None else self.request.id,
+                exclude_metadata_value,
             )
+        else:
+            new_cache = [
+                materialize_query_partition(
+                    query_id,
+                    tmp_query,
+                    project_id,
+                    pipeline_id if pipeline_id is not None else query_id,
+                    task_id if task_id is not None else self.request.id,
+                    exclude_metadata_value=exclude_metadata_value,
+                )
+                for tmp_query in query_infos
+            ]
 
-            cache.append([len(data), partition_name])
-            datastore.save_data(data=data, key=partition_name, fmt=fmt)
+        for partition, (num_segments, _) in zip(new_partitions, new_cache):
+            partition["num_segments"] = num_segments
+
+        partitions_manifest = kept + new_partitions
+        cache = [
+            [partition["num_segments"], partition["name"]]
+            for partition in partitions_manifest
+        ]
 
         query.segment_info = _get_query_segment_statistics(
             user=None, project_uuid=query.project.uuid, query_id=query.uuid, query=query
@@ -460,6 +521,24 @@ def querydata_async(
 
         query.save()
 
+        datastore.save_data(
+            data={
+                "definition": definition_key,
+                "next_partition": next_partition + len(new_partitions),
+                "next_segment": segment_count,
+                "partitions": partitions_manifest,
+            },
+            key=QUERY_MANIFEST_NAME,
+            fmt=".json",
+        )
+
+        # files of partitions that were rebuilt are no longer part of the query
+        if manifest is not None:
+            current_names = set(partition["name"] for partition in partitions_manifest)
+            for partition in manifest["partitions"]:
+                if partition["name"] not in current_names:
+                    datastore.delete(partition["name"])
+
         logger.userlog(
             {
                 "message": "Query Statistics",
@@ -526,6 +605,75 @@ def querydata_async(
     )
 
 
+def build_query_partitions_parallel(
+    query, query_infos, user_id, pipeline_id, task_id, exclude_metadata_value
+):
+    """Materializes the query partitions on the pipeline step workers and returns the
+    query cache in partition order. The partitions are handed to the workers through
+    plan files in the query datastore to keep the task messages small."""
+    from datamanager.query import get_query_datastore, query_partition_driver
+    from engine.base.pipeline_steps import parallel_pipeline_step
+
+    datastore = get_query_datastore(query.uuid)
+
+    steps = []
+    for index, query_info in enumerate(query_infos):
+        plan = "{}.{}.plan.pkl".format(query.uuid, index)
+        datastore.save_data(data=query_info, key=plan, fmt=".pkl")
+        steps.append(
+            {
+                "name": "Query Partition",
+                "type": "query",
+                "query_id": str(query.uuid),
+                "plan": plan,
+                "exclude_metadata_value": exclude_metadata_value,
+                "outputs": query_info["outputs"],
+            }
+        )
+
+    finished = []
+
+    def log_partition_progress(index, result):
+        finished.append(index)
+        logger.userlog(
+            {
+                "message": "Query partition {} of {} cached".format(
+                    len(finished), len(steps)
+                ),
+                "data": {
+                    "partition": index,
+                    "segments": result[1][0] if result[0] is not None else None,
+                },
+                "log_type": "PID",
+                "query_uuid": query.uuid,
+                "task_id": task_id,
+                "sandbox_uuid": pipeline_id,
+                "project_uuid": query.project.uuid,
+            }
+        )
+
+    try:
+        results = parallel_pipeline_step(
+            query_partition_driver,
+            steps,
+            query.project.team.uuid,
+            query.project.uuid,
+            str(pipeline_id),
+            user_id,
+            return_results=True,
+            on_job_finished=log_partition_progress,
+        )
+    finally:
+        for step in steps:
+            datastore.delete(step["plan"])
+
+    for index, result in enumerate(results):
+        if result[0] is None:
+            raise Exception("Query partition {} failed: {}".format(index, result[1]))
+
+    return [result[1] for result in results]
+
+
 @shared_task(bind=True, base=UnlockSandboxTask, ignore_result=False, track_started=True)
 def gridsearch_async(
     self, user_id, project_id, sandbox_id, params, run_parallel, err_queue=deque()
@@ -1038,8 +1186,11 @@ def recognize_signal_async(
 
         ############################################################
 
-        # Get the knowledgepack and recognize
-        kp = locate_knowledgepack(user, project_id, knowledgepack_id)
+        # Get the knowledgepack and recognize, the model is only read when it is not in
+        # the worker model cache
+        kp = locate_knowledgepack(
+            user, project_id, knowledgepack_id, defer=["neuron_array"]
+        )
 
         try:
             for key in kb_description:
@@ -0,0 +1,93 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+from datamanager.capture_store import (
+    get_capture_store_path,
+    open_capture_store,
+    write_capture_store,
+)
+from pandas import DataFrame
+
+
+def get_capture(sequence):
+    return DataFrame(
+        {
+            "timestamp": np.arange(len(sequence)) * 10,
+            "Accel X": np.arange(len(sequence)) * 2,
+            "GyroY": np.arange(len(sequence)) * 0.5,
+        },
+        index=sequence,
+    ).rename_axis(index="sequence")
+
+
+def test_capture_store_contiguous(tmp_path):
+    capture_file = str(tmp_path / "capture")
+    data = get_capture(np.arange(5, 105))
+
+    write_capture_store(
+        capture_file, data, {"Accel_X": {"type": "int"}, "GyroY": {"type": "float"}}
+    )
+    store = open_capture_store(capture_file)
+
+    assert len(store) == 100
+    assert store.columns == ["Accel_X", "GyroY"]
+
+    result = store.read_array(["GyroY", "Accel_X"], 10, 19)
+    assert result.shape == (2, 10)
+    assert np.array_equal(result[1], np.arange(5, 15) * 2)
+    assert np.array_equal(result[0], np.arange(5, 15) * 0.5)
+
+    # same inclusive range semantics as DataFrame.loc
+    expected = data.loc[0:7, ["Accel X"]].values.T
+    assert np.array_equal(store.read_array(["Accel_X"], 0, 7), expected)
+    assert store.read_array(["Accel_X"], 200, 300).shape == (1, 0)
+
+    result = store.read_dataframe(index=True)
+    assert result.index.name == "sequence"
+    assert np.array_equal(result.index, data.index)
+    assert result["Accel_X"].dtype == np.int32
+    assert result["GyroY"].dtype == np.float32
+
+
+def test_capture_store_sequence(tmp_path):
+    capture_file = str(tmp_path / "capture")
+    data = get_capture(np.array([0, 1, 2, 5, 6, 9, 12]))
+
+    write_capture_store(capture_file, data, fmt=".wav")
+    store = open_capture_store(capture_file)
+
+    result = store.read_array(["Accel_X"], 2, 9)
+    assert np.array_equal(result, data.loc[2:9, ["Accel X"]].values.T)
+    assert store.read_dataframe()["Accel_X"].dtype == np.int16
+
+    # unsorted sequences select the samples within the range
+    write_capture_store(capture_file, data.iloc[::-1])
+    store = open_capture_store(capture_file)
+    result = store.read_dataframe(start=2, end=9, index=True)
+    assert list(result.index) == [9, 6, 5, 2]
+
+
+def test_open_capture_store_missing(tmp_path):
+    capture_file = str(tmp_path / "capture")
+    assert open_capture_store(capture_file) is None
+
+    with open(get_capture_store_path(capture_file), "w") as fid:
+        fid.write("not a capture store")
+    assert open_capture_store(capture_file) is None
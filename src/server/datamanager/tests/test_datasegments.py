@@ -17,9 +17,15 @@ You should have received a copy of the GNU Affero General Public
 License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import pickle
+
+import numpy as np
 from datamanager.datasegments import (
+    ColumnarDataSegments,
     DataSegments,
     dataframe_to_datasegments,
+    datasegments_equal,
+    to_columnar_datasegments,
 )
 from pandas import DataFrame
 
@@ -99,3 +105,59 @@ def test_datasegment_summary_no_data():
         "distribution_samples": {},
     }
     assert expected_result == result
+
+
+def test_columnar_datasegments():
+    data = DataFrame(
+        {
+            "X": list(range(10)),
+            "Y": [-1] * 10,
+            "segment_uuid": [2] * 5 + [1] * 5,
+            "capture_uuid": ["red"] * 3 + ["blue"] * 7,
+        },
+        columns=["X", "Y", "segment_uuid", "capture_uuid"],
+    )
+
+    segments = dataframe_to_datasegments(
+        data, data_columns=["X", "Y"], group_columns=["segment_uuid", "capture_uuid"]
+    )
+    columnar = ColumnarDataSegments.from_dataframe(
+        data, data_columns=["X", "Y"], group_columns=["segment_uuid", "capture_uuid"]
+    )
+
+    assert len(columnar) == 3
+    assert columnar.offsets.tolist() == [0, 5, 7, 10]
+    assert datasegments_equal(segments, columnar.to_list())
+    assert datasegments_equal(segments, ColumnarDataSegments.from_segments(segments))
+    assert datasegments_equal(segments[1:], columnar[1:])
+    assert datasegments_equal(segments, pickle.loads(pickle.dumps(columnar)))
+
+    # segments are views into the shared sample buffer
+    assert columnar[1]["data"].base is columnar.data
+
+    assert DataSegments(segments).summary() == DataSegments(columnar).summary()
+    assert (
+        DataSegments(segments)
+        .to_dataframe()
+        .equals(DataSegments(columnar).to_dataframe())
+    )
+
+
+def test_to_columnar_datasegments_mixed_layout():
+    segments = [
+        {
+            "columns": ["X"],
+            "metadata": {"SegmentID": 0},
+            "statistics": {},
+            "data": np.zeros((1, 5), dtype=np.int32),
+        },
+        {
+            "columns": ["X", "Y"],
+            "metadata": {"SegmentID": 1},
+            "statistics": {},
+            "data": np.zeros((2, 5), dtype=np.int32),
+        },
+    ]
+
+    assert to_columnar_datasegments(segments) is segments
+    assert isinstance(to_columnar_datasegments(segments[:1]), ColumnarDataSegments)
@@ -0,0 +1,134 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+from datamanager.datasegments import ColumnarDataSegments, datasegments_equal
+from datamanager.datastore import (
+    DataProjection,
+    LocalDataStoreService,
+    get_cache_format,
+)
+from pandas import DataFrame
+
+
+def get_segments():
+    return [
+        {
+            "columns": ["X", "Y"],
+            "metadata": {"Label": label, "SegmentID": index},
+            "statistics": {},
+            "data": np.arange(index, index + 2 * length, dtype=np.int16).reshape(2, -1),
+        }
+        for index, (label, length) in enumerate([("A", 5), ("B", 3), ("A", 7)])
+    ]
+
+
+def test_save_data_npz_dataframe(tmp_path):
+    datastore = LocalDataStoreService(bucket=str(tmp_path), folder="cache")
+
+    data = DataFrame(
+        {
+            "gen_0001_XMean": np.array([1.5, 2.5, 3.5], dtype=np.float32),
+            "Label": ["A", "B", "A"],
+            "SegmentID": [0, 1, 2],
+        }
+    )
+
+    datastore.save_data(data, "features.csv.gz", ".npz")
+
+    result = datastore.get_data("features.csv.gz")
+    assert result.equals(data)
+
+    result = datastore.get_data("features.csv.gz", columns=["SegmentID", "Label"])
+    assert result.equals(data[["SegmentID", "Label"]])
+
+    # existing gzipped csv entries are still read from their extension
+    datastore.save_data(data, "legacy.csv.gz", ".csv.gz")
+    result = datastore.get_data("legacy.csv.gz", columns=["Label"])
+    assert list(result.columns) == ["Label"]
+
+
+def test_save_data_npz_datasegments(tmp_path):
+    datastore = LocalDataStoreService(bucket=str(tmp_path), folder="cache")
+
+    segments = get_segments()
+    datastore.save_data(
+        ColumnarDataSegments.from_segments(segments), "segments.pkl", ".npz"
+    )
+
+    result = datastore.get_data("segments.pkl")
+    assert isinstance(result, ColumnarDataSegments)
+    assert datasegments_equal(segments, result)
+
+    result = datastore.get_data("segments.pkl", columns=["Y"])
+    assert result.columns == ["Y"]
+    for index, segment in enumerate(result):
+        assert np.array_equal(segment["data"], segments[index]["data"][[1]])
+
+    datastore.save_data(segments, "legacy.pkl", ".pkl")
+    assert datasegments_equal(segments, datastore.get_data("legacy.pkl"))
+
+
+def test_save_data_npz_stored_datasegments(tmp_path):
+    datastore = LocalDataStoreService(bucket=str(tmp_path), folder="cache")
+
+    segments = ColumnarDataSegments.from_segments(get_segments())
+    fmt = get_cache_format(segments, ".pkl", "mmap")
+    datastore.save_data(segments, "segments.pkl", fmt)
+
+    result = datastore.get_data("segments.pkl")
+    assert isinstance(result.data, np.memmap)
+    assert result.data.ctypes.data % 64 == 0
+    assert datasegments_equal(segments, result)
+
+    # writes to the mapped buffer are not written back to the cache
+    result[0]["data"][:] = 0
+    assert datasegments_equal(segments, datastore.get_data("segments.pkl"))
+
+    assert get_cache_format(segments, ".pkl", "csv") == ".pkl"
+    assert get_cache_format({}, ".json", "mmap") == ".json"
+
+
+def test_save_data_projection(tmp_path):
+    datastore = LocalDataStoreService(bucket=str(tmp_path), folder="cache")
+
+    data = DataFrame(
+        {
+            "gen_0001_XMean": np.array([1.5, 2.5, 3.5], dtype=np.float32),
+            "gen_0002_XStd": np.array([0.5, 0.0, 1.0]),
+            "Label": ["A", "B", "A"],
+        }
+    )
+    fmt = get_cache_format(data, ".csv.gz", "mmap")
+    datastore.save_data(data, "features.csv.gz", fmt)
+    assert datastore.is_npz_dataframe("features.csv.gz")
+
+    projection = DataProjection("features.csv.gz", ["Label", "gen_0002_XStd"])
+    datastore.save_data(projection, "selected.csv.gz", ".npz.projection")
+    assert not datastore.is_npz_dataframe("selected.csv.gz")
+
+    result = datastore.get_data("selected.csv.gz")
+    assert result.equals(data[["Label", "gen_0002_XStd"]])
+
+    result = datastore.get_data("selected.csv.gz", columns=["gen_0002_XStd"])
+    assert result.equals(data[["gen_0002_XStd"]])
+
+    with pytest.raises(KeyError):
+        datastore.get_data("selected.csv.gz", columns=["gen_0001_XMean"])
@@ -19,11 +19,20 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 import os
 import tempfile
+import wave
 from uuid import uuid4
 
+import numpy as np
 import pytest
-from datamanager.utils.file_reader import CSVFileReader, WaveFileReader
-from pandas import DataFrame, read_csv
+from datamanager.exceptions import BadCaptureSchemaError
+from datamanager.utils import file_reader
+from datamanager.utils.file_reader import (
+    CSVFileReader,
+    CSVFileStreamReader,
+    WaveFileReader,
+    WaveFileStreamReader,
+)
+from pandas import DataFrame, concat, read_csv
 
 
 @pytest.fixture
@@ -206,3 +215,70 @@ def test_wave_reader_2_channel():
     assert wfr._dataframe.shape == (112, 2)
 
     os.remove(tmp_path)
+
+
+def test_csv_stream_reader(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_reader, "SCHEMA_PREFIX_ROWS", 3)
+
+    path = str(tmp_path / "capture.csv")
+    with open(path, "w") as f:
+        f.write("sequence,Accel X,GyroY\n")
+        for i in range(10):
+            f.write("{},{},{}\n".format(i * 2 + 5, i, "1.5" if i == 8 else i))
+
+    reader = CSVFileStreamReader(path, chunksize=3)
+
+    # the schema of the first rows is widened by the chunks read later
+    assert reader.schema == {"Accel_X": {"type": "int"}, "GyroY": {"type": "int"}}
+
+    chunks = list(reader.chunks())
+    assert len(chunks) == 4
+    assert list(chunks[1].index) == [11, 13, 15]
+
+    assert reader.schema == {"Accel_X": {"type": "int"}, "GyroY": {"type": "float"}}
+    assert reader.num_samples == 10
+    assert reader.max_sequence == 23
+
+
+def test_csv_stream_reader_adds_sequence(tmp_path):
+    path = str(tmp_path / "capture.csv")
+    with open(path, "w") as f:
+        f.write("AccelerometerX,AccelerometerY\n1,2\n3,4\n5,6\n7,8\n9,10")
+
+    reader = CSVFileStreamReader(path, chunksize=2).validate()
+
+    assert reader.num_samples == 5
+    assert reader.max_sequence == 4
+
+    data = read_csv(path)
+    assert list(data.columns) == ["sequence", "AccelerometerX", "AccelerometerY"]
+    assert list(data["sequence"]) == [0, 1, 2, 3, 4]
+    assert list(data["AccelerometerY"]) == [2, 4, 6, 8, 10]
+
+
+def test_csv_stream_reader_sequence_error(tmp_path):
+    path = str(tmp_path / "capture.csv")
+    with open(path, "w") as f:
+        f.write("sequence,AccelerometerX\n0,1\n1,2\n2,3\n2,4\n3,5")
+
+    with pytest.raises(BadCaptureSchemaError):
+        CSVFileStreamReader(path, chunksize=3).validate()
+
+
+def test_wave_stream_reader_2_channel():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data/2channel.wav")
+
+    reader = WaveFileStreamReader(path, chunksize=50)
+    assert reader.schema == {
+        "channel_0": {"type": "int"},
+        "channel_1": {"type": "int"},
+    }
+
+    data = concat(list(reader.chunks()))
+
+    assert reader.num_samples == 112
+    assert reader.max_sequence == 111
+    assert list(data.index) == list(range(112))
+    with wave.open(path, "rb") as wave_reader:
+        frames = wave_reader.readframes(wave_reader.getnframes())
+    assert np.array_equal(data.values.ravel(), np.frombuffer(frames, dtype=np.int16))
@@ -1264,6 +1264,92 @@ def test_query_data_task(query_id, client, query_list):
     assert not os.path.exists(os.path.join(settings.SERVER_QUERY_ROOT, str(query_uuid)))
 
 
+@pytest.mark.django_db(transaction=True)
+def test_query_data_task_incremental(client, query_list):
+    from datamanager.query import get_query_datastore
+    from datamanager.tasks import querydata_async
+
+    project, query, query_with_filter, query_with_capture_id, segmenter = query_list
+    user_id = TeamMember.objects.get(pk=1).user.id
+    datastore = get_query_datastore(query.uuid)
+
+    querydata_async(user_id, query.project.uuid, query.uuid)
+    query.refresh_from_db()
+    cache = query.cache
+    modified = os.path.getmtime(datastore._fold(cache[0][1]))
+
+    # nothing changed, the partitions are kept
+    querydata_async(user_id, query.project.uuid, query.uuid)
+    query.refresh_from_db()
+    assert query.cache == cache
+    assert os.path.getmtime(datastore._fold(cache[0][1])) == modified
+
+    # relabeling a capture rebuilds its partition under a new name
+    CaptureLabelValue.objects.filter(
+        project=project, label__name=query.label_column, segmenter=query.segmenter
+    ).first().delete()
+
+    querydata_async(user_id, query.project.uuid, query.uuid)
+    query.refresh_from_db()
+    assert query.cache != cache
+    assert sum(size for size, _ in query.cache) == sum(size for size, _ in cache) - 1
+    assert not os.path.exists(datastore._fold(cache[0][1]))
+
+    query.delete()
+
+
+def test_plan_query_partitions(settings):
+    from datamanager.query import plan_query_partitions
+
+    settings.SHARD_MEMORY_SPLIT_SIZE = 1000
+    settings.SHARD_SEGMENT_SPLIT_SIZE = 2
+
+    profile_df = DataFrame(
+        {
+            "capture_id": [1, 1, 2, 3],
+            "segmentid": ["a", "b", "c", "d"],
+            "seg_start": [0, 10, 0, 0],
+            "seg_end": [9, 19, 9, 9],
+            "length": [10, 10, 10, 10],
+            "Label": ["A", "B", "A", "B"],
+        }
+    )
+
+    kept, partitions, capture_keys = plan_query_partitions(None, "key", profile_df, 1)
+    assert kept == []
+    assert [[segment["segmentid"] for segment in p] for p in partitions] == [
+        ["a", "b"],
+        ["c", "d"],
+    ]
+
+    manifest = {
+        "definition": "key",
+        "partitions": [
+            {"name": "q.0.pkl", "captures": {"1": capture_keys["1"]}},
+            {
+                "name": "q.1.pkl",
+                "captures": {"2": capture_keys["2"], "3": capture_keys["3"]},
+            },
+        ],
+    }
+
+    # capture 3 is relabeled and capture 4 is added
+    profile_df.loc[3, "Label"] = "A"
+    profile_df.loc[4] = [4, "e", 0, 9, 10, "B"]
+
+    kept, partitions, _ = plan_query_partitions(manifest, "key", profile_df, 1)
+    assert [partition["name"] for partition in kept] == ["q.0.pkl"]
+    assert [[segment["segmentid"] for segment in p] for p in partitions] == [
+        ["c", "d"],
+        ["e"],
+    ]
+
+    # partitions of another query definition are never kept
+    kept, partitions, _ = plan_query_partitions(manifest, "other", profile_df, 1)
+    assert kept == []
+    assert len(partitions) == 3
+
+
 @pytest.mark.django_db(transaction=True)
 def test_partition_query(client, query_list_large):
     project, query, segmenter = query_list_large
@@ -1316,3 +1402,113 @@ def test_query_driver_from_csv_to_datasegment(client, query_list_large_with_csv)
         cache.append([sum([x["data"].shape[1] for x in data]), partition_name])
 
     print(cache)
+
+
+@pytest.fixture
+def eager_pipeline_step_jobs(monkeypatch):
+    """Runs the jobs of parallel_pipeline_step in process"""
+    from engine.base import pipeline_steps
+
+    monkeypatch.setattr(
+        pipeline_steps, "submit_pipeline_step_job", lambda job: job.apply()
+    )
+    monkeypatch.setattr(
+        pipeline_steps, "collect_pipeline_step_job", lambda result: result.result
+    )
+
+
+def get_partition_query_infos(query, query_parser, partitions):
+    query_infos = []
+    segment_count = 0
+    for index, partition in enumerate(partitions):
+        tmp_query = {}
+        tmp_query["outputs"] = ["{}.{}.pkl".format(query.uuid, index)]
+        tmp_query["query_info"] = partition
+        tmp_query["metadata"] = query_parser._metadata
+        tmp_query["label"] = query_parser._label
+        tmp_query["columns"] = query_parser._columns
+        tmp_query["segment_uuid"] = query_parser.return_segment_uuid
+        tmp_query["segment_start"] = segment_count
+
+        segment_count += len(partition)
+
+        query_infos.append(tmp_query)
+
+    return query_infos
+
+
+@pytest.mark.django_db(transaction=True)
+def test_build_query_partitions_parallel(
+    settings, query_list, eager_pipeline_step_jobs
+):
+    from datamanager.datasegments import datasegments_equal
+    from datamanager.query import get_query_datastore, materialize_query_partition
+    from datamanager.tasks import build_query_partitions_parallel
+
+    settings.SHARD_SEGMENT_SPLIT_SIZE = 4
+
+    project, query, query_with_filter, query_with_capture_id, segmenter = query_list
+    user_id = TeamMember.objects.get(pk=1).user.id
+    datastore = get_query_datastore(query.uuid)
+
+    query_parser, partitions, drop_capture_uuid = partition_query(query)
+    query_infos = get_partition_query_infos(query, query_parser, partitions)
+    exclude_metadata_value = ["capture_uuid"] if drop_capture_uuid else None
+
+    assert len(query_infos) == 3
+
+    sequential_cache = []
+    sequential_data = []
+    for query_info in query_infos:
+        sequential_cache.append(
+            materialize_query_partition(
+                query.uuid,
+                query_info,
+                project.uuid,
+                query.uuid,
+                "TestQueryPartitions",
+                exclude_metadata_value=exclude_metadata_value,
+            )
+        )
+        sequential_data.append(datastore.get_data(sequential_cache[-1][1]))
+        datastore.delete(sequential_cache[-1][1])
+
+    cache = build_query_partitions_parallel(
+        query,
+        query_infos,
+        user_id,
+        query.uuid,
+        "TestQueryPartitions",
+        exclude_metadata_value,
+    )
+
+    # the cache is in partition order and the partitions match the sequential build
+    assert cache == sequential_cache
+    for (num_segments, name), expected in zip(cache, sequential_data):
+        data = datastore.get_data(name)
+        assert len(data) == num_segments
+        assert datasegments_equal(data, expected)
+
+    # the plan files are removed
+    for index in range(len(query_infos)):
+        assert not datastore.key_exists("{}.{}.plan.pkl".format(query.uuid, index))
+
+    # a failed partition fails the build, the plan files are still removed
+    query_infos[1]["query_info"] = [
+        dict(segment, capture_file="missing") for segment in partitions[1]
+    ]
+
+    with pytest.raises(Exception, match="Query partition 1 failed"):
+        build_query_partitions_parallel(
+            query,
+            query_infos,
+            user_id,
+            query.uuid,
+            "TestQueryPartitions",
+            exclude_metadata_value,
+        )
+
+    for index in range(len(query_infos)):
+        assert not datastore.key_exists("{}.{}.plan.pkl".format(query.uuid, index))
+
+    query.delete()
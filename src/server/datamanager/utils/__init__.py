@@ -150,6 +150,57 @@ class UtilErrorEncoder(json.JSONEncoder):
         return obj.__dict__
 
 
+# Loaded custom transform libraries by (library pack uuid, build version)
+custom_libraries = {}
+
+# Core function callables by (module name, function name)
+core_functions = {}
+
+
+def get_custom_library(library_pack):
+    """Returns the python library of a custom library pack build, downloading and
+    loading it once per process. Uploading a new build increments build_version, so
+    the previous build of the pack is dropped when the new one is loaded."""
+    key = (str(library_pack.uuid), library_pack.build_version)
+    if key in custom_libraries:
+        return custom_libraries[key]
+
+    library_path = os.path.join(
+        settings.SERVER_CUSTOM_TRANSFORM_ROOT,
+        "{uuid}/embedded_ml_sdk/fg_custom_library_{build_version}.py",
+    ).format(uuid=library_pack.uuid, build_version=library_pack.build_version)
+
+    if not os.path.exists(library_path):
+        datastore = get_datastore(
+            folder="custom_transforms/{}".format(library_pack.uuid)
+        )
+        key_name = "embedded_ml_sdk.zip"
+        local_code_dir = "{0}/{1}".format(
+            settings.SERVER_CUSTOM_TRANSFORM_ROOT,
+            library_pack.uuid,
+        )
+        file_path = os.path.join(local_code_dir, key_name)
+        ensure_path_exists(settings.SERVER_CUSTOM_TRANSFORM_ROOT)
+        ensure_path_exists(local_code_dir)
+
+        datastore.get(key=key_name, file_path=file_path)
+        shutil.unpack_archive(
+            file_path,
+            extract_dir=os.path.join(local_code_dir, "embedded_ml_sdk"),
+        )
+
+    spec = importlib.util.spec_from_file_location("fg_custom_library", library_path)
+
+    lib = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(lib)
+
+    for cached_key in [k for k in custom_libraries if k[0] == key[0]]:
+        del custom_libraries[cached_key]
+    custom_libraries[key] = lib
+
+    return lib
+
+
 def get_function(transform, function_to_get=""):
     """Dynamically import a module/function from the library path"""
     if function_to_get:
@@ -159,48 +210,7 @@ def get_function(transform, function_to_get=""):
         function_in_file = transform.function_in_file
 
     if transform.custom:
-        if not os.path.exists(
-            os.path.join(
-                settings.SERVER_CUSTOM_TRANSFORM_ROOT,
-                "{uuid}/embedded_ml_sdk/fg_custom_library_{build_version}.py",
-            ).format(
-                uuid=transform.library_pack.uuid,
-                build_version=transform.library_pack.build_version,
-            )
-        ):
-            datastore = get_datastore(
-                folder="custom_transforms/{}".format(transform.library_pack.uuid)
-            )
-            key = "embedded_ml_sdk.zip"
-            local_code_dir = "{0}/{1}".format(
-                settings.SERVER_CUSTOM_TRANSFORM_ROOT,
-                transform.library_pack.uuid,
-            )
-            file_path = os.path.join(local_code_dir, key)
-            ensure_path_exists(settings.SERVER_CUSTOM_TRANSFORM_ROOT)
-            ensure_path_exists(local_code_dir)
-
-            datastore.get(key=key, file_path=file_path)
-            shutil.unpack_archive(
-                file_path,
-                extract_dir=os.path.join(local_code_dir, "embedded_ml_sdk"),
-            )
-
-        spec = importlib.util.spec_from_file_location(
-            "fg_custom_library",
-            os.path.join(
-                settings.SERVER_CUSTOM_TRANSFORM_ROOT,
-                "{uuid}/embedded_ml_sdk/fg_custom_library_{build_version}.py",
-            ).format(
-                uuid=transform.library_pack.uuid,
-                build_version=transform.library_pack.build_version,
-            ),
-        )
-
-        lib = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(lib)
-
-        return getattr(lib, function_in_file)
+        return getattr(get_custom_library(transform.library_pack), function_in_file)
 
     try:
         is_core_function = transform.core
@@ -212,7 +222,11 @@ def get_function(transform, function_to_get=""):
     else:
         file_name = str(transform.uuid)
 
-    return getattr(importlib.import_module("library." + file_name), function_in_file)
+    key = ("library." + file_name, function_in_file)
+    if key not in core_functions:
+        core_functions[key] = getattr(importlib.import_module(key[0]), function_in_file)
+
+    return core_functions[key]
 
 
 def ensure_path_exists(path):
@@ -19,15 +19,24 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 import csv
 import logging
+import os
 import re
 import wave
+from abc import ABC, abstractmethod
+from uuid import uuid4
 
 import numpy as np
 from datamanager.exceptions import BadCaptureSchemaError
-from pandas import DataFrame, read_csv
+from pandas import DataFrame, RangeIndex, read_csv
 
 logger = logging.getLogger(__name__)
 
+# Number of rows the schema of a streamed capture is inferred from
+SCHEMA_PREFIX_ROWS = 1000
+
+# Number of samples validated at a time when streaming a capture
+CHUNK_SIZE = 100000
+
 
 def sanitize_fields(fieldnames):
     # return {fieldname:  re.sub('[^0-9a-zA-Z]+', '_', fieldname) for fieldname in fieldnames}
@@ -45,6 +54,36 @@ def validate_fieldnames(fieldnames):
             )
 
 
+def read_fieldnames(file_path):
+    """Reads and validates the header of a CSV file."""
+    with open(file_path, "r") as fid:
+        reader = csv.DictReader(fid)
+
+        if len(reader.fieldnames) is not len(set(reader.fieldnames)):
+            raise BadCaptureSchemaError(
+                "Invalid file schema: duplicate column names are not allowed."
+            )
+
+        if any(not x for x in reader.fieldnames):
+            raise BadCaptureSchemaError(
+                "Invalid column name: blank column names are not allowed."
+            )
+
+        validate_fieldnames(reader.fieldnames)
+
+        return reader.fieldnames
+
+
+def merge_schema(schema, chunk_schema):
+    """Widens the column types of schema with the types inferred from another chunk of
+    the same file, a column is a float as soon as any chunk holds a float."""
+    for key, item in chunk_schema.items():
+        if key not in schema or item["type"] == "float":
+            schema[key] = item
+
+    return schema
+
+
 def make_schema(dataframe):
 
     invalid_columns = []
@@ -108,24 +147,8 @@ class CSVFileReader(FileReader):
     def __init__(self, file_path):
         self._file_path = file_path
 
-        with open(file_path, "r") as fid:
-            reader = csv.DictReader(fid)
-
-            if len(reader.fieldnames) is not len(set(reader.fieldnames)):
-                raise BadCaptureSchemaError(
-                    "Invalid file schema: duplicate column names are not allowed."
-                )
-
-            if any(not x for x in reader.fieldnames):
-                raise BadCaptureSchemaError(
-                    "Invalid column name: blank column names are not allowed."
-                )
-
-            validate_fieldnames(reader.fieldnames)
-
-            self._mapping = sanitize_fields(reader.fieldnames)
-
-            self._fieldnames = reader.fieldnames
+        self._fieldnames = read_fieldnames(file_path)
+        self._mapping = sanitize_fields(self._fieldnames)
 
         if "sequence" in self.fieldnames:
             self._dataframe = read_csv(file_path, index_col="sequence")
@@ -164,3 +187,153 @@ class WaveFileReader(FileReader):
         self._dataframe.to_csv(tmp_file_path, index=None)
 
         return CSVFileReader(tmp_file_path)
+
+
+class StreamFileReader(FileReader, ABC):
+    """Base class of the readers that validate a capture without loading it.
+
+    The schema is inferred from the first rows of the file when the reader is created.
+    Iterating over chunks() streams the rest of the file CHUNK_SIZE samples at a
+    time, validating every chunk and widening the schema with its column types, so
+    memory does not grow with the size of the capture. The number of samples and the
+    last sequence number are known once every chunk has been read.
+    """
+
+    _num_samples = None
+    _max_sequence = None
+
+    def __init__(self, file_path, chunksize=CHUNK_SIZE):
+        self._file_path = file_path
+        self._chunksize = chunksize
+
+    @property
+    def num_samples(self):
+        return self._num_samples
+
+    @property
+    def max_sequence(self):
+        return self._max_sequence
+
+    @abstractmethod
+    def _read_chunks(self):
+        """Yields the capture as DataFrames of at most chunksize samples."""
+
+    def chunks(self):
+        """Yields the samples of the capture as DataFrames indexed by sequence."""
+        num_samples = 0
+        last_sequence = None
+
+        for chunk in self._read_chunks():
+            sequence = chunk.index.values
+            if len(sequence) == 0:
+                continue
+
+            if (last_sequence is not None and sequence[0] <= last_sequence) or (
+                len(sequence) > 1 and np.any(np.diff(sequence) <= 0)
+            ):
+                raise BadCaptureSchemaError(
+                    "Invalid sequence: sequence values must be increasing."
+                )
+
+            num_samples += len(sequence)
+            last_sequence = sequence[-1]
+
+            yield chunk
+
+        if not num_samples:
+            raise BadCaptureSchemaError("Invalid file: the file contains no samples.")
+
+        self._num_samples = num_samples
+        self._max_sequence = last_sequence
+
+    def validate(self):
+        """Reads every chunk of the capture and returns the reader."""
+        for _ in self.chunks():
+            pass
+
+        return self
+
+
+class CSVFileStreamReader(StreamFileReader):
+    """Validates CSV Files in chunks of rows"""
+
+    def __init__(self, file_path, chunksize=CHUNK_SIZE):
+        super(CSVFileStreamReader, self).__init__(file_path, chunksize)
+
+        self._fieldnames = read_fieldnames(file_path)
+        self._mapping = sanitize_fields(self._fieldnames)
+        self._has_sequence = "sequence" in self._fieldnames
+        if not self._has_sequence:
+            self._mapping["sequence"] = "sequence"
+
+        self._schema = make_schema(
+            read_csv(
+                file_path,
+                nrows=SCHEMA_PREFIX_ROWS,
+                index_col="sequence" if self._has_sequence else None,
+            )
+        )
+
+    def _read_chunks(self):
+        if self._has_sequence:
+            for chunk in read_csv(
+                self._file_path, index_col="sequence", chunksize=self._chunksize
+            ):
+                merge_schema(self._schema, make_schema(chunk))
+                yield chunk
+            return
+
+        # files without sequence numbers are rewritten with one, numbering the samples
+        # from 0, while they are streamed
+        tmp_file_path = "{}.{}".format(self._file_path, uuid4())
+        try:
+            with open(tmp_file_path, "w", newline="") as fid:
+                start = 0
+                for chunk in read_csv(self._file_path, chunksize=self._chunksize):
+                    merge_schema(self._schema, make_schema(chunk))
+                    chunk.index = RangeIndex(start, start + len(chunk), name="sequence")
+                    chunk.to_csv(fid, header=start == 0)
+                    start += len(chunk)
+                    yield chunk
+
+            os.replace(tmp_file_path, self._file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+
+class WaveFileStreamReader(StreamFileReader):
+    """Validates WAV Files from their header and reads them in chunks of frames"""
+
+    def __init__(self, file_path, chunksize=CHUNK_SIZE):
+        super(WaveFileStreamReader, self).__init__(file_path, chunksize)
+
+        with wave.open(file_path, "rb") as wave_reader:
+            if wave_reader.getsampwidth() != 2:
+                raise BadCaptureSchemaError(
+                    "Invalid WAV file: only 16 bit samples are supported."
+                )
+            self._num_channels = wave_reader.getnchannels()
+
+        self._fieldnames = ["channel_{}".format(i) for i in range(self._num_channels)]
+        self._mapping = sanitize_fields(self._fieldnames)
+        # same schema as a WAV file converted to csv by WaveFileReader
+        self._schema = {key: {"type": "int"} for key in self._fieldnames}
+
+    def _read_chunks(self):
+        with wave.open(self._file_path, "rb") as wave_reader:
+            start = 0
+            while True:
+                frames = wave_reader.readframes(self._chunksize)
+                if not frames:
+                    break
+
+                data = np.frombuffer(frames, dtype=np.int16).reshape(
+                    (-1, self._num_channels)
+                )
+                yield DataFrame(
+                    data,
+                    columns=self._fieldnames,
+                    index=RangeIndex(start, start + len(data), name="sequence"),
+                )
+                start += len(data)
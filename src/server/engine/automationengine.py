@@ -101,6 +101,9 @@ class AutomationEngine(
         self.mutation_rate = 0.1
         self.recreation_rate = 0.1
         self.survivor_rate = 0.5
+        self.steady_state = False
+        self.fidelity_schedule = []
+        self.promotion_rate = 0.5
         self.reset = False
         self.last_iteration = None
         self.param_number_of_models_to_return = 5
@@ -154,12 +157,17 @@ class AutomationEngine(
         self.mutation_rate = params.get("mutation_rate", 0.1)
         self.recreation_rate = params.get("recreation_rate", 0.2)
         self.survivor_rate = params.get("survivor_rate", 0.5)
+        self.steady_state = params.get("steady_state", False)
+        self.fidelity_schedule = params.get("fidelity_schedule", [])
+        self.promotion_rate = params.get("promotion_rate", 0.5)
         self.param_allow_unknown = params.get("allow_unknown", False)
 
         validate_genetic_algorithm_parameters(
             self.mutation_rate, self.recreation_rate, self.survivor_rate
         )
 
+        validate_fidelity_parameters(self.fidelity_schedule, self.promotion_rate)
+
         self.reset = params.get("reset", True)
 
         self.random_seed = params.get("random_seed", None)
@@ -458,6 +466,32 @@ def validate_genetic_algorithm_parameters(
         )
 
 
+def validate_fidelity_parameters(fidelity_schedule, promotion_rate):
+    if not isinstance(fidelity_schedule, list) or not all(
+        isinstance(fidelity, dict) for fidelity in fidelity_schedule
+    ):
+        raise ValidationError(
+            "'fidelity_schedule' should be a list of dictionaries with the keys"
+            + " 'sample_size', 'number_of_folds' and 'epochs'."
+        )
+
+    for fidelity in fidelity_schedule:
+        if not 0 < fidelity.get("sample_size", 1.0) <= 1:
+            raise ValidationError(
+                "'sample_size' of a fidelity should be greater than 0 and at most 1."
+            )
+        for key in ["number_of_folds", "epochs"]:
+            if fidelity.get(key, 1) < 1:
+                raise ValidationError(
+                    "'{}' of a fidelity should be at least 1.".format(key)
+                )
+
+    if not 0 < promotion_rate <= 1:
+        raise ValidationError(
+            "'promotion_rate' should be greater than 0 and at most 1."
+        )
+
+
 def validate_number_of_classes(query_stat):
 
     if query_stat is None:
@@ -21,14 +21,25 @@ import logging
 import random
 from copy import deepcopy
 
+from datamanager.pipeline_queue import (
+    remove_pipeline_subtask_ids,
+    set_pipeline_subtask_ids,
+)
+from django.conf import settings
 from engine.automationengine_mixin import parameter_optimizer_utils as param_optimizer
 from engine.automationengine_mixin.automationengine_exception import ValidationError
 from engine.base.cache_manager import load_persisitent_variables
+from engine.base.pipeline_steps import (
+    collect_pipeline_step_job,
+    get_pipeline_step_job,
+    submit_pipeline_step_job,
+    wait_for_finished_jobs,
+)
 from engine.base.temp_cache import TempCache
 from engine import drivers
 from library.models import Transform
 from logger.log_handler import LogHandler
-from numpy import inf, unique
+from numpy import ceil, inf, unique
 from pandas import DataFrame, concat
 from sklearn.utils import resample
 
@@ -59,7 +70,12 @@ class GeneticIterationMixin:
         else:
             fitted_population = self.load_cached_automl_data()
 
-        fitted_population = self.genetic_iterations(fitted_population, inventory)
+        if self.steady_state:
+            fitted_population = self.steady_state_iterations(
+                fitted_population, inventory
+            )
+        else:
+            fitted_population = self.genetic_iterations(fitted_population, inventory)
 
         # TODO: move this to the intialize step (currently cache_manager is not initialized until static pipeline is run)
         save_automl_params(self._cache_manager, self.param_for_cache)
@@ -117,6 +133,114 @@ class GeneticIterationMixin:
 
         return population, results_tvo, mapped_inputs, failed_pipeline_indexes
 
+    def run_population_with_fidelity_schedule(
+        self,
+        ga_pipeline,
+        custom_class_map,
+        population,
+        generation,
+    ):
+        """Multi-fidelity (successive halving) version of
+        run_population_for_each_library.
+
+        The GA steps before the tvo step run once for the whole population. The tvo
+        step then runs once for each rung of the fidelity schedule, on a stratified
+        subsample of the feature vectors and/or with fewer validation folds, and only
+        the fittest promotion_rate of the candidates of a rung are evaluated at the
+        next one. The last rung is the full tvo evaluation. Every candidate keeps the
+        results of the highest rung it reached, stored in the fidelity column, and the
+        lower rung scores of the promoted candidates are added to the
+        fitted_population_log.
+        """
+        tvo_index = len(ga_pipeline) - 1
+        tvo_step = ga_pipeline[tvo_index]
+        mapped_inputs = None
+
+        if tvo_index > 0:
+            (population, _, mapped_inputs, _) = self.run_population_for_each_library(
+                ga_pipeline=ga_pipeline[:tvo_index],
+                custom_class_map=None,
+                population=population,
+                generation=generation,
+            )
+
+        if custom_class_map is not None:
+            population = add_class_map_to_optimizer(population, custom_class_map, "tvo")
+
+        population["candidate"] = list(range(len(population["tvo"])))
+        candidates = population["candidate"]
+        evaluations = {}
+
+        for rung, fidelity in enumerate(self.fidelity_schedule + [None]):
+            rung_population = {
+                key: [deepcopy(values[c]) for c in candidates]
+                for key, values in population.items()
+            }
+
+            if fidelity is None:
+                output_iteration = generation
+            else:
+                # the tvo outputs of the lower rungs are named apart, the rung itself
+                # is recorded in the fidelity column
+                output_iteration = "{}f{}".format(generation, rung)
+                for step in rung_population["tvo"]:
+                    step["fidelity"] = fidelity
+
+            (rung_population, results, _, _) = self.run_population(
+                step_index=tvo_index,
+                step=tvo_step,
+                func=get_driver(tvo_step),
+                population=rung_population,
+                iteration=output_iteration,
+                mapped_inputs=(
+                    [mapped_inputs[c] for c in candidates] if tvo_index > 0 else None
+                ),
+                map_inputs=tvo_index > 0,
+                clean_cache=False,
+                return_results=True,
+            )
+
+            rung_population["fidelity"] = [rung] * len(results)
+            for index, candidate in enumerate(rung_population["candidate"]):
+                evaluations[candidate] = (
+                    {key: values[index] for key, values in rung_population.items()},
+                    results[index],
+                )
+
+            if fidelity is None:
+                break
+
+            fitted_rung = self.get_population_fitness_score(
+                offspring_population=rung_population,
+                results_tvo=results,
+                generation=generation,
+                survivors=None,
+                population_size=0,
+            )
+
+            candidates = select_promoted_candidates(fitted_rung, self.promotion_rate)
+
+            fitted_rung["original_iteration"] = generation
+            self.fitted_population_log = concat(
+                [
+                    self.fitted_population_log,
+                    fitted_rung[fitted_rung["candidate"].isin(candidates)].drop(
+                        columns="candidate"
+                    ),
+                ]
+            ).reset_index(drop=True)
+
+        population = {key: [] for key in population.keys() if key != "candidate"}
+        population["fidelity"] = []
+        results = []
+        for candidate in sorted(evaluations):
+            (candidate_population, result) = evaluations[candidate]
+            for key in population.keys():
+                population[key].append(candidate_population[key])
+            results.append(result)
+
+        return population, results
+
     def get_population_fitness_score(
         self,
         offspring_population,
@@ -147,6 +271,13 @@ class GeneticIterationMixin:
         else:
             fitted_population = fitted_offspring
 
+        if "fidelity" in fitted_offspring.columns:
+            # candidates evaluated at a higher fidelity rank above the ones that were
+            # not promoted
+            fitted_offspring = fitted_offspring.sort_values(
+                by=["fidelity", "fitness"], ascending=False
+            ).reset_index(drop=True)
+
         fitted_population = complete_missing_population(
             fitted_offspring, population_size - len(fitted_offspring)
         )
@@ -229,13 +360,21 @@ class GeneticIterationMixin:
         survivors,
         recall=False,
     ):
-        (population, results, _, _) = self.run_population_for_each_library(
-            ga_pipeline=ga_pipeline,
-            custom_class_map=custom_class_map,
-            population=population,
-            generation=generation,
-            recall=recall,
-        )
+        if self.fidelity_schedule and not recall:
+            (population, results) = self.run_population_with_fidelity_schedule(
+                ga_pipeline=ga_pipeline,
+                custom_class_map=custom_class_map,
+                population=population,
+                generation=generation,
+            )
+        else:
+            (population, results, _, _) = self.run_population_for_each_library(
+                ga_pipeline=ga_pipeline,
+                custom_class_map=custom_class_map,
+                population=population,
+                generation=generation,
+                recall=recall,
+            )
 
         if not [r for r in results if r]:
             error_list = list(unique([i["error_message"] for i in self.error_log]))
@@ -346,6 +485,295 @@ class GeneticIterationMixin:
 
         return fitted_population
 
+    def steady_state_iterations(self, fitted_population, inventory):
+        """Asynchronous (steady state) version of genetic_iterations.
+
+        The initial population is evaluated as a generation. Afterwards up to
+        MAX_BATCH_SIZE offspring run through the GA steps independently of each
+        other. As soon as one finishes it replaces the least fit pipeline of the
+        population and the next offspring is submitted, so a slow candidate does not
+        hold back the others. Offspring are drawn from a pool that is bred from the
+        current population whenever it runs empty, once per iteration worth of
+        offspring. The search evaluates as many offspring as the generational search
+        would in its remaining iterations and stops early once the targets are
+        reached.
+        """
+        if fitted_population is None:
+            population = self.initialize_population(inventory)
+
+            fitted_population = self.process_population(
+                ga_pipeline=self.ga_pipeline,
+                custom_class_map=self.custom_class_map,
+                population=population,
+                generation=self.last_iteration,
+                survivors=None,
+                recall=False,
+            )
+            self.last_iteration += 1
+
+        top = int(len(fitted_population) * self.survivor_rate)
+        offspring_per_iteration = max(self.population_size - top, 1)
+        start_iteration = self.last_iteration
+        number_of_offspring = (
+            max(self.iterations - start_iteration, 0) * offspring_per_iteration
+        )
+
+        if check_target_scores_to_end_optimization(
+            fitted_population, self.param_prediction_target, self.param_hardware_target
+        ):
+            self.requirement_satisfaction = True
+            number_of_offspring = 0
+
+        running = {}
+        offspring_pool = []
+        submitted = 0
+        finished = 0
+
+        while running or submitted < number_of_offspring:
+            if submitted < number_of_offspring and len(running) < max(
+                settings.MAX_BATCH_SIZE, 1
+            ):
+                if not offspring_pool:
+                    offspring_pool = self.breed_steady_state_offspring(
+                        fitted_population, inventory, top, running.values()
+                    )
+
+                    if not offspring_pool:
+                        number_of_offspring = submitted
+                        continue
+
+                (offspring, libraries) = offspring_pool.pop(0)
+                candidate = self.create_steady_state_candidate(
+                    offspring, libraries, inventory, submitted
+                )
+                self.submit_steady_state_candidate_step(candidate)
+                running[submitted] = candidate
+                submitted += 1
+
+                set_pipeline_subtask_ids(
+                    self.pipeline_id, [c.result.task_id for c in running.values()]
+                )
+                continue
+
+            for index in wait_for_finished_jobs(
+                {i: (c.result, None) for i, c in running.items()}
+            ):
+                candidate = running[index]
+                fitted_offspring = self.collect_steady_state_candidate_step(candidate)
+
+                if candidate.running:
+                    self.submit_steady_state_candidate_step(candidate)
+                    continue
+
+                del running[index]
+                finished += 1
+                self.last_iteration = (
+                    start_iteration + finished // offspring_per_iteration
+                )
+
+                if fitted_offspring is None:
+                    continue
+
+                fitted_population = merge_steady_state_offspring(
+                    fitted_population, fitted_offspring, self.population_size
+                )
+
+                self.fitted_population_log = concat(
+                    [self.fitted_population_log, deepcopy(fitted_offspring)]
+                ).reset_index(drop=True)
+
+                save_iteration_results(
+                    self._cache_manager, self.fitted_population_log, self.sandbox
+                )
+
+                if check_target_scores_to_end_optimization(
+                    fitted_population,
+                    self.param_prediction_target,
+                    self.param_hardware_target,
+                ):
+                    # the running offspring are still collected, no new ones are bred
+                    self.requirement_satisfaction = True
+                    number_of_offspring = submitted
+
+            set_pipeline_subtask_ids(
+                self.pipeline_id, [c.result.task_id for c in running.values()]
+            )
+
+        remove_pipeline_subtask_ids(self.pipeline_id)
+
+        save_final_results(
+            self._cache_manager,
+            fitted_population,
+            "fitted_population_final",
+        )
+
+        return fitted_population
+
+    def breed_steady_state_offspring(self, fitted_population, inventory, top, running):
+        """Breeds a pool of offspring from the current population. Returns a list of
+        (offspring, libraries), the offspring that are already running come last."""
+        _, offspring = create_next_generation(
+            population_size=self.population_size,
+            mutation_rate=self.mutation_rate,
+            recreation_rate=self.recreation_rate,
+            all_libraries=self.all_libraries,
+            ga_pipeline=self.ga_pipeline,
+            validation_method=self.param_validation_method,
+            fitted_population=fitted_population,
+            top=top,
+            auto_param_weights=self.auto_param_weights,
+            inventory=inventory,
+            fitted_population_log=self.fitted_population_log,
+            add_unsupervised_selectors=True,
+        )
+
+        offspring = offspring.reset_index(drop=True)
+        running_libraries = [candidate.libraries for candidate in running]
+        offspring_libraries = offspring[self.all_libraries].to_dict(orient="records")
+
+        order = sorted(
+            range(len(offspring)),
+            key=lambda i: offspring_libraries[i] in running_libraries,
+        )
+
+        return [
+            (offspring.iloc[[i]].reset_index(drop=True), offspring_libraries[i])
+            for i in order
+        ]
+
+    def create_steady_state_candidate(self, offspring, libraries, inventory, index):
+        """Creates the candidate that runs a single offspring through the GA steps"""
+        population = create_population(
+            offspring,
+            self.ga_pipeline,
+            inventory,
+            hardware_target=self.param_hardware_target,
+            recall=False,
+        )
+
+        return SteadyStateCandidate(
+            population,
+            libraries,
+            iteration=self.last_iteration,
+            index=index,
+        )
+
+    def submit_steady_state_candidate_step(self, candidate):
+        """Submits the job of the next GA step of a candidate"""
+        step = self.ga_pipeline[candidate.step_index]
+        step_id = param_optimizer.get_step_id(step)
+
+        if step["type"] == "tvo" and self.custom_class_map is not None:
+            candidate.population = add_class_map_to_optimizer(
+                candidate.population, self.custom_class_map, "tvo"
+            )
+
+        # create_genetic_step maps the inputs of the candidate index to the outputs
+        # of its previous step
+        candidate.population[step_id] = [
+            param_optimizer.create_genetic_step(
+                candidate.population[step_id][0],
+                candidate.iteration,
+                candidate.index,
+                candidate.step_index > 0,
+                {candidate.index: candidate.mapped_input},
+            )
+        ]
+
+        kwargs = {"save_model_parameters": False} if step_id == "tvo" else {}
+
+        candidate.result = submit_pipeline_step_job(
+            get_pipeline_step_job(
+                get_driver(step),
+                candidate.population[step_id][0],
+                self._team_id,
+                self.project.uuid,
+                self.pipeline_id,
+                self._user.id,
+                return_results=False,
+                **kwargs,
+            )
+        )
+
+    def collect_steady_state_candidate_step(self, candidate):
+        """Collects the finished step of a candidate. Returns the fitted candidate
+        after its last step, None if it failed or has steps left to run."""
+        step = self.ga_pipeline[candidate.step_index]
+        step_id = param_optimizer.get_step_id(step)
+
+        output = collect_pipeline_step_job(candidate.result)
+        candidate.result = None
+
+        if isinstance(output, Exception):
+            success, output = None, str(output)
+        else:
+            success, output = output
+
+        if not success:
+            logger.warn(
+                {
+                    "message": "Error: {}".format(output),
+                    "data": {
+                        "pipeline step": candidate.population[step_id][0],
+                        "population index": candidate.index,
+                        "step_id": step_id,
+                    },
+                    "UUID": self.sandbox.uuid,
+                    "log_type": "PID",
+                    "task_id": self.task_id,
+                }
+            )
+
+            self.set_error_log(
+                0,
+                candidate.population,
+                output,
+                candidate.population[step_id][0]["name"],
+            )
+            candidate.running = False
+
+            return None
+
+        candidate.mapped_input = (success, output["filename"])
+        candidate.step_index += 1
+
+        if candidate.step_index < len(self.ga_pipeline):
+            return None
+
+        candidate.running = False
+
+        self._update_step_info(
+            {
+                "step_index": len(self.static_pipeline) + len(self.ga_pipeline),
+                "step_type": step.get("type"),
+                "step_name": step.get("name"),
+                "iteration": self.last_iteration + 1,
+                "total_iterations": self.iterations,
+                "population_size": self.population_size,
+                "iteration_start_index": len(self.static_pipeline) + 1,
+            }
+        )
+
+        results_tvo = [self.get_data_cache(output["filename"])]
+        population = separate_tvo_libraries(candidate.population)
+        cost_table, _ = self.create_cost_table(
+            population, results_tvo, candidate.iteration
+        )
+
+        results_tvo, cost_table = model_check(
+            results_tvo, cost_table, param_optimizer.model_stat_list_tuple
+        )
+
+        if cost_table.empty:
+            return None
+
+        fitted_offspring = param_optimizer.assign_fitness_values(
+            results_tvo, cost_table, self.auto_param_weights
+        )
+        fitted_offspring["original_iteration"] = candidate.iteration
+
+        return fitted_offspring
+
     def final_run_with_recall(self, fitted_population):
         backup_last_iteration = self.last_iteration
         self.last_iteration = "RCL"
@@ -414,23 +842,41 @@ class GeneticIterationMixin:
             step for i, step in enumerate(self.pipeline) if i >= self.split
         ]
 
+        feature_data = self._validate_feature_data_size(
+            self.pipeline[self.split - 1]["outputs"][0], feature_data
+        )
+
         if self.ga_pipeline[0].get("inputs", None):
-            self.ga_pipeline[0]["inputs"]["input_data"] = (
-                self.ga_pipeline[0]["inputs"]["input_data"] + ".data_0.csv.gz"
+            self.ga_pipeline[0]["inputs"]["input_data"] = self.write_feature_matrix(
+                self.ga_pipeline[0]["inputs"]["input_data"], feature_data
             )
         elif self.ga_pipeline[0].get("input_data", None):
-            self.ga_pipeline[0]["input_data"] = (
-                self.ga_pipeline[0]["input_data"] + ".data_0.csv.gz"
+            self.ga_pipeline[0]["input_data"] = self.write_feature_matrix(
+                self.ga_pipeline[0]["input_data"], feature_data
             )
         else:
             raise Exception("Invalid Pipeline, No input data specified!")
 
-        self._validate_feature_data_size(
-            self.pipeline[self.split - 1]["outputs"][0], feature_data
-        )
-
         load_persisitent_variables(self._cache_manager, self._temp)
 
+    def write_feature_matrix(self, name, feature_data):
+        """Stores the feature vectors every candidate starts from once, as an
+        uncompressed npz feature matrix. The outputs of the feature selection
+        candidates are stored as references to columns of this matrix, so the steps
+        that follow read only the selected columns instead of a copy of the data
+        written for each candidate.
+        """
+        if self.ga_pipeline[0]["type"] == "selectorset":
+            # the feature selection step fills missing values, doing it once here
+            # keeps the selected features identical to the columns of the matrix
+            feature_data = feature_data.fillna(0.0)
+
+        temp_cache = TempCache(pipeline_id=self.pipeline_id)
+
+        return temp_cache.write_file(
+            feature_data, name + ".feature_matrix", cache_format="mmap"
+        )
+
     def _validate_feature_data_size(self, name, feature_data):
         # TODO: reenable this check
         check_validation_of_validation_method(
@@ -446,6 +892,10 @@ class GeneticIterationMixin:
 
             temp_cache.write_file(dowsnampled_fv, name + ".data_0")
 
+            return dowsnampled_fv
+
+        return feature_data
+
     def load_cached_automl_data(self):
         # if static part of the pipeline is different than previous run return error
         static_pipeline_validation_for_reset_true(self._cache_manager, self.pipeline)
@@ -467,6 +917,31 @@ class GeneticIterationMixin:
         return fitted_population
 
 
+class SteadyStateCandidate(object):
+    """An offspring running through the GA steps in the steady state search"""
+
+    def __init__(self, population, libraries, iteration, index):
+        self.population = population
+        self.libraries = libraries
+        self.iteration = iteration
+        self.index = index
+        self.step_index = 0
+        self.mapped_input = None
+        self.result = None
+        self.running = True
+
+
+def merge_steady_state_offspring(fitted_population, fitted_offspring, population_size):
+    """Adds evaluated offspring to the population, the least fit pipelines are dropped
+    to keep population_size pipelines"""
+    return (
+        concat([fitted_population, fitted_offspring], sort=False)
+        .sort_values(by="fitness", ascending=False, kind="stable")
+        .reset_index(drop=True)
+        .loc[: population_size - 1]
+    )
+
+
 def create_population(
     generation_data,
     ga_pipeline,
@@ -728,9 +1203,30 @@ def combine_tvo_libraries(step, population):
     return population
 
 
+def select_promoted_candidates(fitted_population, promotion_rate):
+    """Returns the candidates of the fittest promotion_rate of a fidelity rung, at
+    least one candidate is always promoted."""
+    number_of_promoted = max(int(ceil(len(fitted_population) * promotion_rate)), 1)
+
+    return sorted(
+        fitted_population.sort_values(by="fitness", ascending=False, kind="stable")[
+            "candidate"
+        ]
+        .iloc[:number_of_promoted]
+        .tolist()
+    )
+
+
 def check_target_scores_to_end_optimization(
     fitted_population, prediction_target, hardware_target
 ):
+    if "fidelity" in fitted_population.columns:
+        # scores of low fidelity evaluations are not reliable enough to stop the search
+        fidelity = fitted_population["fidelity"]
+        fitted_population = fitted_population[
+            fidelity.isna() | (fidelity == fidelity.max())
+        ]
+
     for indx in fitted_population.index:
         bool_list = []
         key_temp = []
@@ -1015,6 +1511,9 @@ def save_iteration_results(cache_manager, fitted_population, sandbox):
         "features_std",
     ]
 
+    if "fidelity" in fitted_population.columns:
+        col.append("fidelity")
+
     # save to cache
     cache_manager.save_result_data(
         file_name,
@@ -22,11 +22,21 @@ import os
 from copy import deepcopy
 
 from datamanager import utils
-from datamanager.datasegments import DataSegments, is_datasegments
+from datamanager.datasegments import (
+    ColumnarDataSegments,
+    DataSegments,
+    is_datasegments,
+    to_columnar_datasegments,
+)
 from datamanager.models import Query
-from datamanager.datastore import get_datastore, get_datastore_basedir
+from datamanager.datastore import (
+    get_cache_format,
+    get_datastore,
+    get_datastore_basedir,
+)
 from django.conf import settings
 from django.core import serializers
+from engine.base.step_cache import UNCACHED_STEP_TYPES, StepCache, get_step_key
 from logger.log_handler import LogHandler
 from pandas import DataFrame
 
@@ -52,6 +62,9 @@ class CacheManager(object):
 
         utils.ensure_path_exists(self._bucket)
 
+        self._step_cache = None
+        self._step_keys = {}
+
         if sandbox.cache is None:
             self._cache = {"pipeline": [], "data": {}, "detail": {}, "results": {}}
         else:
@@ -126,10 +139,15 @@ class CacheManager(object):
         """
         # Determine the steps that need fresh computation; if a step does not need to be run, collect its outputs
         difference_detected = False
+        restore_from_step_cache = StepCache.enabled()
         outputs = []
         cached_inputs = []
         new_pipeline = list(self._current_pipeline)
 
+        if restore_from_step_cache:
+            self._step_cache = StepCache(self._sandbox.project.uuid)
+        step_key = None
+
         for i, step in enumerate(self._current_pipeline):
             detail = None
 
@@ -142,6 +160,10 @@ class CacheManager(object):
                     "value": serializers.serialize("json", [query]),
                 }
 
+            if self._step_cache is not None and step["type"] not in UNCACHED_STEP_TYPES:
+                step_key = get_step_key(step, step_key, detail)
+                self._step_keys[i] = step_key
+
             if not difference_detected and self.step_has_valid_cache(i, step, detail):
                 # logger.userlog(
                 #    {
@@ -181,6 +203,14 @@ class CacheManager(object):
                 difference_detected = True
                 self.evict(i)
 
+            # Steps that changed may have been computed by another sandbox of the project
+            if difference_detected and restore_from_step_cache:
+                if self.restore_step(i, step, temp):
+                    outputs = step["outputs"]
+                    new_pipeline.remove(step)
+                else:
+                    restore_from_step_cache = False
+
         # Collect the variables that need to be written to temp
         # (Any inputs required by pipeline steps that are outputs of cache steps including shards of those outputs)
         if outputs:
@@ -192,6 +222,22 @@ class CacheManager(object):
 
         return new_pipeline, cached_inputs
 
+    def restore_step(self, index, step, temp):
+        """Copies the result of a step from the project step cache into the sandbox
+        cache. Returns False if the step cache has no result for the step."""
+        step_key = self._step_keys.get(index)
+        if step_key is None:
+            return False
+
+        restored = self._step_cache.restore(step_key, step, self.get_folder_path())
+        if restored is None:
+            return False
+
+        self._cache["data"].update(restored["persistent_variables"])
+        self.write_step(index, step, temp, restored["result_names"], restored["detail"])
+
+        return True
+
     def step_has_valid_cache(self, index, step, detail=None):
         """Returns true if the argument step is present in the cache with the same configuration and index.
 
@@ -261,11 +307,7 @@ class CacheManager(object):
 
         data = self.get_file(keys[page_index])
 
-        if (
-            convert_datasegments_to_dataframe
-            and isinstance(data, list)
-            and is_datasegments(data)
-        ):
+        if convert_datasegments_to_dataframe and is_datasegments(data):
             data = DataSegments(data).to_dataframe()
 
         return data, num_pages
@@ -291,7 +333,7 @@ class CacheManager(object):
 
         return data, num_pages
 
-    def get_file(self, summary):
+    def get_file(self, summary, columns=None):
         """Gets data from the cache corresponding to a particular named variable."""
         if not summary:
             return None
@@ -301,7 +343,9 @@ class CacheManager(object):
         if not filename:
             return None
 
-        return self._datastore.get_data(self.set_variable_path_id(filename))
+        return self._datastore.get_data(
+            self.set_variable_path_id(filename), columns=columns
+        )
 
     def write_file(self, data, filename):
         if isinstance(data, DataFrame):
@@ -312,16 +356,21 @@ class CacheManager(object):
             fmt = ".json"
             filename += fmt
 
-        elif isinstance(data, list):
+        elif isinstance(data, (list, ColumnarDataSegments)):
             fmt = ".pkl"
             filename += fmt
+            data = to_columnar_datasegments(data)
 
         else:
             raise Exception(
                 "Data type {} cannot be written to the cache".format(type(data))
             )
 
-        self._datastore.save_data(data, self.set_variable_path_id(filename), fmt)
+        self._datastore.save_data(
+            data,
+            self.set_variable_path_id(filename),
+            get_cache_format(data, fmt, settings.CACHE_FILE_FORMAT),
+        )
 
         return filename
 
@@ -498,6 +547,22 @@ class CacheManager(object):
         self._sandbox.cache = self._cache
         self._sandbox.save(update_fields=["cache"])
 
+        # Share the result with the other sandboxes of the project
+        if self._step_cache is not None and index in self._step_keys:
+            self._step_cache.save(
+                self._step_keys[index],
+                step,
+                self.get_folder_path(),
+                result_names,
+                feature_table=(
+                    self._cache["data"].get(step["outputs"][1])
+                    if len(step["outputs"]) > 1
+                    else None
+                ),
+                persistent_variables={v["name"]: v["value"] for v in persistent_vars},
+                detail=detail,
+            )
+
         return True
 
     def evict(self, index):
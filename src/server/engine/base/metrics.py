@@ -20,6 +20,7 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 import inspect
 import json
 import warnings
+from collections import Counter
 
 import numpy as np
 from numpy import NaN
@@ -59,16 +60,8 @@ def accuracy(y_true, y_pred, **kwargs):
 
     if verify_truth_pred(y_true, y_pred):
         y_true, y_pred = scrub_unknowns(y_true, y_pred, unk_vals=UNK_UNC)
-        if is_binary(y_true):  # if this is a binary problem
-            temp_total = 0.0
-            for i, item in enumerate(y_true):
-                if (
-                    y_true[i] == y_pred[i]
-                ):  # for every correct classification, increment by 1
-                    temp_total += 1
-
-            # return 100 * correct classifications / number of elements in y_true
-            return 100 * float(temp_total / len(y_true)) if len(y_true) > 0 else NaN
+        if is_binary(y_true) or not kwargs:
+            return ConfusionCounts(y_true, y_pred).accuracy()
 
         else:  # if this is a multi-class problem
             temp = {"y_true": y_true, "y_pred": y_pred}
@@ -197,7 +190,10 @@ def specificity(y_true, y_pred):
     if verify_truth_pred(y_true, y_pred):
         y_true, y_pred, indicies_list = get_indicies_list(y_true, y_pred)
 
-        confusion_matrix_array = met.confusion_matrix(y_true, y_pred)
+        # rows and columns of the matrix are the sorted labels
+        confusion_matrix_array = ConfusionCounts(
+            y_true, y_pred, labels=sorted(set(y_true).union(y_pred))
+        ).matrix
         total = []
         total_tp = []
 
@@ -308,6 +304,11 @@ def f1_score(y_true, y_pred, **kwargs):
 
 def base_function(y_true, y_pred, metric_function, **kwargs):
     if verify_truth_pred(y_true, y_pred):
+        if not kwargs and metric_function in CLASS_SCORES:
+            return ConfusionCounts(y_true, y_pred).class_scores(
+                CLASS_SCORES[metric_function]
+            )
+
         y_true, y_pred, indicies_list = get_indicies_list(y_true, y_pred)
 
         ret = {}
@@ -349,6 +350,101 @@ def base_function(y_true, y_pred, metric_function, **kwargs):
         return ret
 
 
+class ConfusionCounts(object):
+    """Confusion matrix of y_true and y_pred built in a single np.bincount pass.
+
+    Unknown labels are scrubbed to 0 first. The rows and columns of the matrix follow
+    labels, by default the labels of get_indicies_list followed by 0, so the per
+    class scores have the same keys as the scikit-learn based functions.
+    """
+
+    def __init__(self, y_true, y_pred, labels=None):
+        y_true, y_pred, indicies_list = get_indicies_list(y_true, y_pred)
+
+        self.y_true = y_true
+        self.indicies_list = indicies_list
+        self.labels = indicies_list + [0] if labels is None else list(labels)
+
+        num_labels = len(self.labels)
+        codes = self._encode(y_true + y_pred)
+        self.matrix = np.bincount(
+            codes[: len(y_true)] * num_labels + codes[len(y_true) :],
+            minlength=num_labels * num_labels,
+        ).reshape(num_labels, num_labels)
+
+    def _encode(self, values):
+        """Returns the index in labels of every value."""
+        array = np.asarray(values)
+        if array.dtype.kind in "iu" and all(
+            isinstance(label, (int, np.integer)) for label in self.labels
+        ):
+            order = np.argsort(self.labels, kind="stable")
+            sorted_labels = np.asarray(self.labels)[order]
+            return order[np.searchsorted(sorted_labels, array)].astype(np.int64)
+
+        index = {label: i for i, label in enumerate(self.labels)}
+        return np.fromiter(
+            (index[value] for value in values), dtype=np.int64, count=len(values)
+        )
+
+    def accuracy(self):
+        """Percentage of vectors where the prediction matches the truth."""
+        total = len(self.y_true)
+        if total == 0:
+            return NaN
+
+        return 100 * float(np.trace(self.matrix) / total)
+
+    def class_scores(self, metric):
+        """Precision, sensitivity (recall) or f1_score of every label of
+        indicies_list, with the same zero division handling and averages as
+        scikit-learn."""
+        num_classes = len(self.indicies_list)
+        tp = np.diag(self.matrix)[:num_classes].astype(np.float64)
+        pred_sum = self.matrix.sum(axis=0)[:num_classes]
+        true_sum = self.matrix.sum(axis=1)[:num_classes]
+
+        precision = _divide(tp, pred_sum)
+        recall = _divide(tp, true_sum)
+
+        if metric == "precision":
+            scores = precision
+        elif metric == "sensitivity":
+            scores = recall
+        else:
+            denominator = precision + recall
+            denominator[denominator == 0.0] = 1
+            scores = 2 * precision * recall / denominator
+
+        ret = {}
+        for i, v in enumerate(100 * scores):
+            ret[i + 1] = v
+
+        if is_binary(self.y_true):
+            ret[AVG] = np.mean(100 * scores)
+        else:
+            ret[AVG] = 100 * np.average(scores) if num_classes else NaN
+
+        return ret
+
+
+def _divide(numerator, denominator):
+    """numerator / denominator, 0 where the denominator is 0"""
+    denominator = denominator.astype(np.float64)
+    mask = denominator == 0.0
+    denominator[mask] = 1
+
+    return numerator / denominator
+
+
+# scikit-learn score functions computed from ConfusionCounts by base_function
+CLASS_SCORES = {
+    met.precision_score: "precision",
+    met.recall_score: "sensitivity",
+    met.f1_score: "f1_score",
+}
+
+
 def get_indicies_list(y_true, y_pred):
     ####### Don't change the order of following two lines #########
     # If there is a 'UNK', convert it to 0
@@ -387,27 +483,26 @@ def get_metrics_set(data):
             y_pred = data["y_pred"]
 
     if y_true is not None and y_pred is not None:
+        verify_truth_pred(y_true, y_pred)
         y_true, y_pred = scrub_unknowns(y_true, y_pred, unk_vals=UNK_UNC)
 
-        defaults = {
-            "f1_score": f1_score,
-            "precision": precision,
-            "sensitivity": sensitivity,
-            "accuracy": accuracy,
-            "positive_predictive_rate": positive_predictive_rate,
-        }
         # "specificity": specificity this is not implemented in a way to provide useful information
         # also it is crashing for cases where there is a missing class for example 2 here
         #  [1, 1, 1, 3, 3, 4, 4, 4, 4]
         #  [1, 1, 1, 0, 3, 4, 4, 4, 4]
 
-        ret = dict.fromkeys(defaults.keys(), None)
-
-        ret["y_true"] = y_true
-        ret["y_pred"] = y_pred
-
-        for key in defaults.keys():
-            ret[key] = defaults[key](y_true, y_pred)
+        # every metric is derived from a single confusion matrix
+        counts = ConfusionCounts(y_true, y_pred)
+
+        ret = {
+            "f1_score": counts.class_scores("f1_score"),
+            "precision": counts.class_scores("precision"),
+            "sensitivity": counts.class_scores("sensitivity"),
+            "accuracy": counts.accuracy(),
+            "positive_predictive_rate": counts.class_scores("precision"),
+            "y_true": y_true,
+            "y_pred": y_pred,
+        }
     else:
         ret = None
 
@@ -418,42 +513,13 @@ def get_tp_fp_tn_fn(y_true, y_pred, pos_label=1, neg_label=0):
     if pos_label not in y_true or len(set(y_true)) > 2:
         return NaN, NaN, NaN, NaN
 
-    tp = float(
-        len(
-            [
-                x
-                for i, x in enumerate(y_true)
-                if x == pos_label and y_pred[i] == pos_label
-            ]
-        )
-    )
-    tn = float(
-        len(
-            [
-                x
-                for i, x in enumerate(y_true)
-                if x == neg_label and y_pred[i] == neg_label
-            ]
-        )
-    )
-    fp = float(
-        len(
-            [
-                x
-                for i, x in enumerate(y_true)
-                if x == pos_label and y_pred[i] == neg_label
-            ]
-        )
-    )
-    fn = float(
-        len(
-            [
-                x
-                for i, x in enumerate(y_true)
-                if x == neg_label and y_pred[i] == pos_label
-            ]
-        )
-    )
+    pairs = Counter(zip(y_true, y_pred))
+
+    tp = float(pairs[(pos_label, pos_label)])
+    tn = float(pairs[(neg_label, neg_label)])
+    fp = float(pairs[(pos_label, neg_label)])
+    fn = float(pairs[(neg_label, pos_label)])
+
     return tp, fp, tn, fn
 
 
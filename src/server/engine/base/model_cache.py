@@ -0,0 +1,132 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def get_model_key(knowledgepack, config=None):
+    """Key of the classifier loaded for a knowledgepack. Saving the knowledgepack
+    updates its last modified time, so a changed model never matches a cached one."""
+    if knowledgepack is None or knowledgepack.last_modified is None:
+        return None
+
+    return (
+        str(knowledgepack.uuid),
+        knowledgepack.last_modified.isoformat(),
+        json.dumps(config, sort_keys=True, default=str) if config else None,
+    )
+
+
+def get_model_size(neuron_array):
+    """Approximate memory used by a loaded model in bytes. TensorFlow Lite models count
+    their flatbuffer and the tensor arena size recorded with the model, the other
+    models the size of their serialized model parameters."""
+    if isinstance(neuron_array, dict) and "tflite" in neuron_array:
+        return len(neuron_array["tflite"]) // 2 + (
+            neuron_array.get("tensor_arena_size") or 0
+        )
+
+    return len(json.dumps(neuron_array, default=str))
+
+
+class ModelCache(object):
+    """Per worker LRU cache of initialized classifiers.
+
+    Loading a knowledgepack model (building the PME pattern database, the TensorFlow
+    Lite interpreter or the flat tree arrays) is often more expensive than recognizing
+    a request, so the loaded classifiers are kept in memory between requests. Entries
+    are evicted least recently used first once the models held exceed
+    MODEL_CACHE_MAX_SIZE MB. Classifiers returned by get are shared between the
+    threads of the worker, callers must not modify their model and must hold the lock
+    stored with the classifier while using it.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled():
+        return settings.MODEL_CACHE_MAX_SIZE > 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the classifier stored for key and marks it as used."""
+        return self.get_with_lock(key)[0]
+
+    def get_with_lock(self, key):
+        """Returns the classifier stored for key and the lock guarding its use."""
+        if key is None or not self.enabled():
+            return None, None
+
+        with self._lock:
+            if key not in self._entries:
+                return None, None
+            self._entries.move_to_end(key)
+            classifier, lock, _ = self._entries[key]
+
+            return classifier, lock
+
+    def put(self, key, classifier, size, lock=None):
+        """Stores a classifier with the lock guarding its use, models larger than the
+        whole cache are not stored."""
+        if key is None or not self.enabled():
+            return False
+
+        max_size = settings.MODEL_CACHE_MAX_SIZE * 1024 * 1024
+        if size > max_size:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[2]
+
+            # models of older versions of the knowledgepack are never used again
+            for stale_key in [
+                k for k in self._entries if k[0] == key[0] and k[1] != key[1]
+            ]:
+                self._size -= self._entries.pop(stale_key)[2]
+
+            self._entries[key] = (classifier, lock or threading.Lock(), size)
+            self._size += size
+
+            while self._size > max_size:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+model_cache = ModelCache()
@@ -21,6 +21,7 @@ import logging
 import pickle
 import queue
 import time
+from datetime import datetime, timezone
 
 from celery import group
 from datamanager.pipeline_queue import (
@@ -113,6 +114,52 @@ def parallel_pipeline_step_group(
     return results
 
 
+def get_pipeline_step_job(
+    func,
+    step,
+    team_id,
+    project_id,
+    pipeline_id,
+    user_id,
+    return_results=True,
+    **kwargs,
+):
+    """The celery signature running func on a single pipeline step"""
+    task = execute_function if return_results else execute_function_return_success
+
+    return task.s(
+        pickle.dumps(func),
+        step,
+        team_id,
+        project_id,
+        pipeline_id,
+        user_id,
+        **kwargs,
+    )
+
+
+def submit_pipeline_step_job(job):
+    """Submits a pipeline step job without waiting for it. With an asynchronous result
+    backend the result is subscribed so that its completion wakes up
+    wait_for_finished_jobs."""
+    result = job.apply_async(serializer="pickle")
+    if getattr(result.backend, "is_async", False):
+        result.backend.add_pending_result(result)
+
+    return result
+
+
+def collect_pipeline_step_job(result):
+    """Returns the value of a finished pipeline step job and releases its result"""
+    value = result.result
+
+    if getattr(result.backend, "is_async", False):
+        result.backend.remove_pending_result(result)
+    result.forget()
+
+    return value
+
+
 def parallel_pipeline_step(
     func,
     steps,
@@ -122,36 +169,33 @@ def parallel_pipeline_step(
     user_id,
     return_results=True,
     max_batch_size=None,
+    on_job_finished=None,
     **kwargs,
 ):
-    """A parallel implementation of the pipeline step with a batch size"""
+    """A parallel implementation of the pipeline step with a batch size
+
+    Keeps up to max_batch_size (default settings.MAX_BATCH_SIZE) jobs running and
+    submits the next job as soon as one of them completes. With an asynchronous
+    result backend (redis) the dispatcher is woken up by the result subscription
+    instead of polling. on_job_finished(index, result) is called as each job
+    completes, in completion order.
+    """
+
+    jobs = [
+        get_pipeline_step_job(
+            func,
+            step,
+            team_id,
+            project_id,
+            pipeline_id,
+            user_id,
+            return_results,
+            **kwargs,
+        )
+        for step in steps
+    ]
 
-    if return_results:
-        jobs = [
-            execute_function.s(
-                pickle.dumps(func),
-                step,
-                team_id,
-                project_id,
-                pipeline_id,
-                user_id,
-                **kwargs,
-            )
-            for step in steps
-        ]
-    else:
-        jobs = [
-            execute_function_return_success.s(
-                pickle.dumps(func),
-                step,
-                team_id,
-                project_id,
-                pipeline_id,
-                user_id,
-                **kwargs,
-            )
-            for step in steps
-        ]
+    batch_size = settings.MAX_BATCH_SIZE if max_batch_size is None else max_batch_size
 
     job_queue = queue.Queue()
     for item in range(len(jobs)):
@@ -159,48 +203,96 @@ def parallel_pipeline_step(
 
     result_set = [None for _ in range(len(jobs))]
     running_jobs = {}
+    job_latency = []
+    completion_lag = []
+    start_time = time.time()
 
-    while not job_queue.empty():
-        # print(f"Queue Size: {job_queue.qsize()} Running Jobs: {len(running_jobs)}")
-        if (
-            len(running_jobs) <= settings.MAX_BATCH_SIZE
-            if max_batch_size is None
-            else max_batch_size
-        ):
+    while not job_queue.empty() or running_jobs:
+        if not job_queue.empty() and len(running_jobs) < max(batch_size, 1):
             job_id = job_queue.get()
-            # print(f"Adding Job : {job_id}")
-            running_jobs[job_id] = jobs[job_id].apply_async(serializer="pickle")
+            running_jobs[job_id] = (submit_pipeline_step_job(jobs[job_id]), time.time())
 
             set_pipeline_subtask_ids(
-                pipeline_id, [t.task_id for t in running_jobs.values()]
+                pipeline_id, [t.task_id for t, _ in running_jobs.values()]
             )
-        else:
-            time.sleep(1)
-            # print(f"Reached Max Queue Size: {settings.MAX_BATCH_SIZE}")
-            for job_id in list(running_jobs.keys()):
-                if running_jobs[job_id].ready():
-                    finished_job = running_jobs.pop(job_id)
-                    result_set[job_id] = finished_job.result
-                    # print(f"Job {job_id} Result: {result_set[job_id]}")
-                    finished_job.forget()
-
-    # print(f"All jobs Queued")
-
-    while len(running_jobs) > 0:
-        for job_id in list(running_jobs.keys()):
-            if running_jobs[job_id].ready():
-                finished_job = running_jobs.pop(job_id)
-                result_set[job_id] = finished_job.result
-                # print(f"Job {job_id} Result: {result_set[job_id]}")
-                finished_job.forget()
-
-        time.sleep(2)
+            continue
+
+        for job_id in wait_for_finished_jobs(running_jobs):
+            finished_job, submit_time = running_jobs.pop(job_id)
+
+            job_latency.append(time.time() - submit_time)
+            lag = get_completion_lag(finished_job)
+            if lag is not None:
+                completion_lag.append(lag)
+
+            result_set[job_id] = collect_pipeline_step_job(finished_job)
+
+            if on_job_finished is not None:
+                on_job_finished(job_id, result_set[job_id])
 
     remove_pipeline_subtask_ids(pipeline_id)
 
+    if jobs:
+        logger.info(
+            {
+                "message": "Parallel Pipeline Step Latency",
+                "data": {
+                    "name": steps[0].get("name"),
+                    "number_of_jobs": len(jobs),
+                    "batch_size": batch_size,
+                    "total_time": round(time.time() - start_time, 3),
+                    "mean_job_latency": round(sum(job_latency) / len(job_latency), 3),
+                    "max_job_latency": round(max(job_latency), 3),
+                    "mean_completion_lag": (
+                        round(sum(completion_lag) / len(completion_lag), 3)
+                        if completion_lag
+                        else None
+                    ),
+                },
+                "UUID": pipeline_id,
+                "log_type": "PID",
+            }
+        )
+
     return result_set
 
 
+def wait_for_finished_jobs(running_jobs, timeout=1.0, interval=0.05):
+    """Blocks until at least one of the running jobs is ready and returns their ids.
+
+    Asynchronous result backends push a message when a subscribed task finishes, so
+    waiting for events returns as soon as a job completes. Other backends are
+    polled every interval seconds. The timeout bounds the wait for a message that
+    arrived before the subscription.
+    """
+    while True:
+        finished = [
+            job_id for job_id, (result, _) in running_jobs.items() if result.ready()
+        ]
+        if finished:
+            return finished
+
+        backend = next(iter(running_jobs.values()))[0].backend
+        if getattr(backend, "is_async", False):
+            backend.result_consumer.drain_events(timeout=timeout)
+        else:
+            time.sleep(interval)
+
+
+def get_completion_lag(result):
+    """Seconds between a job finishing on the worker and the dispatcher collecting
+    its result, None when the backend does not report when the job was done."""
+    date_done = result.date_done
+    if not isinstance(date_done, datetime):
+        return None
+
+    # celery reports naive datetimes in UTC
+    if date_done.tzinfo is None:
+        date_done = date_done.replace(tzinfo=timezone.utc)
+
+    return max((datetime.now(timezone.utc) - date_done).total_seconds(), 0.0)
+
+
 def parallel_pipeline_step_batch(
     func,
     steps,
@@ -30,7 +30,12 @@ from uuid import uuid4
 import numpy as np
 import pandas as pd
 from datamanager import utils
-from datamanager.datasegments import DataSegments, dataframe_to_datasegments
+from datamanager.capture_store import open_capture_store
+from datamanager.datasegments import (
+    ColumnarDataSegments,
+    DataSegments,
+    dataframe_to_datasegments,
+)
 from datamanager.featurefile import _get_featurefile_name, _get_featurefile_datastore
 from datamanager.models import (
     Capture,
@@ -88,7 +93,7 @@ def make_summary(data, filename):
         )
         summary["type"] = "dataframe"
 
-    if isinstance(data, list):
+    if isinstance(data, (list, ColumnarDataSegments)):
         summary.update(DataSegments(data).summary())
         summary["type"] = "datasegments"
 
@@ -1121,13 +1126,18 @@ def get_backgroundfile(filename: str) -> Tuple:
 
 def extract_capture(capture, project_uuid):
     datastore = get_datastore(folder=f"capture/{project_uuid}")
-    datastore.get(basename(capture.file), capture.file)
 
-    # TODO: DATASTORE Make all part of the get_data
-    if capture.format == ".csv":
-        data = read_csv(capture.file)
-    if capture.format == ".wav":
-        data = WaveFileReader(capture.file)._dataframe
+    capture_store = open_capture_store(capture.file, datastore=datastore)
+    if capture_store is not None:
+        data = capture_store.read_dataframe()
+    else:
+        datastore.get(basename(capture.file), capture.file)
+
+        # TODO: DATASTORE Make all part of the get_data
+        if capture.format == ".csv":
+            data = read_csv(capture.file)
+        if capture.format == ".wav":
+            data = WaveFileReader(capture.file)._dataframe
     if "sequence" in data.columns:
         data = data.drop("sequence", axis=1)
     if "timestamp" in data.columns:
@@ -1137,7 +1147,7 @@ def extract_capture(capture, project_uuid):
         capture.number_samples = data.shape[0]
         capture.save()
 
-    if datastore.is_remote:
+    if datastore.is_remote and capture_store is None:
         datastore.delete_local_copy(capture.file)
 
     return (
@@ -1413,6 +1423,17 @@ def get_max_segment_size(step):
 
 
 def check_and_convert_datasegments(input_data, step):
+    if input_data is None:
+        return None
+
+    if isinstance(input_data, ColumnarDataSegments):
+        # feature generators only read segments and use the columnar layout directly,
+        # everything else gets dicts that share the sample buffer
+        if step["name"] == "generator_set":
+            return input_data
+
+        return input_data.to_list()
+
     if isinstance(input_data, list):
         return input_data
 
@@ -1427,7 +1448,7 @@ def check_and_convert_datasegments(input_data, step):
         ]
         data_columns = [x for x in input_data.columns if x not in group_columns]
 
-        return dataframe_to_datasegments(
+        return ColumnarDataSegments.from_dataframe(
             input_data, group_columns=group_columns, data_columns=data_columns
         )
 
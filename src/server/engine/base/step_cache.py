@@ -0,0 +1,332 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from copy import deepcopy
+from uuid import uuid4
+
+from datamanager.datastore import get_cache_format, get_datastore
+from django.conf import settings
+from library.models import Transform
+from logger.log_handler import LogHandler
+
+logger = LogHandler(logging.getLogger(__name__))
+
+MANIFEST_NAME = "manifest.json"
+
+# Step types that are never shared through the step cache
+UNCACHED_STEP_TYPES = ["tvo"]
+
+# Step keys that only name cache variables, they do not change the step result
+STEP_NAME_KEYS = ["outputs", "input_data", "feature_table"]
+
+
+def get_step_id(output_name):
+    """The id used by drivers to name the persistent variables of a step."""
+    return ".".join(output_name.split(".")[1:])
+
+
+def normalize_step(step):
+    """Returns the step configuration without the names of its input and output
+    variables, two steps with the same normalized configuration applied to the same
+    input produce the same result."""
+    step = deepcopy(step)
+    for key in STEP_NAME_KEYS:
+        step.pop(key, None)
+        if isinstance(step.get("inputs"), dict):
+            step["inputs"].pop(key, None)
+
+    return step
+
+
+def get_library_versions(step):
+    """Returns the version of every library function used by a step so that updating
+    a library pack invalidates the steps computed with it."""
+    if step.get("set"):
+        functions = [
+            (item.get("function_name"), item.get("inputs", {}).get("library_pack"))
+            for item in step["set"]
+        ]
+    else:
+        functions = [(step.get("name"), step.get("inputs", {}).get("library_pack"))]
+
+    versions = []
+    for name, library_pack in sorted(set(functions), key=str):
+        for transform in Transform.objects.filter(
+            name=name,
+            library_pack__uuid=(
+                library_pack if library_pack else settings.SENSIML_LIBRARY_PACK
+            ),
+        ).select_related("library_pack"):
+            versions.append(
+                [
+                    transform.name,
+                    str(transform.uuid),
+                    transform.version,
+                    transform.path,
+                    (
+                        transform.library_pack.build_version
+                        if transform.library_pack
+                        else None
+                    ),
+                ]
+            )
+
+    return versions
+
+
+def get_step_key(step, input_key, detail=None):
+    """Content address of a step result.
+
+    The key hashes the function and parameters of the step, the versions of the
+    library functions it uses, any step detail (such as the serialized query) and
+    the key of the step that produced its input. Chaining the input keys makes
+    identical pipeline prefixes map to the same keys in every sandbox of a project.
+    """
+    content = {
+        "step": normalize_step(step),
+        "library": get_library_versions(step),
+        "detail": detail["value"] if detail else None,
+        "input": input_key,
+    }
+
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def rename_output(name, old_output, new_output):
+    """Maps a cache file name produced for old_output to the name new_output would
+    have produced, names that do not derive from the output are kept."""
+    if name.startswith(old_output):
+        return new_output + name[len(old_output) :]
+
+    return name
+
+
+def rename_result_names(result_names, old_output, new_output):
+    renamed = []
+    for result_name in result_names:
+        if isinstance(result_name, dict):
+            result_name = dict(result_name)
+            result_name["filename"] = rename_output(
+                result_name["filename"], old_output, new_output
+            )
+        else:
+            result_name = rename_output(result_name, old_output, new_output)
+        renamed.append(result_name)
+
+    return renamed
+
+
+def copy_step_file(source_path, destination_path):
+    """Copies a cache file of a step. A projection references the columns of a file
+    in the cache of the pipeline that wrote it, so the data it selects is copied
+    instead of the reference."""
+    datastore = get_datastore()
+    if not datastore.is_npz_projection(source_path):
+        shutil.copyfile(source_path, destination_path)
+        return
+
+    data = datastore.get_data(source_path)
+    datastore.save_data(
+        data,
+        destination_path,
+        get_cache_format(data, ".csv.gz", settings.CACHE_FILE_FORMAT),
+    )
+
+
+def get_file_names(result_names):
+    return [
+        result_name["filename"] if isinstance(result_name, dict) else result_name
+        for result_name in result_names
+    ]
+
+
+class StepCache(object):
+    """Project level, content addressed store of pipeline step results.
+
+    Every entry is a folder named by the step key holding a copy of the cache files of
+    the step and a manifest describing them. Sandboxes of a project look up steps that
+    are missing from their own cache here before executing them. Entries are evicted
+    least recently used first once the store exceeds STEP_CACHE_MAX_SIZE MB.
+    """
+
+    def __init__(self, project_id):
+        self._root = os.path.join(settings.SERVER_STEP_CACHE_ROOT, str(project_id))
+
+    @staticmethod
+    def enabled():
+        return settings.STEP_CACHE_MAX_SIZE > 0
+
+    def _entry_path(self, key):
+        return os.path.join(self._root, key)
+
+    def get(self, key):
+        """Returns the manifest of the entry stored for key and marks it as used."""
+        manifest_path = os.path.join(self._entry_path(key), MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r") as fid:
+                manifest = json.load(fid)
+            os.utime(manifest_path)
+        except (OSError, ValueError):
+            return None
+
+        return manifest
+
+    def restore(self, key, step, folder_path):
+        """Copies the files of a stored step into a sandbox cache folder, renaming them
+        for the outputs of step. Returns the result names, feature table name,
+        persistent variables and detail to record in the sandbox cache, or None when
+        the entry is not available."""
+        manifest = self.get(key)
+        if manifest is None:
+            return None
+
+        old_output = manifest["outputs"][0]
+        new_output = step["outputs"][0]
+
+        def rename(file_name):
+            if file_name == manifest["feature_table"]:
+                return rename_output(
+                    file_name, manifest["outputs"][-1], step["outputs"][-1]
+                )
+            return rename_output(file_name, old_output, new_output)
+
+        try:
+            for file_name in manifest["files"]:
+                shutil.copyfile(
+                    os.path.join(self._entry_path(key), file_name),
+                    os.path.join(folder_path, rename(file_name)),
+                )
+        except OSError:
+            return None
+
+        old_prefix = "persist.{}".format(get_step_id(old_output))
+        new_prefix = "persist.{}".format(get_step_id(new_output))
+
+        return {
+            "result_names": rename_result_names(
+                manifest["result_names"], old_output, new_output
+            ),
+            "feature_table": (
+                rename(manifest["feature_table"]) if manifest["feature_table"] else None
+            ),
+            "persistent_variables": {
+                new_prefix + name[len(old_prefix) :]: value
+                for name, value in manifest["persistent_variables"].items()
+            },
+            "detail": manifest["detail"],
+        }
+
+    def save(
+        self,
+        key,
+        step,
+        folder_path,
+        result_names,
+        feature_table=None,
+        persistent_variables=None,
+        detail=None,
+    ):
+        """Copies the cache files of a step from a sandbox cache folder into the store.
+        An entry that already exists for the key is kept."""
+        if os.path.isdir(self._entry_path(key)):
+            return False
+
+        os.makedirs(self._root, exist_ok=True)
+
+        files = get_file_names(result_names)
+        if feature_table:
+            files.append(feature_table)
+
+        step_id = get_step_id(step["outputs"][0])
+        manifest = {
+            "outputs": step["outputs"],
+            "result_names": result_names,
+            "feature_table": feature_table,
+            "files": files,
+            "persistent_variables": {
+                name: value
+                for name, value in (persistent_variables or {}).items()
+                if name.startswith("persist.{}.".format(step_id))
+            },
+            "detail": detail,
+        }
+
+        # Build the entry in a temporary folder and move it in place in one step, so
+        # concurrent readers never see a partial entry
+        temp_path = os.path.join(self._root, ".{}".format(uuid4()))
+        try:
+            os.mkdir(temp_path)
+            for file_name in files:
+                copy_step_file(
+                    os.path.join(folder_path, file_name),
+                    os.path.join(temp_path, file_name),
+                )
+            with open(os.path.join(temp_path, MANIFEST_NAME), "w") as fid:
+                json.dump(manifest, fid, default=str)
+            os.rename(temp_path, self._entry_path(key))
+        except OSError as e:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            logger.warn(
+                {
+                    "message": "Step result could not be added to the step cache",
+                    "data": {"key": key, "error": str(e)},
+                    "log_type": "datamanager",
+                }
+            )
+            return False
+
+        self.evict()
+
+        return True
+
+    def evict(self, max_size=None):
+        """Deletes the least recently used entries until the store is smaller than
+        max_size MB (default settings.STEP_CACHE_MAX_SIZE)."""
+        if max_size is None:
+            max_size = settings.STEP_CACHE_MAX_SIZE
+
+        entries = []
+        total_size = 0
+        for key in os.listdir(self._root):
+            entry_path = self._entry_path(key)
+            manifest_path = os.path.join(entry_path, MANIFEST_NAME)
+            if key.startswith(".") or not os.path.exists(manifest_path):
+                continue
+
+            size = sum(
+                os.path.getsize(os.path.join(entry_path, file_name))
+                for file_name in os.listdir(entry_path)
+            )
+            entries.append((os.path.getmtime(manifest_path), size, entry_path))
+            total_size += size
+
+        for _, size, entry_path in sorted(entries):
+            if total_size <= max_size * 1024 * 1024:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+        return total_size
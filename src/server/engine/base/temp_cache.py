@@ -20,7 +20,13 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 import os
 
 from datamanager import utils
-from datamanager.datastore import get_datastore, get_datastore_basedir
+from datamanager.datasegments import ColumnarDataSegments, to_columnar_datasegments
+from datamanager.datastore import (
+    DataProjection,
+    get_cache_format,
+    get_datastore,
+    get_datastore_basedir,
+)
 from django.conf import settings
 from pandas import DataFrame
 
@@ -47,7 +53,7 @@ class TempCache(object):
 
         return os.path.join(self._bucket, self._pipeline_id, name)
 
-    def get_file(self, summary):
+    def get_file(self, summary, columns=None):
         """Gets data from the cache corresponding to a particular named variable."""
 
         if not summary:
@@ -58,9 +64,11 @@ class TempCache(object):
         elif isinstance(summary, str):
             filename = summary
 
-        return self._datastore.get_data(self.set_variable_path_id(filename))
+        return self._datastore.get_data(
+            self.set_variable_path_id(filename), columns=columns
+        )
 
-    def write_file(self, data, filename):
+    def write_file(self, data, filename, cache_format=None):
 
         if isinstance(data, DataFrame):
             fmt = ".csv.gz"
@@ -70,15 +78,50 @@ class TempCache(object):
             fmt = ".json"
             filename += fmt
 
-        elif isinstance(data, list):
+        elif isinstance(data, (list, ColumnarDataSegments)):
             fmt = ".pkl"
             filename += fmt
+            data = to_columnar_datasegments(data)
 
         else:
             raise Exception(
                 "Data type {} cannot be written to the cache".format(type(data))
             )
 
-        self._datastore.save_data(data, self.set_variable_path_id(filename), fmt)
+        self._datastore.save_data(
+            data,
+            self.set_variable_path_id(filename),
+            get_cache_format(data, fmt, cache_format or settings.CACHE_FILE_FORMAT),
+        )
 
         return filename
+
+    def write_projection(self, data, filename, source):
+        """Writes a DataFrame made of columns of the cached DataFrame source as a
+        reference to those columns instead of a copy of the data. Falls back to
+        write_file when source is not stored in the npz format or data differs from
+        the columns of source."""
+        source_key = self.set_variable_path_id(source) if source else None
+
+        if (
+            source_key is not None
+            and isinstance(data, DataFrame)
+            and self._datastore.is_npz_dataframe(source_key)
+        ):
+            columns = data.columns.tolist()
+            try:
+                source_data = self._datastore.get_data(source_key, columns=columns)
+            except ValueError:
+                source_data = None
+
+            if source_data is not None and source_data.equals(data):
+                filename += ".csv.gz"
+                self._datastore.save_data(
+                    DataProjection(source_key, columns),
+                    self.set_variable_path_id(filename),
+                    ".npz.projection",
+                )
+
+                return filename
+
+        return self.write_file(data, filename)
@@ -18,6 +18,7 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import logging
+import time
 
 import numpy as np
 import pandas as pd
@@ -46,15 +47,91 @@ HAS_KEYS = {
 AVG = "average"
 CLASS_MODES = {0: "rbf", 1: "knn"}
 
-from library.models import Transform
+from django.conf import settings
+from django.db.models import signals
+from library.models import CustomTransform, LibraryPack, Transform
+from redis import RedisError, StrictRedis
+
+# Transforms returned by get_transform, by lookup arguments
+transform_cache = {}
+
+# Counter shared by the workers, incremented whenever a transform or library pack
+# changes, and the value this process last read
+TRANSFORM_CACHE_VERSION_KEY = "transform_cache_version"
+transform_cache_version = {"version": None, "checked": None}
+transform_cache_redis = None
 
 
 class ClassMapException(Exception):
     pass
 
 
+def get_transform_cache_redis():
+    global transform_cache_redis
+    if transform_cache_redis is None:
+        transform_cache_redis = StrictRedis(settings.REDIS_ADDRESS)
+
+    return transform_cache_redis
+
+
+def check_transform_cache_version():
+    """Clears the transform cache when a transform or library pack was changed by
+    another worker. The shared version is read at most once every
+    TRANSFORM_CACHE_TIMEOUT seconds, the cache is also cleared when it cannot be
+    read."""
+    now = time.monotonic()
+    checked = transform_cache_version["checked"]
+    if checked is not None and now - checked < settings.TRANSFORM_CACHE_TIMEOUT:
+        return
+
+    try:
+        version = get_transform_cache_redis().get(TRANSFORM_CACHE_VERSION_KEY)
+        changed = version != transform_cache_version["version"]
+    except RedisError:
+        logger.warning("Transform cache version is not available")
+        version, changed = None, True
+
+    if changed:
+        transform_cache.clear()
+
+    transform_cache_version.update(version=version, checked=now)
+
+
+def get_transform(**kwargs):
+    """Memoized Transform.objects.get with the library pack of the transform.
+
+    Pipeline drivers look up their transform for every shard they process. Saving or
+    deleting a transform or library pack clears the lookups of this process and
+    increments the version shared by the workers in redis, the other workers clear
+    theirs within TRANSFORM_CACHE_TIMEOUT seconds.
+    """
+    check_transform_cache_version()
+
+    key = tuple(sorted(kwargs.items()))
+    if key not in transform_cache:
+        transform_cache[key] = Transform.objects.select_related("library_pack").get(
+            **kwargs
+        )
+
+    return transform_cache[key]
+
+
+def clear_transform_cache(**kwargs):
+    transform_cache.clear()
+
+    try:
+        get_transform_cache_redis().incr(TRANSFORM_CACHE_VERSION_KEY)
+    except RedisError:
+        logger.warning("Transform cache version could not be incremented")
+
+
+for sender in [Transform, CustomTransform, LibraryPack]:
+    signals.post_save.connect(clear_transform_cache, sender=sender)
+    signals.post_delete.connect(clear_transform_cache, sender=sender)
+
+
 def get_input_contract(name):
-    return Transform.objects.get(name=name).input_contract
+    return get_transform(name=name).input_contract
 
 
 def check_valid_input(input_contract, config):
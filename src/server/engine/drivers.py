@@ -33,6 +33,7 @@ from django.core.exceptions import ValidationError
 from engine.base.contractenforcer import ContractEnforcer
 from engine.base.temp_table import TempVariableTable
 from engine.base.utils import (
+    get_transform,
     logging,
     make_tvo_config,
     np,
@@ -47,7 +48,6 @@ from library.model_generators.model_generators import (
 )
 from library.model_validation.validation_methods import get_validation_method
 from library.core_functions.augmentation import is_augmented
-from library.models import Transform
 from logger.log_handler import LogHandler
 from numpy import isnan
 from pandas import DataFrame
@@ -75,7 +75,7 @@ def segment_function_caller(
     input_data, step, team_id, project_id, pipeline_id, user_id, task_id, **kwargs
 ):
     # Contract enforcer checks input types against transform contract
-    transform = Transform.objects.get(name=step["name"])
+    transform = get_transform(name=step["name"])
     contract_enforcer = ContractEnforcer(step, transform.input_contract, transform.name)
     args = contract_enforcer.enforce()
 
@@ -108,7 +108,7 @@ def function_caller(
     input_data, step, team_id, project_id, pipeline_id, user_id, task_id, **kwargs
 ):
     # Load Functions and retrieve data
-    transform = Transform.objects.get(name=step["name"])
+    transform = get_transform(name=step["name"])
     func = utils.get_function(transform)
 
     # Contract enforcer checks input types against transform contract
@@ -162,7 +162,7 @@ def function_caller(
 
 
 def get_function_from_database(function, pipeline_id):
-    transform = Transform.objects.get(
+    transform = get_transform(
         name=function["function_name"],
         library_pack__uuid=function["inputs"].get(
             "library_pack", settings.SENSIML_LIBRARY_PACK
@@ -393,9 +393,9 @@ def feature_selection_driver(
     selected_data = input_data
     for selector in step["set"]:
         if "function_name" in selector:
-            actual_function = Transform.objects.get(name=selector["function_name"])
+            actual_function = get_transform(name=selector["function_name"])
         else:
-            actual_function = Transform.objects.get(name=selector["name"])
+            actual_function = get_transform(name=selector["name"])
         for inp in actual_function.input_contract:
             if inp["name"] in step["inputs"] and not selector["inputs"].get(
                 inp["name"], None
@@ -454,7 +454,7 @@ def feature_transform_caller(
     # Load Functions and retrieve data
     feature_table = step.pop("feature_table_value", None)
 
-    transform = Transform.objects.get(name=step["name"])
+    transform = get_transform(name=step["name"])
     func = utils.get_function(transform)
 
     # Contract enforcer checks input types against transform contract
@@ -530,7 +530,8 @@ def generate_features(
 
     """
 
-    result = DataFrame()
+    feature_blocks = []
+    group_columns = []
     feature_table = []
     pad = 4
     generator_counter = 0
@@ -544,7 +545,8 @@ def generate_features(
         contract_num_inputs = gen[1].input_contract[1].get("num_columns", None)
         generator_family = gen[1].output_contract[0].get("family", False)
         kwargs.pop("input_data", None)
-        kwargs["group_columns"] = list(input_data[0]["metadata"].keys())
+        group_columns = list(input_data[0]["metadata"].keys())
+        kwargs["group_columns"] = group_columns
         try:
             column_result = DataSegments(input_data).apply(generator_call, **kwargs)
         except Exception as e:
@@ -584,27 +586,33 @@ def generate_features(
             ]
 
             # Remove any columns containing NaNs and log the error
-            for col in feature_names:
-                if isnan(column_result[col]).any():
-                    column_result = column_result.drop(col, axis=1)
-                    error = {
-                        "step": "Feature Generation",
-                        "error": "FeatureGenerationError",
-                        "function_in_file": generator_call.__name__,
-                        "input_keys": list(kwargs.keys()),
-                        "message": "{} produced an incomplete result for feature {} so it was dropped".format(
-                            gen[1].name, col
-                        ),
+            nan_columns = [
+                col
+                for col, has_nan in zip(
+                    feature_names, isnan(column_result[feature_names]).any(axis=0)
+                )
+                if has_nan
+            ]
+            column_result = column_result.drop(nan_columns, axis=1)
+            for col in nan_columns:
+                error = {
+                    "step": "Feature Generation",
+                    "error": "FeatureGenerationError",
+                    "function_in_file": generator_call.__name__,
+                    "input_keys": list(kwargs.keys()),
+                    "message": "{} produced an incomplete result for feature {} so it was dropped".format(
+                        gen[1].name, col
+                    ),
+                }
+                logger.error(
+                    {
+                        "message": "Feature Generation Error",
+                        "data": error,
+                        "UUID": pipeline_id,
+                        "log_type": "PID",
                     }
-                    logger.error(
-                        {
-                            "message": "Feature Generation Error",
-                            "data": error,
-                            "UUID": pipeline_id,
-                            "log_type": "PID",
-                        }
-                    )
-                    errors.append(error)
+                )
+                errors.append(error)
 
             sensor_combinations = set()
 
@@ -637,16 +645,7 @@ def generate_features(
 
             column_result.rename(columns=prefix_columns, inplace=True)
 
-            if len(result):
-                result = pd.merge(
-                    result,
-                    column_result,
-                    on=kwargs["group_columns"],
-                    left_index=False,
-                    right_index=False,
-                )
-            else:
-                result = column_result.reset_index(drop=True)
+            feature_blocks.append(column_result.reset_index(drop=True))
 
             generator_columns = [
                 c for c in column_result.columns if c not in kwargs["group_columns"]
@@ -697,12 +696,91 @@ def generate_features(
                     }
                 )
 
+    result = assemble_feature_matrix(feature_blocks, group_columns)
+
     if "temp_group" in result.columns:
         result = result.drop("temp_group", axis=1)
 
     return result, feature_table, errors
 
 
+def assemble_feature_matrix(feature_blocks, group_columns):
+    """Builds the feature table from the output of each feature generator.
+
+    Every generator is applied to the same segments, so their outputs normally have
+    identical group column values row for row. In that case the features are copied
+    into a single preallocated matrix and the group columns are attached once. Any
+    other case falls back to joining the outputs on the group columns.
+    """
+    if not feature_blocks:
+        return DataFrame()
+
+    metadata = feature_blocks[0][group_columns]
+    columns = list(feature_blocks[0].columns)
+    feature_columns = [c for c in columns if c not in group_columns]
+
+    aligned = True
+    for block in feature_blocks[1:]:
+        block_features = [c for c in block.columns if c not in group_columns]
+        if not block[group_columns].equals(metadata) or set(
+            block_features
+        ).intersection(feature_columns):
+            aligned = False
+            break
+        feature_columns.extend(block_features)
+        columns.extend(block_features)
+
+    if not aligned:
+        result = feature_blocks[0]
+        for block in feature_blocks[1:]:
+            result = pd.merge(
+                result,
+                block,
+                on=group_columns,
+                left_index=False,
+                right_index=False,
+            )
+        return result
+
+    metadata = metadata.reset_index(drop=True)
+    dtypes = {
+        dtype
+        for block in feature_blocks
+        for column, dtype in block.dtypes.items()
+        if column not in group_columns
+    }
+
+    if len(dtypes) > 1:
+        # columns of different types keep their own type, as they do when joined
+        features = pd.concat(
+            [
+                block[[c for c in block.columns if c not in group_columns]]
+                for block in feature_blocks
+            ],
+            axis=1,
+        )
+        result = pd.concat([features.reset_index(drop=True), metadata], axis=1)
+
+        return result[columns]
+
+    features = np.empty(
+        (len(metadata), len(feature_columns)),
+        dtype=dtypes.pop() if dtypes else np.float64,
+    )
+
+    position = 0
+    for block in feature_blocks:
+        block_features = [c for c in block.columns if c not in group_columns]
+        features[:, position : position + len(block_features)] = block[
+            block_features
+        ].values
+        position += len(block_features)
+
+    result = pd.concat([DataFrame(features, columns=feature_columns), metadata], axis=1)
+
+    return result[columns]
+
+
 def is_classification(tvo_config):
     if tvo_config.get("estimator_type") == "regression":
         return False
@@ -722,7 +800,7 @@ def tvo_driver(
     Args:
         step (dict): A dictionary containing at least the following keys: input_data, label_column. \
                     May also contain appropriate values for the following keys: validation_methods, classifiers, \
-                    optimizers, outputs, group_columns, ignore_column, run_non_optimized, number_of_neurons, number_of_folds, number_of_iterations
+                    optimizers, outputs, group_columns, ignore_column, run_non_optimized, number_of_neurons, number_of_folds, number_of_iterations, fidelity
         pipeline_id (str): A unique id for the pipeline
 
     Raises:
@@ -751,6 +829,7 @@ def tvo_driver(
     tvo_config = make_tvo_config(
         step, classifier[0], validation_method[0], optimizer[0]
     )
+    fidelity = tvo_config.pop("fidelity", None)
 
     # Make sure this is a valid configuration
     if validate_config(tvo_config) == False:
@@ -777,6 +856,9 @@ def tvo_driver(
             )
         )
 
+    if fidelity:
+        input_data = apply_tvo_fidelity(tvo_config, input_data, fidelity)
+
     # Read features from the incoming table of selected features or if it's not available create the table
     feature_table, selected_features, feature_columns = get_selected_features(
         feature_table, pipeline_id
@@ -852,6 +934,52 @@ def tvo_driver(
     return tvo_results, feature_table
 
 
+def apply_tvo_fidelity(tvo_config, input_data, fidelity):
+    """Reduces the cost of a TVO evaluation for a low fidelity AutoML rung.
+
+    Args:
+        tvo_config (dict): the tvo config, number_of_folds is overridden in place
+        input_data (DataFrame): the feature vectors passed to the tvo step
+        fidelity (dict): sample_size, the fraction of the feature vectors of each
+            class that is kept, number_of_folds, the folds of the validation method,
+            and epochs, the training epochs of optimizers that have them
+
+    Returns:
+        A stratified subsample of the input data
+    """
+    if fidelity.get("number_of_folds"):
+        tvo_config["number_of_folds"] = min(
+            int(fidelity["number_of_folds"]),
+            tvo_config.get("number_of_folds", fidelity["number_of_folds"]),
+        )
+
+    if fidelity.get("epochs") and tvo_config.get("epochs"):
+        tvo_config["epochs"] = min(int(fidelity["epochs"]), tvo_config["epochs"])
+
+    sample_size = fidelity.get("sample_size", 1.0)
+    if sample_size >= 1.0:
+        return input_data
+
+    # keep enough vectors of every class for each validation fold
+    minimum_class_size = max(tvo_config.get("number_of_folds", 1), 2)
+    labels = input_data[tvo_config["label_column"]].values
+    random_state = np.random.RandomState(0)
+    sample_indices = []
+    for label in pd.unique(labels):
+        class_indices = np.flatnonzero(labels == label)
+        class_size = min(
+            len(class_indices),
+            max(int(round(len(class_indices) * sample_size)), minimum_class_size),
+        )
+        sample_indices.append(
+            random_state.choice(class_indices, class_size, replace=False)
+        )
+
+    return input_data.iloc[np.sort(np.concatenate(sample_indices))].reset_index(
+        drop=True
+    )
+
+
 def execute_tvo_config(
     config,
     input_data,
@@ -19,6 +19,7 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 # author c.knorowski
 import itertools
+import json
 import logging
 import time
 from copy import deepcopy
@@ -26,6 +27,10 @@ from copy import deepcopy
 import engine.drivers as drivers
 import pandas as pd
 from datamanager.models import PipelineExecution
+from engine.automationengine import validate_fidelity_parameters
+from engine.automationengine_mixin.genetic_iteration_mixin import (
+    select_promoted_candidates,
+)
 from engine.base.utils import clean_results
 from engine.parallelexecutionengine import ParallelExecutionEngine
 from library.models import Transform
@@ -52,7 +57,9 @@ class GridSearchEngine(ParallelExecutionEngine):
         """Grid Search pipeline execution function.
 
         Args:
-            grid_parameters (dict): A dictionary containing
+            grid_parameters (dict): A dictionary containing the parameters to search
+             for each step name. The optional keys fidelity_schedule and
+             promotion_rate train the grid leaves with successive halving.
             pipeline_json (json string): a json containing all of the information
              on about the pipeline to be executed
             caching (bool, optional): Turn sandbox pipeline caching on/off
@@ -65,11 +72,21 @@ class GridSearchEngine(ParallelExecutionEngine):
         self.execution_summary = []
         self._pipeline = pipeline_json
         steps_to_execute = self._pipeline
-        self.grid_parameters = grid_parameters
+        self.grid_parameters = {
+            key: value
+            for key, value in grid_parameters.items()
+            if key not in ["fidelity_schedule", "promotion_rate"]
+        }
+        self.fidelity_schedule = grid_parameters.get("fidelity_schedule", [])
+        self.promotion_rate = grid_parameters.get("promotion_rate", 0.5)
+        self.promotion_trace = {}
         self.gridded_pipeline_steps = [{}]
+        self.grid_nodes = [0]
         self.run_parallel = run_parallel
         data = ()
 
+        validate_fidelity_parameters(self.fidelity_schedule, self.promotion_rate)
+
         for i, step in enumerate(self._pipeline):
             logger.userlog(
                 {
@@ -145,6 +162,11 @@ class GridSearchEngine(ParallelExecutionEngine):
                     self._cache_manager.save_result_data(
                         "grid_result", str(self.pipeline_id), data
                     )
+                    self._cache_manager.save_result_data(
+                        "grid_promotion_trace",
+                        str(self.pipeline_id),
+                        self.promotion_trace,
+                    )
                 else:
                     raise Exception(
                         "Step type {step_type} not supported.".format(
@@ -245,103 +267,210 @@ class GridSearchEngine(ParallelExecutionEngine):
 
         temp_steps = self.prepare_grid_steps(grid_param, step, input_type=".csv.gz")
 
-        results = self.parallel_pipeline_step(
-            func,
-            temp_steps,
-            self._team_id,
-            self.project_id,
-            self.pipeline_id,
-            self._user.id,
-            step_info=step_info,
-        )
+        if self.fidelity_schedule:
+            results, fidelities = self.successive_halving_model_step(
+                func, temp_steps, step_info
+            )
+            sort_columns = ["fidelity", "f1_score"]
+        else:
+            results = self.parallel_pipeline_step(
+                func,
+                temp_steps,
+                self._team_id,
+                self.project_id,
+                self.pipeline_id,
+                self._user.id,
+                step_info=step_info,
+            )
+            fidelities = None
+            sort_columns = ["f1_score"]
 
-        # update the result matrix with the grid params
+        # update the result matrix with the grid params, leaves sharing a node
+        # report the results of that node
         M = []
-        for index, result in enumerate(results):
+        for index, node in enumerate(self.grid_nodes):
+            result = results[node]
             if result[0]:
-                for row in result[1]["model_stats"]["metrics"]:
+                metrics = deepcopy(result[1]["model_stats"]["metrics"])
+                for row in metrics:
                     row.update(flatten_dictionary(self.gridded_pipeline_steps[index]))
+                    if fidelities is not None:
+                        row["fidelity"] = fidelities[node]
 
-                M.append(pd.DataFrame(result[1]["model_stats"]["metrics"]))
+                M.append(pd.DataFrame(metrics))
 
         df = (
             pd.concat(M)
-            .sort_values(["f1_score"], ascending=False)
+            .sort_values(sort_columns, ascending=False)
             .reset_index(drop=True)
         )
 
         return clean_results(df.to_dict())
 
+    def successive_halving_model_step(self, func, temp_steps, step_info):
+        """Trains the grid nodes of a tvo step with successive halving.
+
+        Every node is first trained at the budget of the first rung of the fidelity
+        schedule (a subsample of the feature vectors, fewer validation folds or fewer
+        epochs). Only the promotion_rate of the nodes with the best f1_score move on
+        to the next rung, the last rung trains the survivors with the full budget.
+        The score of every leaf at every rung it reached is kept in
+        self.promotion_trace.
+
+        Returns:
+            The latest successful result of each node and the rung it was trained at
+        """
+        results = [None] * len(temp_steps)
+        fidelities = [0] * len(temp_steps)
+        promotion_trace = []
+        candidates = list(range(len(temp_steps)))
+
+        for rung, fidelity in enumerate(self.fidelity_schedule + [None]):
+            rung_steps = [deepcopy(temp_steps[node]) for node in candidates]
+            if fidelity is not None:
+                for rung_step in rung_steps:
+                    rung_step["fidelity"] = fidelity
+
+            rung_results = self.parallel_pipeline_step(
+                func,
+                rung_steps,
+                self._team_id,
+                self.project_id,
+                self.pipeline_id,
+                self._user.id,
+                step_info=step_info,
+            )
+
+            scores = {}
+            for node, result in zip(candidates, rung_results):
+                # a node failing at a higher rung keeps its lower rung result
+                if result[0] or results[node] is None:
+                    results[node] = result
+                    fidelities[node] = rung
+                if result[0]:
+                    scores[node] = pd.DataFrame(result[1]["model_stats"]["metrics"])[
+                        "f1_score"
+                    ].mean()
+
+            if fidelity is None or not scores:
+                promoted = list(scores.keys())
+            else:
+                promoted = select_promoted_candidates(
+                    pd.DataFrame(
+                        {
+                            "candidate": list(scores.keys()),
+                            "fitness": list(scores.values()),
+                        }
+                    ),
+                    self.promotion_rate,
+                )
+
+            for leaf, node in enumerate(self.grid_nodes):
+                if node in candidates:
+                    row = {"rung": rung, "f1_score": scores.get(node, None)}
+                    row.update(fidelity or {})
+                    row["promoted"] = node in promoted and fidelity is not None
+                    row.update(flatten_dictionary(self.gridded_pipeline_steps[leaf]))
+                    promotion_trace.append(row)
+
+            candidates = promoted
+
+            if not candidates:
+                break
+
+        self.promotion_trace = clean_results(pd.DataFrame(promotion_trace).to_dict())
+
+        return results, fidelities
+
     def prepare_grid_steps(self, grid_param, step, input_type, **kwargs):
         """Prepare a list of pipeline steps for a specific set of grid
         parameters.
+
+        The grid is executed as a prefix tree. Every grid leaf, a combination of
+        the parameters of the steps so far, points to the node whose output holds
+        its data in self.grid_nodes. Leaves whose step is identical, the same
+        parameters applied to the same input, share a node so it runs only once.
+
         Args:
             grid_param (dict): parameters for this current step to search
             step (dict): a pipeline step
 
         Returns:
-            TYPE: An array of fully modified steps
+            TYPE: An array of fully modified steps, one for each node
         """
         parallel_steps = []
         gridded_pipeline_steps = []
-        number_of_grids = len(self.gridded_pipeline_steps)
+        grid_nodes = []
+        nodes = {}
 
-        for index in range(number_of_grids):
+        for index, parent in enumerate(self.grid_nodes):
             if grid_param is None:
-                # there can be multiple output steps, lets modify all of them
-                temp_step = create_temp_step(step, index, input_type)
-                temp_step["outputs"] = [
-                    x + ".grid_{}".format(index) for x in step["outputs"]
-                ]
-                parallel_steps.append(temp_step)
-
+                grid_permutation = [None]
             else:
                 grid_permutation = get_permutated_dictionary_arrays(grid_param, step)
-                grid_number = len(grid_permutation)
-
-                for counter, grid_iteration in enumerate(grid_permutation):
-                    temp_step = create_temp_step(step, index, input_type)
-
-                    # there can be multiple output steps, lets modify all of
-                    # them
-                    temp_step["outputs"] = [
-                        x + ".grid_{}".format(index * grid_number + counter)
-                        for x in step["outputs"]
-                    ]
 
-                    if step["type"] == "tvo":
-                        temp_step["optimizers"][0]["inputs"].update(
-                            grid_iteration.get("training_method", {})
-                        )
-                        temp_step["validation_methods"][0]["inputs"].update(
-                            grid_iteration.get("validation_method", {})
-                        )
-                        temp_step["classifiers"][0]["inputs"].update(
-                            grid_iteration.get("classifier_method", {})
-                        )
-                    else:
-                        temp_step["inputs"].update(
-                            filter_update_dictionary(
-                                temp_step["inputs"], grid_iteration
-                            )
-                        )
-                        # If there is a set in temp_step we need to treat it differently
-                        if temp_step.get("set", None):
-                            update_set(temp_step, grid_iteration)
+            for grid_iteration in grid_permutation:
+                temp_step = create_temp_step(step, parent, input_type)
 
-                    parallel_steps.append(temp_step)
+                if grid_iteration is not None:
+                    update_grid_step(temp_step, grid_iteration)
                     gridded_pipeline_steps.append(
                         merge_dictionaries(
                             self.gridded_pipeline_steps[index], grid_iteration
                         )
                     )
 
+                key = get_grid_step_key(temp_step)
+                if key not in nodes:
+                    nodes[key] = len(parallel_steps)
+
+                    # there can be multiple output steps, lets modify all of them
+                    temp_step["outputs"] = [
+                        x + ".grid_{}".format(nodes[key]) for x in step["outputs"]
+                    ]
+                    parallel_steps.append(temp_step)
+
+                grid_nodes.append(nodes[key])
+
         if grid_param:
             self.gridded_pipeline_steps = deepcopy(gridded_pipeline_steps)
 
+        self.grid_nodes = grid_nodes
+
         return parallel_steps
 
 
+def update_grid_step(temp_step, grid_iteration):
+    """Applies the parameters of one grid permutation to a step"""
+    if temp_step["type"] == "tvo":
+        temp_step["optimizers"][0]["inputs"].update(
+            grid_iteration.get("training_method", {})
+        )
+        temp_step["validation_methods"][0]["inputs"].update(
+            grid_iteration.get("validation_method", {})
+        )
+        temp_step["classifiers"][0]["inputs"].update(
+            grid_iteration.get("classifier_method", {})
+        )
+    else:
+        temp_step["inputs"].update(
+            filter_update_dictionary(temp_step["inputs"], grid_iteration)
+        )
+        # If there is a set in temp_step we need to treat it differently
+        if temp_step.get("set", None):
+            update_set(temp_step, grid_iteration)
+
+
+def get_grid_step_key(temp_step):
+    """Identifies a grid step by everything but its outputs, steps with the same key
+    produce the same outputs."""
+    return json.dumps(
+        {key: value for key, value in temp_step.items() if key != "outputs"},
+        sort_keys=True,
+        default=str,
+    )
+
+
 def filter_update_dictionary(inputs, grid_parameters):
     """Given two dictionaries, take only the paramaters from the second
     dictionary that also have keys in the first"""
@@ -23,7 +23,7 @@ from collections import deque
 from copy import deepcopy
 from uuid import uuid4
 
-from datamanager.datasegments import dataframe_to_datasegments, get_dataframe_datatype
+from datamanager.datasegments import ColumnarDataSegments, get_dataframe_datatype
 from datamanager.models import Query
 from datamanager.tasks import querydata_async
 from django.conf import settings
@@ -230,7 +230,7 @@ class ParallelExecutionEngine(ExecutionEngine):
                 [groups.get_group(key) for key in groups_to_split[index]]
             ).reset_index(drop=True)
 
-            data_segments = dataframe_to_datasegments(
+            data_segments = ColumnarDataSegments.from_dataframe(
                 tmp_data, data_columns, group_columns
             )
 
@@ -288,7 +288,7 @@ class ParallelExecutionEngine(ExecutionEngine):
                     data[col] = 1
 
         # TODO For backwards compatibility in DCL we let capture_driver keep its datatype in float
-        data_segments = dataframe_to_datasegments(
+        data_segments = ColumnarDataSegments.from_dataframe(
             data,
             data_columns=data_columns,
             group_columns=fill_group_columns,
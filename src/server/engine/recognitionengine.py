@@ -18,7 +18,9 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import logging
+import threading
 
+import numpy as np
 from datamanager.datasegments import dataframe_to_datasegments
 from datamanager.models import PipelineExecution
 from engine.base.pipeline_utils import (
@@ -29,10 +31,12 @@ from engine.base.pipeline_utils import (
     get_type_index,
     make_recognition_pipeline,
 )
+from engine.base.model_cache import get_model_key, get_model_size, model_cache
 from engine.base.temp_cache import TempCache
 from engine.base.utils import return_labels_to_original_values
 from library.classifiers.bonsai import Bonsai
 from library.classifiers.boosted_tree_ensemble import BoostedTreeEnsemble
+from library.classifiers.classifier import get_feature_matrix
 from library.classifiers.decision_tree_ensemble import DecisionTreeEnsemble
 from library.classifiers.linear_regression import LinearRegression
 from library.classifiers.pme import PME
@@ -67,7 +71,6 @@ class RecognitionEngine(object):
     ):
         self.task_id = task_id
         self.recognition_data = reco_data
-        self.neuron_array = knowledgepack.neuron_array
         self.project_id = project_id
         self.kp = knowledgepack
         self.stop_step = stop_step
@@ -88,7 +91,34 @@ class RecognitionEngine(object):
         self._user = user
         self._team_id = str(user.teammember.team.uuid)
 
+    @property
+    def neuron_array(self):
+        # read on first use, the knowledgepack may be loaded without its model when
+        # the classifier is expected to come from the model cache
+        return self.kp.neuron_array
+
     def initialize_classifier(self, config):
+        """Uses the classifier of the knowledgepack from the worker model cache, the
+        model is only loaded when it is not cached."""
+        self.classifier_lock = threading.Lock()
+        model_key = get_model_key(self.kp, config)
+
+        (classifier, lock) = model_cache.get_with_lock(model_key)
+        if classifier is not None:
+            self.classifier = classifier
+            self.classifier_lock = lock
+            return
+
+        self._load_classifier(config)
+
+        model_cache.put(
+            model_key,
+            self.classifier,
+            get_model_size(self.neuron_array),
+            self.classifier_lock,
+        )
+
+    def _load_classifier(self, config):
         if self.classifier_type in ["PME"]:
             self.classifier = PME()
             # There is an off-by-one problem if you use the exact number!
@@ -151,67 +181,96 @@ class RecognitionEngine(object):
         else:
             raise Exception("Classifier {} not supported".format(self.classifier_type))
 
-    def _add_mapped_category_vector(self, response_dict):
+    def _get_mapped_categories(self, result, vectors):
+        """Maps the recognized categories of the result dictionaries to the class
+        names of the knowledgepack."""
+        if not (self.kp and self.class_map):
+            return [None] * len(vectors)
+
+        if result.regression:
+            return [[] for _ in vectors]
+
+        # look up every distinct category once
+        class_names = {
+            category: self.class_map[str(category)]
+            for category in np.unique(result.categories).tolist()
+            if str(category) in self.class_map
+        }
+
+        if result.categories.ndim == 1:
+            return [class_names.get(vector["CategoryVector"], []) for vector in vectors]
+
+        return [
+            [
+                class_names[category]
+                for category in vector["CategoryVector"]
+                if category in class_names
+            ]
+            for vector in vectors
+        ]
+
+    def reco_feature_vectors(self, feature_vectors, labels=None, desired_responses=1):
+        """Recognize classes of a matrix of feature vectors.
+
+        Args:
+            feature_vectors: array of shape (number of vectors, number of features)
+            labels: integer categories of the feature vectors, the metrics are only
+                computed when they are provided
+            desired_responses: number of responses per vector for classifiers that
+                return several responses (PME)
+
+        Returns:
+            the RecognitionResult of the classifier and the metrics, or None
+        """
+        # cached classifiers are shared by the threads of the worker
+        with self.classifier_lock:
+            result = self.classifier.recognize(
+                feature_vectors, desired_responses=desired_responses
+            )
+
+            if labels is None:
+                return result, None
+
+            stats = self.classifier.compute_statistics(
+                result, labels, include_predictions=True
+            )
+
         if self.kp and self.class_map:
-            response_dict["MappedCategoryVector"] = []
-            if isinstance(response_dict["CategoryVector"], int):
-                if str(response_dict["CategoryVector"]) in self.class_map.keys():
-                    response_dict["MappedCategoryVector"] = self.class_map[
-                        str(response_dict["CategoryVector"])
-                    ]
-            if isinstance(response_dict["CategoryVector"], list):
-                for i, _ in enumerate(response_dict["CategoryVector"]):
-                    if str(response_dict["CategoryVector"][i]) in self.class_map.keys():
-                        response_dict["MappedCategoryVector"].append(
-                            self.class_map[str(response_dict["CategoryVector"][i])]
-                        )
-        return response_dict
+            stats = return_labels_to_original_values(stats, self.class_map)
+
+        return result, stats
+
+    def get_result_vectors(self, result, desired_responses=None):
+        """Returns a RecognitionResult in the list of dictionaries format of the REST
+        API."""
+        vectors = result.to_vector_dicts(desired_responses)
+
+        for vector, mapped_categories in zip(
+            vectors, self._get_mapped_categories(result, vectors)
+        ):
+            vector["MappedCategoryVector"] = mapped_categories
+
+        return vectors
 
     def reco_many_vector(self, with_labels=False):
         """Recognize classes of multiple feature vectors in a list of dictionaries."""
         dict_recognition_vectors = self.recognition_data
 
-        for i in range(0, len(dict_recognition_vectors)):
-            if "DesiredResponses" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["DesiredResponses"] = 1
-            if "Context" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["Context"] = 1
-            if "CategoryVector" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["CategoryVector"] = []
-            if "DistanceVector" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["DistanceVector"] = []
-            if "NIDVector" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["NIDVector"] = []
-            if "Uncertain" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["Uncertain"] = None
-            if "Category" not in dict_recognition_vectors[i]:
-                dict_recognition_vectors[i]["Category"] = 1
-
-        stats = self.classifier.recognize_vectors(
-            dict_recognition_vectors, include_predictions=True
-        )
-
-        if self.kp and self.class_map:
-            stats = return_labels_to_original_values(stats, self.class_map)
+        desired_responses = [
+            vector.get("DesiredResponses", 1) for vector in dict_recognition_vectors
+        ]
 
-        # reco_vectors in kb_engine would return a vector
-        # with the same key. emulate that functionality
-        list_results = []
-        for d in dict_recognition_vectors:
-            d = self._add_mapped_category_vector(d)
-            list_results.append(
-                {
-                    key: d.get(key, None)
-                    for key in (
-                        "CategoryVector",
-                        "DistanceVector",
-                        "NIDVector",
-                        "MappedCategoryVector",
-                    )
-                }
-            )
+        result, stats = self.reco_feature_vectors(
+            get_feature_matrix(dict_recognition_vectors),
+            labels=(
+                [vector.get("Category", 1) for vector in dict_recognition_vectors]
+                if with_labels
+                else None
+            ),
+            desired_responses=max(desired_responses),
+        )
 
-        dict_results = {"vectors": list_results}
+        dict_results = {"vectors": self.get_result_vectors(result, desired_responses)}
         if with_labels:
             dict_results["metrics"] = stats
 
@@ -366,7 +425,7 @@ class RecognitionEngine(object):
         feature_vectors = results[ordered_columns]
 
         # Recognize the vectors with or without ground truth labels
-        with_labels = False
+        labels = None
         label_column = self.kp.pipeline_summary[-1]["label_column"]
 
         if self.compare_labels and self.overwrite_labels:
@@ -376,22 +435,17 @@ class RecognitionEngine(object):
             if set(results[label_column]) == set([""]):
                 raise Exception("No labels in label column.")
 
-            with_labels = True
             categories = results[label_column]
 
             check_categories(categories, self.reverse_map)
 
-            self.recognition_data = [
-                {"Vector": vector, "Category": self.reverse_map[categories[i]]}
-                for i, vector in enumerate(feature_vectors.values.tolist())
-            ]
-        else:
-            self.recognition_data = [
-                {"Vector": vector}
-                for i, vector in enumerate(feature_vectors.values.tolist())
-            ]
+            labels = [self.reverse_map[category] for category in categories.tolist()]
 
-        result_dict = self.reco_many_vector(with_labels)
+        result, stats = self.reco_feature_vectors(feature_vectors.values, labels=labels)
+
+        result_dict = {"vectors": self.get_result_vectors(result)}
+        if labels is not None:
+            result_dict["metrics"] = stats
 
         # Add metadata group columns to output
         if len(generator_set["inputs"]["group_columns"]):
@@ -402,16 +456,16 @@ class RecognitionEngine(object):
             ]
             metadata = results[columns]
 
-            for i, vector in enumerate(result_dict["vectors"]):
-                for column in metadata.columns:
-                    if metadata[column].dtype == "int64":
-                        result_dict["vectors"][i][column] = int(metadata.loc[i, column])
-                    elif metadata[column].dtype == "float64":
-                        result_dict["vectors"][i][column] = float(
-                            metadata.loc[i, column]
-                        )
-                    else:
-                        result_dict["vectors"][i][column] = metadata.loc[i, column]
+            for column in metadata.columns:
+                if metadata[column].dtype == "int64":
+                    values = [int(x) for x in metadata[column].tolist()]
+                elif metadata[column].dtype == "float64":
+                    values = [float(x) for x in metadata[column].tolist()]
+                else:
+                    values = list(metadata[column])
+
+                for vector, value in zip(result_dict["vectors"], values):
+                    vector[column] = value
 
         return {
             "results": result_dict,
@@ -158,7 +158,13 @@ def execute_function_return_success(
                 f"No data was generated from this step {step['name']}"
             )
 
-        filename = temp_cache.write_file(data, step["outputs"][0])
+        if "set" in step:
+            # the selected features are stored as columns of the input feature matrix
+            filename = temp_cache.write_projection(
+                data, step["outputs"][0], input_data_key
+            )
+        else:
+            filename = temp_cache.write_file(data, step["outputs"][0])
 
         if has_feature_table(step):
             if not isinstance(feature_table, DataFrame):
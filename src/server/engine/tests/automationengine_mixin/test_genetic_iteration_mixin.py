@@ -21,10 +21,13 @@ import json
 import os
 import sys
 from copy import deepcopy
+from types import SimpleNamespace
 
 import pytest
 from datamanager.models import Project, Sandbox
+from engine.automationengine_mixin import genetic_iteration_mixin
 from engine.automationengine_mixin.genetic_iteration_mixin import (
+    GeneticIterationMixin,
     _classifiers_sram_computation,
     add_class_map_to_optimizer,
     add_static_feature_selectors,
@@ -33,10 +36,12 @@ from engine.automationengine_mixin.genetic_iteration_mixin import (
     create_next_generation,
     create_population,
     get_the_results_of_previous_run_from_the_cache,
+    merge_steady_state_offspring,
     save_automl_params,
     save_final_results,
     save_iteration_results,
     save_static_pipeline_for_validation,
+    select_promoted_candidates,
     static_pipeline_validation_for_reset_true,
 )
 from engine.base.cache_manager import CacheManager
@@ -422,6 +427,163 @@ class TestRunGeneticIteration:
         assert len(results) == 10
         assert results.columns.tolist() == df_test.columns.tolist()
 
+    def test_merge_steady_state_offspring(self):
+        fitted_population = DataFrame(
+            {"name": ["a", "b", "c", "d"], "fitness": [0.9, 0.7, 0.5, 0.0]}
+        )
+
+        fitted_offspring = DataFrame({"name": ["e"], "fitness": [0.6]})
+        results = merge_steady_state_offspring(fitted_population, fitted_offspring, 4)
+        assert results["name"].tolist() == ["a", "b", "e", "c"]
+        assert results.index.tolist() == [0, 1, 2, 3]
+
+        # an offspring less fit than the whole population is dropped
+        fitted_offspring = DataFrame({"name": ["f"], "fitness": [0.1]})
+        results = merge_steady_state_offspring(results, fitted_offspring, 4)
+        assert results["name"].tolist() == ["a", "b", "e", "c"]
+
+    def test_steady_state_iterations(self, monkeypatch, settings):
+        settings.MAX_BATCH_SIZE = 2
+
+        scores = {"o0": 0.5, "o1": None, "o2": 0.9, "o3": 0.05}
+        bred = []
+        submitted_steps = []
+
+        def create_next_generation(population_size, top, **kwargs):
+            start = sum(len(names) for names in bred)
+            names = ["o{}".format(start + i) for i in range(population_size - top)]
+            bred.append(names)
+            return None, DataFrame({"name": names})
+
+        def create_population(offspring, ga_pipeline, inventory, **kwargs):
+            name = offspring.loc[0, "name"]
+            return {
+                step["type"]: [
+                    {
+                        "name": step["name"],
+                        "type": step["type"],
+                        "inputs": {"input_data": "temp.input", "offspring": name},
+                        "outputs": ["temp.{}".format(step["type"])],
+                    }
+                ]
+                for step in ga_pipeline
+            }
+
+        def submit_pipeline_step_job(step):
+            submitted_steps.append(step)
+            return SimpleNamespace(
+                task_id=len(submitted_steps), step=step, ready=lambda: True
+            )
+
+        def collect_pipeline_step_job(result):
+            name = result.step["inputs"]["offspring"]
+            if result.step["type"] == "tvo" and scores[name] is None:
+                return None, "failed"
+            return True, {"filename": "temp.{}.{}".format(result.step["type"], name)}
+
+        def assign_fitness_values(results_tvo, cost_table, auto_param_weights):
+            score = scores[cost_table.loc[0, "name"]]
+            return DataFrame(
+                {
+                    "name": cost_table["name"],
+                    "fitness": [score],
+                    "accuracy": [score * 100],
+                }
+            )
+
+        for name, value in [
+            ("create_next_generation", create_next_generation),
+            ("create_population", create_population),
+            ("get_pipeline_step_job", lambda func, step, *args, **kwargs: step),
+            ("submit_pipeline_step_job", submit_pipeline_step_job),
+            ("collect_pipeline_step_job", collect_pipeline_step_job),
+            ("separate_tvo_libraries", lambda population: population),
+            ("model_check", lambda results, cost_table, _: (results, cost_table)),
+            ("set_pipeline_subtask_ids", lambda *args: None),
+            ("remove_pipeline_subtask_ids", lambda *args: None),
+            ("save_iteration_results", lambda *args: None),
+            ("save_final_results", lambda *args: None),
+        ]:
+            monkeypatch.setattr(genetic_iteration_mixin, name, value)
+        monkeypatch.setattr(
+            genetic_iteration_mixin.param_optimizer,
+            "assign_fitness_values",
+            assign_fitness_values,
+        )
+
+        def run(prediction_target):
+            bred.clear()
+            submitted_steps.clear()
+
+            engine = SteadyStateEngine()
+            engine.param_prediction_target = prediction_target
+            fitted_population = DataFrame(
+                {
+                    "name": ["a", "b", "c", "d"],
+                    "fitness": [0.4, 0.3, 0.2, 0.1],
+                    "accuracy": [40.0, 30.0, 20.0, 10.0],
+                }
+            )
+
+            return engine, engine.steady_state_iterations(fitted_population, None)
+
+        engine, results = run({"accuracy": 0})
+
+        # two iterations of two offspring each, bred once per iteration
+        assert bred == [["o0", "o1"], ["o2", "o3"]]
+        assert engine.last_iteration == 3
+        assert not engine.requirement_satisfaction
+
+        # every offspring runs both steps, the second step reads the first one's output
+        assert [(s["type"], s["inputs"]["offspring"]) for s in submitted_steps] == [
+            ("selectorset", "o0"),
+            ("selectorset", "o1"),
+            ("tvo", "o0"),
+            ("tvo", "o1"),
+            ("selectorset", "o2"),
+            ("selectorset", "o3"),
+            ("tvo", "o2"),
+            ("tvo", "o3"),
+        ]
+        assert submitted_steps[2]["inputs"]["input_data"] == "temp.selectorset.o0"
+
+        # the failed offspring is logged and left out of the population
+        assert engine.errors == ["o1"]
+        assert engine.fitted_population_log["name"].tolist() == ["o0", "o2", "o3"]
+        assert results["name"].tolist() == ["o2", "o0", "a", "b"]
+
+        # no offspring is bred once an offspring reaches the targets
+        engine, results = run({"accuracy": 45})
+
+        assert bred == [["o0", "o1"]]
+        assert len(submitted_steps) == 4
+        assert engine.requirement_satisfaction
+        assert results["name"].tolist() == ["o0", "a", "b", "c"]
+
+    def test_select_promoted_candidates(self):
+        fitted_rung = DataFrame(
+            {"candidate": [4, 0, 2, 1, 5], "fitness": [0.9, 0.7, 0.7, 0.5, 0.1]}
+        )
+
+        assert select_promoted_candidates(fitted_rung, 0.5) == [0, 2, 4]
+        assert select_promoted_candidates(fitted_rung, 0.1) == [4]
+        assert select_promoted_candidates(fitted_rung, 1.0) == [0, 1, 2, 4, 5]
+
+    def test_check_target_scores_ignores_low_fidelity(self):
+        fitted_population = DataFrame(
+            {"accuracy": [95.0, 80.0], "fidelity": [0, 1], "fitness": [0.9, 0.8]}
+        )
+        prediction_target = {"accuracy": 90}
+
+        assert not check_target_scores_to_end_optimization(
+            fitted_population, prediction_target, {}
+        )
+
+        fitted_population.loc[1, "accuracy"] = 92.0
+        assert check_target_scores_to_end_optimization(
+            fitted_population, prediction_target, {}
+        )
+
     def test_get_the_results_of_previous_run_from_the_cache(self):
 
         df_test = DataFrame(columns=["test1", "test2"])
@@ -658,3 +820,47 @@ class TestRunGeneticIteration:
         results = automl_params_validation_for_reset_true(
             cache_manager, param_for_cache
         )
+
+
+class SteadyStateEngine(GeneticIterationMixin):
+    """The state of an automation engine used by steady_state_iterations"""
+
+    def __init__(self):
+        self.population_size = 4
+        self.survivor_rate = 0.5
+        self.iterations = 3
+        self.last_iteration = 1
+        self.requirement_satisfaction = False
+        self.param_hardware_target = {}
+        self.static_pipeline = []
+        self.ga_pipeline = [
+            {"name": "selectorset", "type": "selectorset"},
+            {"name": "tvo", "type": "tvo"},
+        ]
+        self.custom_class_map = None
+        self.mutation_rate = 0.1
+        self.recreation_rate = 0.1
+        self.all_libraries = ["name"]
+        self.param_validation_method = None
+        self.auto_param_weights = None
+        self.fitted_population_log = DataFrame()
+        self._cache_manager = None
+        self._team_id = None
+        self._user = SimpleNamespace(id=None)
+        self.project = SimpleNamespace(uuid=None)
+        self.pipeline_id = None
+        self.sandbox = SimpleNamespace(uuid=None)
+        self.task_id = None
+        self.errors = []
+
+    def set_error_log(self, index_pp, population, error_message, error_step):
+        self.errors.append(population[error_step][0]["inputs"]["offspring"])
+
+    def _update_step_info(self, step_info):
+        pass
+
+    def get_data_cache(self, name):
+        return name
+
+    def create_cost_table(self, population, results_tvo, iteration):
+        return DataFrame({"name": [population["tvo"][0]["inputs"]["offspring"]]}), None
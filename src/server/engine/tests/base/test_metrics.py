@@ -0,0 +1,63 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+from engine.base import metrics
+
+
+@pytest.mark.parametrize(
+    "y_true,y_pred",
+    [
+        ([1, 1, 1, 2, 2, 2], [1, 2, 1, 2, 1, 1]),
+        ([1, 1, 1, 2, 2, 2, 3, 3, 3], [1, 2, 1, 2, 1, 1, 3, 3, 3]),
+        (
+            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2],
+            [1, 1, 1, 1, 1, 2, 2, "UNK", "UNK", "UNK", 1, 2, 2, "UNK", "UNK"],
+        ),
+        ([1, 1, 3, 3, 4, 4], [1, 0, 3, 2, 4, 5]),
+        (["a", "b", "b", "c"], ["a", "b", "c", "c"]),
+    ],
+)
+def test_metrics_match_scikit_learn(y_true, y_pred):
+    """The confusion matrix based metrics give the same results as the scikit-learn
+    functions, which are still used when scikit-learn keyword arguments are passed"""
+    metrics_set = metrics.get_metrics_set({"y_true": y_true, "y_pred": y_pred})
+    y_true, y_pred = metrics.scrub_unknowns(y_true, y_pred, unk_vals=metrics.UNK_UNC)
+
+    for name in ["precision", "sensitivity", "f1_score"]:
+        expected = getattr(metrics, name)(y_true, y_pred, average="macro")
+        assert metrics_set[name].keys() == expected.keys()
+        for key, value in expected.items():
+            assert metrics_set[name][key] == pytest.approx(value)
+
+    assert metrics_set["positive_predictive_rate"] == metrics_set["precision"]
+    assert metrics_set["accuracy"] == pytest.approx(
+        100 * np.mean(np.array(y_true, dtype=object) == np.array(y_pred, dtype=object))
+    )
+
+
+def test_get_tp_fp_tn_fn():
+    assert metrics.get_tp_fp_tn_fn([1, 1, 1, 0, 0], [1, 0, 1, 0, 1], 1, 0) == (
+        2.0,
+        1.0,
+        1.0,
+        1.0,
+    )
+    assert np.isnan(metrics.get_tp_fp_tn_fn([2, 2], [2, 2], 1, 0)[0])
@@ -0,0 +1,88 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from engine.base.model_cache import ModelCache, get_model_key, get_model_size
+
+
+def test_get_model_key():
+    knowledgepack = SimpleNamespace(uuid="kp", last_modified=datetime(2024, 1, 1))
+    key = get_model_key(knowledgepack)
+
+    assert get_model_key(knowledgepack, {"distance_mode": "lsup"}) != key
+
+    knowledgepack.last_modified = datetime(2024, 1, 2)
+    assert get_model_key(knowledgepack) != key
+
+    # knowledgepacks that are not saved are never cached
+    knowledgepack.last_modified = None
+    assert get_model_key(knowledgepack) is None
+
+
+def test_model_cache(settings):
+    settings.MODEL_CACHE_MAX_SIZE = 1
+    model_cache = ModelCache()
+    size = get_model_size([{"Vector": [0] * 1000}])
+
+    model_cache.put(("first", "1", None), "first model", size)
+    model_cache.put(("second", "1", None), "second model", size)
+    assert model_cache.get(("first", "1", None)) == "first model"
+    assert model_cache.get(("first", "2", None)) is None
+
+    # a new version of a knowledgepack replaces the cached one
+    model_cache.put(("first", "2", None), "updated model", size)
+    assert model_cache.get(("first", "1", None)) is None
+    assert len(model_cache) == 2
+
+    # least recently used models are evicted first
+    model_cache.get(("second", "1", None))
+    model_cache.put(("third", "1", None), "third model", 1024 * 1024 - 2 * size)
+    model_cache.put(("fourth", "1", None), "fourth model", size)
+    assert model_cache.get(("first", "2", None)) is None
+    assert model_cache.get(("second", "1", None)) == "second model"
+    assert model_cache.size <= 1024 * 1024
+
+    assert not model_cache.put(("large", "1", None), "large model", 2 * 1024 * 1024)
+
+    settings.MODEL_CACHE_MAX_SIZE = 0
+    assert model_cache.get(("second", "1", None)) is None
+
+
+def test_model_cache_lock(settings):
+    settings.MODEL_CACHE_MAX_SIZE = 1
+    model_cache = ModelCache()
+    lock = threading.Lock()
+
+    assert model_cache.get_with_lock(("first", "1", None)) == (None, None)
+
+    model_cache.put(("first", "1", None), "first model", 1, lock)
+    model_cache.put(("second", "1", None), "second model", 1)
+    assert model_cache.get_with_lock(("first", "1", None)) == ("first model", lock)
+
+    # every cached classifier is guarded by its own lock
+    _, second_lock = model_cache.get_with_lock(("second", "1", None))
+    assert second_lock is not None and second_lock is not lock
+
+
+def test_get_model_size():
+    assert get_model_size([{"Vector": [1, 2]}]) == len('[{"Vector": [1, 2]}]')
+    assert get_model_size({"tflite": "00" * 1000, "tensor_arena_size": 4096}) == 5096
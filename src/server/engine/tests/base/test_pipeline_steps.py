@@ -20,6 +20,8 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 # coding=utf-8
 import logging
 import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 
 import pytest
 from datamanager.models import TeamMember
@@ -174,3 +176,96 @@ def test_pipeline_step(test_project_simple):
     assert result_set == expected_result
 
     print(result_set)
+
+
+class TimedJobResult(object):
+    """A job result that becomes ready duration seconds after it was submitted"""
+
+    backend = SimpleNamespace(is_async=False)
+
+    def __init__(self, step):
+        self.task_id = step["name"]
+        self.step = step
+        self.done = time.time() + step["inputs"]["sleep_time"]
+        self.date_done = None
+
+    def ready(self):
+        if self.date_done is None and time.time() >= self.done:
+            self.date_done = datetime.now(timezone.utc)
+
+        return self.date_done is not None
+
+
+def test_parallel_pipeline_step_refills_window(monkeypatch):
+    submitted = []
+
+    def submit_pipeline_step_job(step):
+        submitted.append((step["name"], time.time()))
+        return TimedJobResult(step)
+
+    monkeypatch.setattr(
+        pipeline_steps,
+        "get_pipeline_step_job",
+        lambda func, step, *args, **kwargs: step,
+    )
+    monkeypatch.setattr(
+        pipeline_steps, "submit_pipeline_step_job", submit_pipeline_step_job
+    )
+    monkeypatch.setattr(
+        pipeline_steps,
+        "collect_pipeline_step_job",
+        lambda result: (result.step["name"], time.time()),
+    )
+    monkeypatch.setattr(pipeline_steps, "set_pipeline_subtask_ids", lambda *args: None)
+    monkeypatch.setattr(
+        pipeline_steps, "remove_pipeline_subtask_ids", lambda *args: None
+    )
+
+    sleep_times = [1.0, 0.05, 0.05, 0.05, 0.05]
+    steps = []
+    for index, sleep_time in enumerate(sleep_times):
+        step = get_template(sleep_time)
+        step["name"] = index
+        steps.append(step)
+
+    finished = []
+    result_set = pipeline_steps.parallel_pipeline_step(
+        sleep_func,
+        steps,
+        None,
+        None,
+        None,
+        None,
+        max_batch_size=2,
+        on_job_finished=lambda index, result: finished.append(index),
+    )
+
+    assert [name for name, _ in result_set] == [0, 1, 2, 3, 4]
+
+    # the fast jobs run one after another next to the slow job
+    assert finished == [1, 2, 3, 4, 0]
+    slow_job_done = result_set[0][1]
+    assert all(submit_time < slow_job_done for _, submit_time in submitted)
+    assert result_set[4][1] < slow_job_done
+
+
+def test_get_completion_lag():
+    now = datetime.now(timezone.utc)
+
+    assert pipeline_steps.get_completion_lag(SimpleNamespace(date_done=None)) is None
+
+    lag = pipeline_steps.get_completion_lag(
+        SimpleNamespace(date_done=now - timedelta(seconds=10))
+    )
+    assert 10 <= lag < 20
+
+    # naive datetimes are in UTC
+    lag = pipeline_steps.get_completion_lag(
+        SimpleNamespace(date_done=(now - timedelta(seconds=10)).replace(tzinfo=None))
+    )
+    assert 10 <= lag < 20
+
+    lag = pipeline_steps.get_completion_lag(
+        SimpleNamespace(date_done=now + timedelta(seconds=10))
+    )
+    assert lag == 0.0
@@ -0,0 +1,167 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+
+import pytest
+from datamanager.datastore import DataProjection, get_datastore
+from engine.base.step_cache import StepCache, get_step_key
+from pandas import DataFrame
+
+STEP = {
+    "name": "Windowing",
+    "type": "segmenter",
+    "inputs": {"input_data": "temp.raw", "window_size": 100, "delta": 100},
+    "outputs": ["temp.Windowing0", "temp.features.Windowing0"],
+}
+
+
+def write_files(folder, names):
+    os.makedirs(folder, exist_ok=True)
+    for name in names:
+        with open(os.path.join(folder, name), "w") as fid:
+            fid.write(name)
+
+
+@pytest.mark.django_db
+def test_get_step_key():
+    key = get_step_key(STEP, None)
+
+    renamed = dict(STEP)
+    renamed["inputs"] = dict(STEP["inputs"], input_data="temp.other")
+    renamed["outputs"] = ["temp.Windowing3", "temp.features.Windowing3"]
+    assert get_step_key(renamed, None) == key
+
+    changed = dict(STEP)
+    changed["inputs"] = dict(STEP["inputs"], window_size=200)
+    assert get_step_key(changed, None) != key
+
+    assert get_step_key(STEP, "input") != key
+
+
+def test_step_cache_save_restore(settings, tmp_path):
+    settings.SERVER_STEP_CACHE_ROOT = str(tmp_path / "stepcache")
+    settings.STEP_CACHE_MAX_SIZE = 100
+    sandbox_a = str(tmp_path / "a")
+    sandbox_b = str(tmp_path / "b")
+
+    result_names = [
+        {"filename": "temp.Windowing0.data_0.pkl", "total": 10},
+        {"filename": "temp.Windowing0.data_1.pkl", "total": 5},
+    ]
+    write_files(
+        sandbox_a,
+        [
+            "temp.Windowing0.data_0.pkl",
+            "temp.Windowing0.data_1.pkl",
+            "temp.features.Windowing0.csv.gz",
+        ],
+    )
+
+    step_cache = StepCache("project")
+    assert step_cache.save(
+        "key",
+        STEP,
+        sandbox_a,
+        result_names,
+        feature_table="temp.features.Windowing0.csv.gz",
+        persistent_variables={
+            "persist.Windowing0.params": {"a": 1},
+            "persist.Other0.params": {"b": 2},
+        },
+    )
+    assert not step_cache.save("key", STEP, sandbox_a, result_names)
+
+    step = dict(STEP, outputs=["temp.Windowing2", "temp.features.Windowing2"])
+    os.makedirs(sandbox_b)
+    restored = step_cache.restore("key", step, sandbox_b)
+
+    assert restored["result_names"] == [
+        {"filename": "temp.Windowing2.data_0.pkl", "total": 10},
+        {"filename": "temp.Windowing2.data_1.pkl", "total": 5},
+    ]
+    assert restored["feature_table"] == "temp.features.Windowing2.csv.gz"
+    assert restored["persistent_variables"] == {"persist.Windowing2.params": {"a": 1}}
+    assert sorted(os.listdir(sandbox_b)) == [
+        "temp.Windowing2.data_0.pkl",
+        "temp.Windowing2.data_1.pkl",
+        "temp.features.Windowing2.csv.gz",
+    ]
+
+    assert step_cache.restore("missing", step, sandbox_b) is None
+
+
+def test_step_cache_restore_projection(settings, tmp_path):
+    settings.SERVER_STEP_CACHE_ROOT = str(tmp_path / "stepcache")
+    settings.STEP_CACHE_MAX_SIZE = 100
+    settings.CACHE_FILE_FORMAT = "npz"
+    sandbox_a = str(tmp_path / "a")
+    sandbox_b = str(tmp_path / "b")
+    os.makedirs(sandbox_a)
+    os.makedirs(sandbox_b)
+
+    datastore = get_datastore()
+    features = DataFrame({"gen_0001_mean": [1.0, 2.0], "Label": ["a", "b"]})
+    datastore.save_data(
+        features, os.path.join(sandbox_a, "temp.generator_set0.csv.gz"), ".npz"
+    )
+    datastore.save_data(
+        DataProjection(
+            os.path.join(sandbox_a, "temp.generator_set0.csv.gz"), ["Label"]
+        ),
+        os.path.join(sandbox_a, "temp.selector_set0.csv.gz"),
+        ".npz.projection",
+    )
+
+    step = {
+        "name": "selectorset",
+        "type": "selectorset",
+        "outputs": ["temp.selector_set0", "temp.features.selector_set0"],
+    }
+    step_cache = StepCache("project")
+    assert step_cache.save("key", step, sandbox_a, ["temp.selector_set0.csv.gz"])
+
+    # the entry holds the selected columns, not a reference to the first pipeline
+    shutil.rmtree(sandbox_a)
+    step = dict(step, outputs=["temp.selector_set2", "temp.features.selector_set2"])
+    restored = step_cache.restore("key", step, sandbox_b)
+
+    assert restored["result_names"] == ["temp.selector_set2.csv.gz"]
+    assert datastore.get_data(
+        os.path.join(sandbox_b, "temp.selector_set2.csv.gz")
+    ).equals(features[["Label"]])
+
+
+def test_step_cache_evict(settings, tmp_path):
+    settings.SERVER_STEP_CACHE_ROOT = str(tmp_path / "stepcache")
+    settings.STEP_CACHE_MAX_SIZE = 100
+    sandbox = str(tmp_path / "sandbox")
+    write_files(sandbox, ["temp.Windowing0.data_0.pkl"])
+
+    step_cache = StepCache("project")
+    root = os.path.join(settings.SERVER_STEP_CACHE_ROOT, "project")
+    for last_used, key in enumerate(["second", "third", "first"]):
+        step_cache.save(key, STEP, sandbox, ["temp.Windowing0.data_0.pkl"])
+        os.utime(os.path.join(root, key, "manifest.json"), (last_used, last_used))
+
+    total_size = step_cache.evict(max_size=1024)
+    step_cache.evict(max_size=total_size * 2 / 3 / (1024 * 1024))
+
+    assert sorted(os.listdir(root)) == ["first", "third"]
@@ -0,0 +1,59 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+from engine.base.utils import (
+    TRANSFORM_CACHE_VERSION_KEY,
+    get_transform,
+    get_transform_cache_redis,
+)
+from library.models import Transform
+
+
+@pytest.mark.django_db
+def test_get_transform(django_assert_num_queries):
+    Transform.objects.create(name="Memoized Transform", function_in_file="a")
+
+    with django_assert_num_queries(1):
+        transform = get_transform(name="Memoized Transform")
+        assert get_transform(name="Memoized Transform") is transform
+        assert transform.library_pack is None
+
+    transform.function_in_file = "b"
+    transform.save()
+
+    with django_assert_num_queries(1):
+        assert get_transform(name="Memoized Transform").function_in_file == "b"
+
+    with pytest.raises(Transform.DoesNotExist):
+        get_transform(name="Missing Transform")
+
+
+@pytest.mark.django_db
+def test_get_transform_changed_by_another_worker(settings):
+    Transform.objects.create(name="Memoized Transform", function_in_file="a")
+    assert get_transform(name="Memoized Transform").function_in_file == "a"
+
+    # another worker saves the transform, only the shared version changes here
+    Transform.objects.filter(name="Memoized Transform").update(function_in_file="b")
+    get_transform_cache_redis().incr(TRANSFORM_CACHE_VERSION_KEY)
+    assert get_transform(name="Memoized Transform").function_in_file == "a"
+
+    settings.TRANSFORM_CACHE_TIMEOUT = 0
+    assert get_transform(name="Memoized Transform").function_in_file == "b"
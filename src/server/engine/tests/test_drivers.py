@@ -18,8 +18,11 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import numpy as np
+import pandas as pd
 import pytest
 from engine.drivers import (
+    apply_tvo_fidelity,
+    assemble_feature_matrix,
     generate_features,
     segment_function_caller,
 )
@@ -404,6 +407,51 @@ def test_generate_features():
     assert res[0].shape[1] == 23
 
 
+def test_assemble_feature_matrix():
+    from pandas import DataFrame, merge
+
+    group_columns = ["Labels", "SegmentID"]
+    metadata = DataFrame({"Labels": ["a", "b", "a"], "SegmentID": [0, 1, 2]})
+
+    first = DataFrame({"gen_0001_mean": np.array([1, 2, 3], dtype=np.float32)})
+    first = first.join(metadata)
+    second = metadata.join(
+        DataFrame(
+            {
+                "gen_0002_min": np.array([4, 5, 6], dtype=np.float32),
+                "gen_0002_max": np.array([7, 8, 9], dtype=np.float32),
+            }
+        )
+    )
+
+    expected = merge(first, second, on=group_columns)
+    result = assemble_feature_matrix([first, second], group_columns)
+
+    assert result.equals(expected)
+
+    # generators that did not produce a row for every segment are joined instead
+    expected = merge(first, second.iloc[[2, 0]], on=group_columns)
+    result = assemble_feature_matrix(
+        [first, second.iloc[[2, 0]].reset_index(drop=True)], group_columns
+    )
+
+    assert result.equals(expected)
+    assert assemble_feature_matrix([], group_columns).empty
+
+    # features of other types keep their type, as do the group columns
+    third = metadata.join(DataFrame({"gen_0003_count": np.array([1, 0, 2])}))
+    third.index = [5, 6, 7]
+    expected = merge(merge(first, second, on=group_columns), third, on=group_columns)
+    result = assemble_feature_matrix(
+        [first.set_axis([5, 6, 7]), second.set_axis([5, 6, 7]), third],
+        group_columns,
+    )
+
+    assert result.equals(expected)
+    assert result["gen_0003_count"].dtype == np.int64
+    assert result["SegmentID"].dtype == np.int64
+
+
 @pytest.mark.django_db
 def test_segment_caller():
     Transform.objects.create(
@@ -450,3 +498,29 @@ def test_segment_caller():
     )
 
     assert res == ([[100, 149]], None)
+
+
+def test_apply_tvo_fidelity():
+    input_data = pd.DataFrame(
+        {"gen_0001": np.arange(100), "Label": ["A"] * 80 + ["B"] * 16 + ["C"] * 4}
+    )
+    tvo_config = {"label_column": "Label", "number_of_folds": 3}
+
+    sample = apply_tvo_fidelity(
+        tvo_config, input_data, {"sample_size": 0.25, "number_of_folds": 2}
+    )
+
+    assert tvo_config["number_of_folds"] == 2
+    assert sample["Label"].value_counts().to_dict() == {"A": 20, "B": 4, "C": 2}
+    assert sample.index.tolist() == list(range(26))
+    assert sample["gen_0001"].is_monotonic_increasing
+    assert (
+        input_data.set_index("gen_0001").loc[sample["gen_0001"], "Label"].tolist()
+        == sample["Label"].tolist()
+    )
+
+    # the subsample does not change between evaluations
+    assert sample.equals(
+        apply_tvo_fidelity(tvo_config, input_data, {"sample_size": 0.25})
+    )
+    assert apply_tvo_fidelity(tvo_config, input_data, {}) is input_data
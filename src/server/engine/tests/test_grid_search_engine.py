@@ -18,10 +18,12 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import unittest
+from types import SimpleNamespace
 
 import pytest
 
 from engine.gridsearchengine import (
+    GridSearchEngine,
     filter_update_dictionary,
     flatten_dictionary,
     get_permutated_dictionary_arrays,
@@ -280,6 +282,149 @@ class TestGridSearchEngine:
         for row in expected_result:
             assert row in result
 
+    def test_prepare_grid_steps_shares_identical_steps(self):
+        grid_search = GridSearchEngine.__new__(GridSearchEngine)
+        grid_search.gridded_pipeline_steps = [{}]
+        grid_search.grid_nodes = [0]
+
+        segmenter = {
+            "name": "Windowing",
+            "type": "segmenter",
+            "inputs": {"input_data": "temp.raw", "window_size": 100},
+            "outputs": ["temp.Windowing0"],
+        }
+        temp_steps = grid_search.prepare_grid_steps(
+            {"window_size": [100, 200]}, segmenter, input_type=".pkl"
+        )
+        assert [step["inputs"]["window_size"] for step in temp_steps] == [100, 200]
+        assert grid_search.grid_nodes == [0, 1]
+
+        # Skewness is not in the set, so both of its values give the same step
+        generator_set = {
+            "name": "generator_set",
+            "type": "generatorset",
+            "inputs": {"input_data": "temp.Windowing0"},
+            "outputs": ["temp.generator_set0", "temp.features.generator_set0"],
+            "set": [{"function_name": "Mean", "inputs": {"columns": ["X"]}}],
+        }
+        temp_steps = grid_search.prepare_grid_steps(
+            {
+                "Mean": {"columns": [["X"], ["Y"]]},
+                "Skewness": {"columns": [["X"], ["Y"]]},
+            },
+            generator_set,
+            input_type=".pkl",
+        )
+        assert len(temp_steps) == 4
+        assert len(grid_search.gridded_pipeline_steps) == 8
+        assert grid_search.grid_nodes == [0, 0, 1, 1, 2, 2, 3, 3]
+        assert [step["inputs"]["input_data"] for step in temp_steps] == [
+            "temp.Windowing0.grid_0.pkl",
+            "temp.Windowing0.grid_0.pkl",
+            "temp.Windowing0.grid_1.pkl",
+            "temp.Windowing0.grid_1.pkl",
+        ]
+        assert temp_steps[3]["outputs"] == [
+            "temp.generator_set0.grid_3",
+            "temp.features.generator_set0.grid_3",
+        ]
+
+        # steps without grid parameters run once for each node
+        selector_set = {
+            "name": "selector_set",
+            "type": "selectorset",
+            "inputs": {
+                "input_data": "temp.generator_set0",
+                "feature_table": "temp.features.generator_set0",
+            },
+            "outputs": ["temp.selector_set0", "temp.features.selector_set0"],
+            "set": [],
+        }
+        temp_steps = grid_search.prepare_grid_steps(
+            None, selector_set, input_type=".csv.gz"
+        )
+        assert [step["inputs"]["feature_table"] for step in temp_steps] == [
+            "temp.features.generator_set0.grid_{}".format(i) for i in range(4)
+        ]
+        assert grid_search.grid_nodes == [0, 0, 1, 1, 2, 2, 3, 3]
+
+    def test_successive_halving_model_step(self):
+        grid_search = GridSearchEngine.__new__(GridSearchEngine)
+        grid_search._team_id = grid_search.project_id = grid_search.pipeline_id = None
+        grid_search._user = SimpleNamespace(id=None)
+        grid_search.fidelity_schedule = [{"sample_size": 0.25}, {"sample_size": 0.5}]
+        grid_search.promotion_rate = 0.5
+        grid_search.gridded_pipeline_steps = [{"k": k} for k in range(5)]
+        grid_search.grid_nodes = [0, 1, 2, 3, 3]
+
+        scores = {0: 0.2, 1: 0.9, 2: 0.5, 3: 0.7}
+        trained = []
+
+        def parallel_pipeline_step(func, steps, *args, **kwargs):
+            trained.append([(step["node"], step.get("fidelity")) for step in steps])
+            return [
+                (1, {"model_stats": {"metrics": [{"f1_score": scores[step["node"]]}]}})
+                for step in steps
+            ]
+
+        grid_search.parallel_pipeline_step = parallel_pipeline_step
+        temp_steps = [{"node": node} for node in range(4)]
+
+        results, fidelities = grid_search.successive_halving_model_step(
+            None, temp_steps, None
+        )
+
+        assert trained == [
+            [(0, {"sample_size": 0.25}), (1, {"sample_size": 0.25})]
+            + [(2, {"sample_size": 0.25}), (3, {"sample_size": 0.25})],
+            [(1, {"sample_size": 0.5}), (3, {"sample_size": 0.5})],
+            [(1, None)],
+        ]
+        assert fidelities == [0, 2, 0, 1]
+        assert "fidelity" not in temp_steps[1]
+        assert [result[0] for result in results] == [1, 1, 1, 1]
+
+        trace = grid_search.promotion_trace
+        assert list(trace["rung"].values()) == [0, 0, 0, 0, 0, 1, 1, 1, 2]
+        assert list(trace["k"].values()) == [0, 1, 2, 3, 4, 1, 3, 4, 1]
+        assert list(trace["promoted"].values()) == [
+            False,
+            True,
+            False,
+            True,
+            True,
+            True,
+            False,
+            False,
+            False,
+        ]
+
+        # a node failing at a higher rung keeps its lower rung result
+        def failing_parallel_pipeline_step(func, steps, *args, **kwargs):
+            return [
+                (
+                    (0, {"message": "failed"})
+                    if step["node"] == 1 and step.get("fidelity") is None
+                    else (
+                        1,
+                        {
+                            "model_stats": {
+                                "metrics": [{"f1_score": scores[step["node"]]}]
+                            }
+                        },
+                    )
+                )
+                for step in steps
+            ]
+
+        grid_search.parallel_pipeline_step = failing_parallel_pipeline_step
+        results, fidelities = grid_search.successive_halving_model_step(
+            None, temp_steps, None
+        )
+
+        assert fidelities == [0, 1, 0, 1]
+        assert results[1] == (1, {"model_stats": {"metrics": [{"f1_score": 0.9}]}})
+
 
 if __name__ == "__main__":
     unittest.main()
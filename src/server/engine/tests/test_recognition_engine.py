@@ -18,6 +18,7 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import os
+from datetime import datetime
 
 import pandas as pd
 import pytest
@@ -25,6 +26,7 @@ from datamanager.models import KnowledgePack, User
 from library.classifiers.classifiers import get_classifier
 from library.model_generators.model_generators import get_model_generator
 from library.model_validation.validation_methods import get_validation_method
+from engine.base.model_cache import model_cache
 from engine.recognitionengine import RecognitionEngine
 from numpy import array
 
@@ -225,3 +227,51 @@ class TestLSup:
         assert ground_truth == predictions
         assert 1 == self.model_generator._classifier.pme_classifiers[0].norm_mode
         assert 1, reco_engine.kbe.get_distance_mode()
+
+
+def test_recognize_after_loading_another_pme_model(settings, knowledgepack):
+    """libpmeclassifier keeps one pattern database per process, a PME model loaded
+    later must not change the results of the classifiers loaded before it."""
+    settings.MODEL_CACHE_MAX_SIZE = 500
+    model_cache.clear()
+    user = User.objects.get(email="unittest@piccolo.com")
+    config = {"classification_mode": "rbf", "distance_mode": "l1"}
+    vectors = array([[50, 14], [74, 64]])
+
+    knowledgepack.last_modified = datetime(2024, 1, 1)
+    other_knowledgepack = KnowledgePack(
+        last_modified=datetime(2024, 1, 1),
+        pipeline_summary=knowledgepack.pipeline_summary,
+        class_map=knowledgepack.class_map,
+        neuron_array=[
+            {
+                "AIF": 20,
+                "Category": 1 + index % 2,
+                "Context": 1,
+                "Identifier": index + 1,
+                "Vector": [(5 * index) % 256, (50 + 3 * index) % 256],
+            }
+            for index in range(20)
+        ],
+    )
+
+    engine = RecognitionEngine(
+        None, user, None, None, config=config, knowledgepack=knowledgepack
+    )
+    result, _ = engine.reco_feature_vectors(vectors)
+    assert result.predictions.tolist() == [3, 2]
+
+    RecognitionEngine(
+        None, user, None, None, config=config, knowledgepack=other_knowledgepack
+    ).reco_feature_vectors(vectors)
+
+    result, _ = engine.reco_feature_vectors(vectors)
+    assert result.predictions.tolist() == [3, 2]
+
+    # the cached classifier of the first model still recognizes with its patterns
+    cached_engine = RecognitionEngine(
+        None, user, None, None, config=config, knowledgepack=knowledgepack
+    )
+    assert cached_engine.classifier is engine.classifier
+    result, _ = cached_engine.reco_feature_vectors(vectors)
+    assert result.predictions.tolist() == [3, 2]
@@ -20,9 +20,10 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 import ctypes
 import os
 
+import numpy as np
 from django.conf import settings
 from django.forms.models import model_to_dict
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
 from library.models import FunctionCost
 
 
@@ -80,9 +81,7 @@ class Bonsai(Classifier):
 
         self.model_parameters = model_parameters
 
-    def recognize_vectors(
-        self, vectors_to_recognize, model_parameters=None, include_predictions=False
-    ):
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
         uint8_t = ctypes.c_ubyte
 
         if model_parameters is None:
@@ -90,28 +89,27 @@ class Bonsai(Classifier):
 
         bonsai, _ = get_bonsai_c_struct(model_parameters)
 
-        num_features = len(vectors_to_recognize[0]["Vector"])
+        feature_vectors = np.asarray(feature_vectors)
+        num_features = feature_vectors.shape[-1]
 
         feature_vector_c_array = (uint8_t * num_features)()
+        y_pred = np.zeros(len(feature_vectors), dtype=int)
 
-        for index, feature_vector in enumerate(vectors_to_recognize):
+        for index, feature_vector in enumerate(feature_vectors.tolist()):
 
-            for i, feature in enumerate(feature_vector["Vector"]):
+            for i, feature in enumerate(feature_vector):
                 feature_vector_c_array[i] = uint8_t(feature)
                 if i < model_parameters["num_features"]:
                     bonsai.X[i] = ctypes.c_float(feature)
 
                 bonsai.X[model_parameters["num_features"] - 1] = ctypes.c_float(1)
 
-            y_pred = self.__predict(bonsai, feature_vector_c_array)
+            y_pred[index] = self.__predict(bonsai, feature_vector_c_array)
 
-            vectors_to_recognize[index]["CategoryVector"] = int(y_pred)
-            vectors_to_recognize[index]["DistanceVector"] = [0]
-
-        return self._compute_classification_statistics(
-            range(1, model_parameters["num_classes"] + 1),
-            vectors_to_recognize,
-            include_predictions=include_predictions,
+        return RecognitionResult(
+            y_pred,
+            classes=range(1, model_parameters["num_classes"] + 1),
+            num_features=num_features,
         )
 
     def compute_cost(self, model_parameters):
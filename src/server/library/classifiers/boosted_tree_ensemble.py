@@ -24,10 +24,14 @@ from ctypes import CDLL
 import numpy as np
 from django.conf import settings
 from django.forms.models import model_to_dict
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
+from library.classifiers.decision_tree_ensemble import get_traversal_children
 from library.models import FunctionCost
 from pandas import DataFrame
 
+# Number of (feature vector, tree) pairs traversed at a time
+TREE_BLOCK_SIZE = 2**20
+
 
 class struct_boosted_tree(ctypes.Structure):
     __slots__ = ["node_list", "leafs", "threshold", "features"]
@@ -67,57 +71,31 @@ class BoostedTreeEnsemble(Classifier):
             save_model_parameters=save_model_parameters, config=config
         )
 
-        clf_lib = CDLL(os.path.join(settings.CLASSIFIER_LIBS, "libgbtclassifiers.so"))
-
-        uint8_t = ctypes.c_ubyte
-        self.__predict = clf_lib.boosted_tree_ensemble_classification
-
-        self.__predict.argtypes = [
-            ctypes.POINTER(struct_boosted_tree),
-            uint8_t,
-            ctypes.POINTER(uint8_t),
-        ]
-        self.__predict.restype = uint8_t
+        self._tree_ensemble = None
 
     def load_model(self, model_parameters):
 
         self.model_parameters = model_parameters
+        self._tree_ensemble = FlatBoostedTreeEnsemble(model_parameters)
 
-    def recognize_vectors(
-        self, vectors_to_recognize, model_parameters=None, include_predictions=False
-    ):
-        uint8_t = ctypes.c_ubyte
-
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
         if model_parameters is None:
             model_parameters = self.model_parameters
 
-        gb_tree_ensemble, number_of_trees = get_tree_ensemble_c_struct(model_parameters)
-
-        num_features = len(vectors_to_recognize[0]["Vector"])
-
-        num_classes = 2  # currently binary
-
-        number_of_trees = uint8_t(number_of_trees)
-        feature_vector_c_array = (uint8_t * num_features)()
-
-        for index, feature_vector in enumerate(vectors_to_recognize):
-
-            for i, feature in enumerate(feature_vector["Vector"]):
-                feature_vector_c_array[i] = uint8_t(feature)
-
-            y_pred = self.__predict(
-                ctypes.cast(gb_tree_ensemble, ctypes.POINTER(struct_boosted_tree)),
-                number_of_trees,
-                feature_vector_c_array,
-            )
+        if (
+            self._tree_ensemble is not None
+            and model_parameters is self._tree_ensemble.model_parameters
+        ):
+            tree_ensemble = self._tree_ensemble
+        else:
+            tree_ensemble = FlatBoostedTreeEnsemble(model_parameters)
 
-            vectors_to_recognize[index]["CategoryVector"] = int(
-                y_pred
-            )  # shift categories by 1
-            vectors_to_recognize[index]["DistanceVector"] = [0]
+        feature_vectors = np.asarray(feature_vectors)
 
-        return self._compute_classification_statistics(
-            [1, 2], vectors_to_recognize, include_predictions=include_predictions
+        return RecognitionResult(
+            tree_ensemble.classify(feature_vectors),
+            classes=[1, 2],
+            num_features=feature_vectors.shape[-1],
         )
 
     def compute_cost(self, model_parameters):
@@ -199,6 +177,145 @@ def get_tree_ensemble_c_struct(model_parameters):
     return tree_ensemble, len(models)
 
 
+def boosted_tree_ensemble_classification(model_parameters, feature_vectors):
+    """Classifies feature vectors one at a time with
+    boosted_tree_ensemble_classification from libgbtclassifiers.so, the reference for
+    FlatBoostedTreeEnsemble.classify."""
+    uint8_t = ctypes.c_ubyte
+
+    clf_lib = CDLL(os.path.join(settings.CLASSIFIER_LIBS, "libgbtclassifiers.so"))
+
+    predict = clf_lib.boosted_tree_ensemble_classification
+    predict.argtypes = [
+        ctypes.POINTER(struct_boosted_tree),
+        uint8_t,
+        ctypes.POINTER(uint8_t),
+    ]
+    predict.restype = uint8_t
+
+    gb_tree_ensemble, number_of_trees = get_tree_ensemble_c_struct(model_parameters)
+
+    number_of_trees = uint8_t(number_of_trees)
+
+    y_pred = []
+    for feature_vector in feature_vectors:
+        feature_vector_c_array = (uint8_t * len(feature_vector))()
+
+        for i, feature in enumerate(feature_vector):
+            feature_vector_c_array[i] = uint8_t(feature)
+
+        y_pred.append(
+            predict(
+                ctypes.cast(gb_tree_ensemble, ctypes.POINTER(struct_boosted_tree)),
+                number_of_trees,
+                feature_vector_c_array,
+            )
+        )
+
+    return np.array(y_pred, dtype=np.uint8)
+
+
+class FlatBoostedTreeEnsemble(object):
+    """Boosted tree ensemble compiled into flat numpy node arrays.
+
+    The nodes of every tree are concatenated, so all trees of a block of feature
+    vectors are traversed together, one level per step, with the same comparisons
+    and leaf test as boosted_tree_classification in boosted_tree_ensemble.c. The leaf
+    values are summed tree by tree in float32 like the C margin.
+    """
+
+    def __init__(self, model_parameters):
+        self.model_parameters = model_parameters
+
+        models = get_tree_ensemble(model_parameters)
+
+        # the model is stored with the types of the boosted_tree_t struct of the C
+        # library
+        node_lists = [
+            np.asarray(model.node_list, dtype=np.int64).astype(np.uint8)
+            for model in models
+        ]
+        features = [
+            np.asarray(model.features, dtype=np.int64).astype(np.uint8)
+            for model in models
+        ]
+        leafs = [np.asarray(model.leafs, dtype=np.float32) for model in models]
+
+        sizes = [len(node_list) for node_list in node_lists]
+        offsets = np.cumsum([0] + sizes[:-1]).astype(np.int64)
+
+        self.roots = offsets
+        self.node_list = np.concatenate(node_lists)
+        self.is_leaf = self.node_list == 0
+        self.threshold = np.concatenate(
+            [
+                np.asarray(model.threshold, dtype=np.int64).astype(np.uint8)
+                for model in models
+            ]
+        )
+        self.features = np.concatenate(features)
+        self.split_features = self.features.astype(np.intp)
+
+        # value of every node when it is reached as a leaf, the features of leaf
+        # nodes index the leaf values of their tree
+        self.leafs = np.concatenate(
+            [
+                np.take(leaf, feature, mode="clip")
+                for feature, leaf in zip(features, leafs)
+            ]
+        )
+
+        # the "yes" child of a node is followed by its "no" child
+        yes_children = np.repeat(offsets, sizes) + self.node_list
+        self.root_children, self.children = get_traversal_children(
+            np.stack([yes_children, yes_children + 1], axis=1), self.is_leaf
+        )
+
+    def traverse(self, feature_vectors):
+        """Returns the leaf reached in every tree by every feature vector, as an array
+        of shape (number of vectors, number of trees)."""
+        nodes = np.broadcast_to(self.roots, (len(feature_vectors), len(self.roots)))
+
+        def step(children, nodes):
+            go_right = (
+                np.take_along_axis(feature_vectors, self.split_features[nodes], axis=1)
+                > self.threshold[nodes]
+            )
+            return children[2 * nodes + go_right]
+
+        nodes = step(self.root_children, nodes)
+        while not self.is_leaf[nodes].all():
+            nodes = step(self.children, nodes)
+
+        return nodes
+
+    def classify(self, feature_vectors):
+        """Returns 1 for the feature vectors with a margin <= 0 and 2 otherwise."""
+        feature_vectors = np.asarray(feature_vectors)
+        num_vectors = len(feature_vectors)
+        if num_vectors == 0:
+            return np.zeros(0, dtype=np.uint8)
+
+        # features are passed to the C library as uint8
+        feature_vectors = feature_vectors.astype(np.uint8)
+
+        num_trees = len(self.roots)
+
+        y_pred = np.zeros(num_vectors, dtype=np.uint8)
+        block_size = max(1, TREE_BLOCK_SIZE // num_trees)
+        for start in range(0, num_vectors, block_size):
+            end = min(start + block_size, num_vectors)
+
+            leafs = self.leafs[self.traverse(feature_vectors[start:end])]
+            margin = np.zeros(end - start, dtype=np.float32)
+            for tree in range(num_trees):
+                margin += leafs[:, tree]
+
+            y_pred[start:end] = np.where(margin <= 0, 1, 2)
+
+        return y_pred
+
+
 # python implementation
 
 
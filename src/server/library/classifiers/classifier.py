@@ -18,7 +18,9 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 from abc import abstractmethod
+from collections import Counter
 
+import numpy as np
 from engine.base.calculate_statistics import StatsCalc
 from numpy import dtype
 from pandas import DataFrame
@@ -45,6 +47,101 @@ class NoFeaturesError(Exception):
     pass
 
 
+class RecognitionResult(object):
+    """Results of recognizing a matrix of feature vectors.
+
+    Attributes:
+        categories: array with the recognized category of every feature vector (0
+            when unknown), or the predicted values for regression models. Classifiers
+            that return several responses per vector (PME) have one column per
+            response, the first one is the recognized category.
+        distances: array with the distance or output vector of every feature vector
+        ids: array with the ids of the patterns that gave the responses (PME), or None
+        classes: categories the model recognizes, used for the classification metrics
+        num_features: number of features of the feature vectors
+        regression: True when categories holds the predicted values of a regression
+    """
+
+    def __init__(
+        self,
+        categories,
+        distances=None,
+        ids=None,
+        classes=None,
+        num_features=0,
+        regression=False,
+    ):
+        self.categories = np.asarray(categories)
+        self.distances = (
+            np.asarray(distances)
+            if distances is not None
+            else np.zeros((len(self.categories), 1), dtype=int)
+        )
+        self.ids = np.asarray(ids) if ids is not None else None
+        self.classes = list(classes) if classes is not None else []
+        self.num_features = num_features
+        self.regression = regression
+
+    def __len__(self):
+        return len(self.categories)
+
+    @property
+    def predictions(self):
+        """Recognized category, or predicted value, of every feature vector."""
+        if not self.regression and self.categories.ndim > 1:
+            return self.categories[:, 0]
+
+        return self.categories
+
+    def to_vector_dicts(self, desired_responses=None):
+        """Returns the results in the list of dictionaries format of the REST API.
+
+        Args:
+            desired_responses: number of responses to return for every feature vector
+                when the classifier returns several responses per vector (PME)
+        """
+        categories = self.categories.tolist()
+        distances = self.distances.tolist()
+        ids = self.ids.tolist() if self.ids is not None else None
+
+        vectors = [
+            {
+                "CategoryVector": categories[index],
+                "DistanceVector": distances[index],
+                "NIDVector": ids[index] if ids is not None else [],
+            }
+            for index in range(len(categories))
+        ]
+
+        if (
+            desired_responses is not None
+            and self.categories.ndim > 1
+            and not self.regression
+        ):
+            for vector, responses in zip(vectors, desired_responses):
+                for key in ["CategoryVector", "DistanceVector", "NIDVector"]:
+                    vector[key] = vector[key][:responses]
+
+        return vectors
+
+    def update_vector_dicts(self, vectors):
+        """Writes the results into the list of dictionaries the feature vectors were
+        read from."""
+        results = self.to_vector_dicts(
+            [vector.get("DesiredResponses", 1) for vector in vectors]
+        )
+        for vector, result in zip(vectors, results):
+            vector["CategoryVector"] = result["CategoryVector"]
+            vector["DistanceVector"] = result["DistanceVector"]
+            if self.ids is not None:
+                vector["NIDVector"] = result["NIDVector"]
+
+
+def get_feature_matrix(vectors):
+    """Returns the feature vectors of a list of dictionaries as a matrix."""
+    return np.asarray([vector["Vector"] for vector in vectors])
+
+
 class Classifier(object):
     """
     A base class for classifier objects.
@@ -100,10 +197,42 @@ class Classifier(object):
     def load_model(self, model_parameters):
         """load a trained model intot he classfier"""
 
+    @abstractmethod
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
+        """recognize a matrix of feature vectors, returns a RecognitionResult.
+        desired_responses is only used by classifiers that return several responses
+        per vector"""
+
     def recognize_vectors(
         self, vectors_to_recognize, model_parameters=None, include_predictions=False
     ):
-        """recognize multiple feature vectors"""
+        """recognize multiple feature vectors in the list of dictionaries format, the
+        results are written into the dictionaries"""
+        result = self.recognize(
+            get_feature_matrix(vectors_to_recognize), model_parameters=model_parameters
+        )
+        result.update_vector_dicts(vectors_to_recognize)
+
+        return self.compute_statistics(
+            result,
+            [vector["Category"] for vector in vectors_to_recognize],
+            include_predictions=include_predictions,
+        )
+
+    def compute_statistics(self, result, y_true, include_predictions=False):
+        """compute the metrics of a RecognitionResult against the true categories or
+        values of the feature vectors"""
+        if result.regression:
+            return self._regression_statistics(y_true, result.categories.tolist())
+
+        return self._classification_statistics(
+            result.classes,
+            y_true,
+            result.predictions.tolist(),
+            result.num_features,
+            distance_vectors=result.distances.tolist(),
+            include_predictions=include_predictions,
+        )
 
     def compute_cost(self, model_parameters):
         """compute the total bytes for this classifier"""
@@ -112,65 +241,52 @@ class Classifier(object):
     def _compute_classification_statistics(
         self, categories, recognized_vectors, include_predictions=False
     ):
-        unknown = 0
-        properclass = 0
-        improperclass = 0
-        actual_category_counts = {}
-        recognized_category_counts = {}  # based only on the first element in vector
-        confusion_matrix = {}
-        temp = {}
-        all_cats = set()
+        return self._classification_statistics(
+            categories,
+            [x["Category"] for x in recognized_vectors],
+            [x["CategoryVector"] for x in recognized_vectors],
+            len(recognized_vectors[0]["Vector"]),
+            distance_vectors=(
+                [x["DistanceVector"] for x in recognized_vectors]
+                if "DistanceVector" in recognized_vectors[0]
+                else None
+            ),
+            include_predictions=include_predictions,
+        )
+
+    def _classification_statistics(
+        self,
+        categories,
+        y_true,
+        y_pred,
+        num_features,
+        distance_vectors=None,
+        include_predictions=False,
+    ):
+        y_true = [int(x) for x in y_true]
+        y_pred = [int(x) for x in y_pred]
 
         # Create a confusion matrix
-        for v in categories:
-            all_cats.add(int(v))
-        for v in recognized_vectors:
-            all_cats.add(int(v["CategoryVector"]))
+        all_cats = set(int(v) for v in categories) | set(y_pred)
 
         # To avoid to create doubled UNK column
-        if 0 in all_cats:
-            all_cats.remove(0)
-
-        # remove the 0 from the all_cats
+        all_cats.discard(0)
         all_cats = sorted(all_cats)
 
-        for v in all_cats:
-            temp[v] = 0
-        temp["UNC"] = 0
-        temp["UNK"] = 0
-        for v in all_cats:
-            confusion_matrix[v] = dict(temp)
-
-        for v in recognized_vectors:
-            if v["CategoryVector"] == 0:
-                # Report unknowns
-                unknown = unknown + 1
-                confusion_matrix[int(v["Category"])]["UNK"] += 1
-            else:
-                confusion_matrix[int(v["Category"])][v["CategoryVector"]] += 1
-                if v["CategoryVector"] == int(v["Category"]):
-                    properclass += 1
-                else:
-                    improperclass += 1
-
-            if v["Category"] in actual_category_counts:
-                actual_category_counts[v["Category"]] = (
-                    actual_category_counts[v["Category"]] + 1
-                )
-            else:
-                actual_category_counts[v["Category"]] = 1
-
-            # These metrics are not too important yet, but might need to be updated for multiple firing neurons
-            if v["CategoryVector"] in recognized_category_counts:
-                recognized_category_counts[v["CategoryVector"]] = (
-                    recognized_category_counts[v["CategoryVector"]] + 1
-                )
-            else:
-                recognized_category_counts[v["CategoryVector"]] = 1
+        confusion_matrix = {}
+        for v in sorted(set(all_cats) | set(y_true)):
+            confusion_matrix[v] = dict.fromkeys(all_cats + ["UNC", "UNK"], 0)
 
-        # Gather truth and prediction values from recognized vectors
-        y_true = [int(x["Category"]) for x in recognized_vectors]
-        y_pred = [int(x["CategoryVector"]) for x in recognized_vectors]
+        for (actual, recognized), count in Counter(zip(y_true, y_pred)).items():
+            confusion_matrix[actual]["UNK" if recognized == 0 else recognized] += count
+
+        unknown = sum(row["UNK"] for row in confusion_matrix.values())
+        properclass = sum(row.get(v, 0) for v, row in confusion_matrix.items())
+        improperclass = len(y_pred) - unknown - properclass
+
+        actual_category_counts = dict(Counter(y_true))
+        # based only on the first element in vector
+        recognized_category_counts = dict(Counter(y_pred))
 
         # Calculate statistics from confusion matrix and y_true, y_pred
 
@@ -187,16 +303,16 @@ class Classifier(object):
         )
         stats_obj.calc_all_metrics()
         statistics = {
-            "UnknownPercent": 100 * float(unknown) / float(len(recognized_vectors)),
+            "UnknownPercent": 100 * float(unknown) / float(len(y_pred)),
             "ProperClassificationPercent": 100
             * float(properclass)
-            / float(len(recognized_vectors)),
+            / float(len(y_pred)),
             "ImproperClassificationPercent": 100
             * float(improperclass)
-            / float(len(recognized_vectors)),
-            "VectorInTestSet": len(recognized_vectors),
+            / float(len(y_pred)),
+            "VectorInTestSet": len(y_pred),
             # assumption is that they are all the same size
-            "FeaturesPerVector": len(recognized_vectors[0]["Vector"]),
+            "FeaturesPerVector": num_features,
             "ActualCategoryCounts": actual_category_counts,
             "RecognizedCategoryCounts": recognized_category_counts,
             "ConfusionMatrix": confusion_matrix,
@@ -213,15 +329,11 @@ class Classifier(object):
         }  # stats_obj.specificity if len(set(y_true)) > 1 else None}
 
         if include_predictions:
-            distance_vector = None
-            if "DistanceVector" in recognized_vectors[0]:
-                distance_vector = [x["DistanceVector"] for x in recognized_vectors]
-
             statistics.update(
                 {
                     "y_true": y_true,
                     "y_pred": y_pred,
-                    "DistanceVector": distance_vector,
+                    "DistanceVector": distance_vectors,
                 }
             )
 
@@ -229,9 +341,12 @@ class Classifier(object):
 
     def _compute_regression_statistics(self, recognized_vectors):
         # Gather truth and prediction values from recognized vectors
-        y_true = [x["Category"] for x in recognized_vectors]
-        y_pred = [x["CategoryVector"] for x in recognized_vectors]
+        return self._regression_statistics(
+            [x["Category"] for x in recognized_vectors],
+            [x["CategoryVector"] for x in recognized_vectors],
+        )
 
+    def _regression_statistics(self, y_true, y_pred):
         statistics = {
             # assumption is that they are all the same size
             "y_true": y_true,
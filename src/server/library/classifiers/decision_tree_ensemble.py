@@ -21,13 +21,17 @@ import ctypes
 import os
 from ctypes import CDLL
 
+import numpy as np
 from django.conf import settings
 from django.forms.models import model_to_dict
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
 from library.models import FunctionCost
 from numpy import dtype
 from pandas import DataFrame
 
+# Number of (feature vector, tree) pairs traversed at a time
+TREE_BLOCK_SIZE = 2**20
+
 
 class struct_tree(ctypes.Structure):
     __slots__ = ["left_children", "right_children", "threshold", "features"]
@@ -61,6 +65,13 @@ class DecisionTreeEnsemble(Classifier):
     Uses SCIKIT learn to train the classifier and then quantizes it to 1byte tree ensemble
     """
 
+    def __init__(self, save_model_parameters=True, config=None):
+        super(DecisionTreeEnsemble, self).__init__(
+            save_model_parameters=save_model_parameters, config=config
+        )
+
+        self._tree_ensemble = None
+
     def preprocess(self, num_cols, data, **kwargs):
         """Assumes input dataframe has already been sorted into {features,
         label, groupby} columns and tests that feature columns have been scaled for .
@@ -103,61 +114,27 @@ class DecisionTreeEnsemble(Classifier):
 
     def load_model(self, model_parameters):
         self.model_parameters = model_parameters
+        self._tree_ensemble = FlatTreeEnsemble(model_parameters)
 
-    def recognize_vectors(
-        self, vectors_to_recognize, model_parameters=None, include_predictions=False
-    ):
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
         if model_parameters is None:
             model_parameters = self.model_parameters
 
-        tree_ensemble = get_tree_ensemble(model_parameters)
-
-        num_classes = len(model_parameters[0]["classes"])
-        num_features = len(model_parameters[0]["feature_importances"])
-
-        clf_lib = CDLL(os.path.join(settings.CLASSIFIER_LIBS, "libclassifiers.so"))
-
-        uint8_t = ctypes.c_ubyte
-        ensemble_classification = clf_lib.ensemble_classification
-
-        tree_t = struct_tree
-        ensemble_classification.argtypes = [
-            ctypes.POINTER(tree_t),
-            ctypes.POINTER(uint8_t),
-            uint8_t,
-            uint8_t,
-            ctypes.POINTER(uint8_t),
-        ]
-        ensemble_classification.restype = uint8_t
-
-        number_of_classes = uint8_t(num_classes)
-
-        number_of_trees = uint8_t(len(model_parameters))
-        feature_vector_c_array = (uint8_t * num_features)()
-
-        for index, feature_vector in enumerate(vectors_to_recognize):
-            classifications_c_array = (uint8_t * num_classes)()
-
-            for i, feature in enumerate(feature_vector["Vector"]):
-                feature_vector_c_array[i] = uint8_t(feature)
-
-            y_pred = ensemble_classification(
-                ctypes.cast(tree_ensemble, ctypes.POINTER(tree_t)),
-                classifications_c_array,
-                number_of_trees,
-                number_of_classes,
-                feature_vector_c_array,
-            )
-
-            vectors_to_recognize[index]["CategoryVector"] = int(
-                y_pred
-            )  # shift categories by 1
-            vectors_to_recognize[index]["DistanceVector"] = [0]
-
-        return self._compute_classification_statistics(
-            [x + 1 for x in model_parameters[0]["classes"]],
-            vectors_to_recognize,
-            include_predictions=include_predictions,
+        if (
+            self._tree_ensemble is not None
+            and model_parameters is self._tree_ensemble.model_parameters
+        ):
+            tree_ensemble = self._tree_ensemble
+        else:
+            tree_ensemble = FlatTreeEnsemble(model_parameters)
+
+        feature_vectors = np.asarray(feature_vectors)
+
+        # categories are shifted by 1
+        return RecognitionResult(
+            tree_ensemble.classify(feature_vectors),
+            classes=[x + 1 for x in model_parameters[0]["classes"]],
+            num_features=feature_vectors.shape[-1],
         )
 
     def compute_cost(self, model_parameters):
@@ -215,3 +192,157 @@ def get_tree_ensemble(model_parameters):
         )
 
     return tree_ensemble
+
+
+def ensemble_classification(model_parameters, feature_vectors):
+    """Classifies feature vectors one at a time with ensemble_classification from
+    libclassifiers.so, the reference for FlatTreeEnsemble.classify."""
+    tree_ensemble = get_tree_ensemble(model_parameters)
+
+    num_classes = len(model_parameters[0]["classes"])
+    num_features = len(model_parameters[0]["feature_importances"])
+
+    clf_lib = CDLL(os.path.join(settings.CLASSIFIER_LIBS, "libclassifiers.so"))
+
+    uint8_t = ctypes.c_ubyte
+    c_ensemble_classification = clf_lib.ensemble_classification
+
+    tree_t = struct_tree
+    c_ensemble_classification.argtypes = [
+        ctypes.POINTER(tree_t),
+        ctypes.POINTER(uint8_t),
+        uint8_t,
+        uint8_t,
+        ctypes.POINTER(uint8_t),
+    ]
+    c_ensemble_classification.restype = uint8_t
+
+    number_of_classes = uint8_t(num_classes)
+
+    number_of_trees = uint8_t(len(model_parameters))
+    feature_vector_c_array = (uint8_t * num_features)()
+
+    y_pred = []
+    for feature_vector in feature_vectors:
+        classifications_c_array = (uint8_t * num_classes)()
+
+        for i, feature in enumerate(feature_vector):
+            feature_vector_c_array[i] = uint8_t(feature)
+
+        y_pred.append(
+            c_ensemble_classification(
+                ctypes.cast(tree_ensemble, ctypes.POINTER(tree_t)),
+                classifications_c_array,
+                number_of_trees,
+                number_of_classes,
+                feature_vector_c_array,
+            )
+        )
+
+    return np.array(y_pred, dtype=np.uint8)
+
+
+class FlatTreeEnsemble(object):
+    """Tree ensemble compiled into flat numpy node arrays.
+
+    The nodes of every tree are concatenated with the children offset to the position
+    of their tree, so all trees of a block of feature vectors are traversed together,
+    one level per step, with the same comparisons, leaf test and vote as
+    ensemble_classification in tree_ensemble.c.
+    """
+
+    def __init__(self, model_parameters):
+        self.model_parameters = model_parameters
+        self.num_classes = len(model_parameters[0]["classes"])
+
+        # the model is stored with the types of the tree_t struct of the C library
+        sizes = [len(tree["children_left"]) for tree in model_parameters]
+        offsets = np.cumsum([0] + sizes[:-1]).astype(np.int64)
+
+        def node_array(key, node_dtype):
+            return np.concatenate(
+                [
+                    np.asarray(tree[key], dtype=np.int64).astype(node_dtype)
+                    for tree in model_parameters
+                ]
+            )
+
+        node_offsets = np.repeat(offsets, sizes)
+        right_children = node_array("children_right", np.uint16)
+
+        self.roots = offsets
+        self.is_leaf = right_children == 0
+        self.threshold = node_array("threshold", np.uint8)
+        self.features = node_array("feature", np.uint16)
+        self.split_features = self.features.astype(np.intp)
+        self.classes = self.features.astype(np.uint8)
+
+        children = np.stack(
+            [
+                node_offsets + node_array("children_left", np.uint16),
+                node_offsets + right_children,
+            ],
+            axis=1,
+        )
+        self.root_children, self.children = get_traversal_children(
+            children, self.is_leaf
+        )
+
+    def traverse(self, feature_vectors):
+        """Returns the leaf reached in every tree by every feature vector, as an array
+        of shape (number of vectors, number of trees)."""
+        nodes = np.broadcast_to(self.roots, (len(feature_vectors), len(self.roots)))
+
+        def step(children, nodes):
+            go_right = (
+                np.take_along_axis(feature_vectors, self.split_features[nodes], axis=1)
+                > self.threshold[nodes]
+            )
+            return children[2 * nodes + go_right]
+
+        nodes = step(self.root_children, nodes)
+        while not self.is_leaf[nodes].all():
+            nodes = step(self.children, nodes)
+
+        return nodes
+
+    def classify(self, feature_vectors):
+        """Returns the class (starting at 1) voted by the most trees for every feature
+        vector, ties go to the lowest class."""
+        feature_vectors = np.asarray(feature_vectors)
+        num_vectors = len(feature_vectors)
+        if num_vectors == 0:
+            return np.zeros(0, dtype=np.uint8)
+
+        # features are passed to the C library as uint8
+        feature_vectors = feature_vectors.astype(np.uint8)
+        num_trees = len(self.roots)
+        num_counts = max(self.num_classes, int(self.classes.max()) + 1)
+
+        y_pred = np.zeros(num_vectors, dtype=np.uint8)
+        block_size = max(1, TREE_BLOCK_SIZE // num_trees)
+        for start in range(0, num_vectors, block_size):
+            end = min(start + block_size, num_vectors)
+
+            classes = self.classes[self.traverse(feature_vectors[start:end])]
+            counts = np.bincount(
+                (np.arange(end - start)[:, np.newaxis] * num_counts + classes).ravel(),
+                minlength=(end - start) * num_counts,
+            ).reshape(end - start, num_counts)
+
+            y_pred[start:end] = counts[:, : self.num_classes].argmax(axis=1) + 1
+
+        return y_pred
+
+
+def get_traversal_children(children, is_leaf):
+    """Returns the flattened (left, right) children of every node used for the first
+    step of a traversal and for the steps after it. The first step leaves the root
+    even when it is a leaf, later steps stay on the leaf a traversal has reached so
+    every traversal of a block takes the same number of steps."""
+    root_children = children.astype(np.intp)
+
+    children = root_children.copy()
+    children[is_leaf] = np.flatnonzero(is_leaf)[:, np.newaxis]
+
+    return root_children.ravel(), children.ravel()
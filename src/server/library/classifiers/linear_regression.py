@@ -21,8 +21,9 @@ import ctypes
 import os
 from ctypes import CDLL
 
+import numpy as np
 from django.conf import settings
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
 from pandas import DataFrame
 
 
@@ -68,9 +69,7 @@ class LinearRegression(Classifier):
     def load_model(self, model_parameters):
         self.model_parameters = model_parameters
 
-    def recognize_vectors(
-        self, vectors_to_recognize, model_parameters=None, include_predictions=False
-    ):
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
         if model_parameters is None:
             model_parameters = self.model_parameters
 
@@ -90,22 +89,20 @@ class LinearRegression(Classifier):
             ctypes.c_float * model_parameters["num_coefficients"]
         )()
 
-        for index, feature_vector in enumerate(vectors_to_recognize):
-            for i, feature in enumerate(feature_vector["Vector"]):
+        feature_vectors = np.asarray(feature_vectors)
+        y_pred = np.zeros(len(feature_vectors), dtype=float)
+
+        for index, feature_vector in enumerate(feature_vectors.tolist()):
+            for i, feature in enumerate(feature_vector):
                 feature_vector_c_array[i] = ctypes.c_float(float(feature))
 
-            y_pred = model_predict(
+            y_pred[index] = model_predict(
                 model,
                 feature_vector_c_array,
             )
 
-            vectors_to_recognize[index]["CategoryVector"] = float(
-                y_pred
-            )  # shift categories by 1
-            vectors_to_recognize[index]["DistanceVector"] = [0]
-
-        return self._compute_regression_statistics(
-            vectors_to_recognize,
+        return RecognitionResult(
+            y_pred, num_features=feature_vectors.shape[-1], regression=True
         )
 
     def compute_cost(self, model_parameters):
@@ -21,7 +21,7 @@ import random
 
 import numpy as np
 import torch
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
 from numpy import dtype
 from pandas import DataFrame
 from torch import nn, optim
@@ -127,6 +127,28 @@ class LNN(Classifier):
 
         return model
 
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
+
+        if model_parameters is not None:
+            self.load_model(model_parameters)
+
+        feature_vectors = np.asarray(feature_vectors)
+
+        # shift categories by 1
+        y_pred = np.array(
+            [
+                int(self.predict(torch.from_numpy(vector).float())) + 1
+                for vector in feature_vectors
+            ],
+            dtype=int,
+        )
+
+        return RecognitionResult(
+            y_pred,
+            classes=range(1, self._num_outputs + 1),
+            num_features=feature_vectors.shape[-1],
+        )
+
     def recognize_vectors(
         self, vectors_to_recognize, model_parameters=None, include_predictions=False
     ):
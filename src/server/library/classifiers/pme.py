@@ -19,16 +19,34 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 import ctypes
 import os
+import threading
+from collections import Counter
 from ctypes import CDLL
 
+import numpy as np
 from django.conf import settings
 from django.forms.models import model_to_dict
 from engine.base.calculate_statistics import StatsCalc
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import (
+    Classifier,
+    RecognitionResult,
+    get_feature_matrix,
+)
 from library.models import FunctionCost
 
 PME_MAX_VECTOR_SIZE = 2048
 
+# Number of vector/pattern feature differences held in memory at a time when a batch
+# of vectors is recognized
+PME_DISTANCE_BLOCK_SIZE = 2**22
+
+# Category the PME reports for vectors that are not recognized
+PME_UNKNOWN_CATEGORY = 65535
+
+# libpmeclassifier works on the pattern database of the last initialized PME of the
+# process, PME instances select their own database while holding this lock
+PME_LOCK = threading.RLock()
+
 
 class NonIntegerException(Exception):
     """This Exception indicates there is a non-integer feature in the feature vectors."""
@@ -229,7 +247,8 @@ class PME(Classifier):
 
         self.pme_classifiers[0] = pme_classifier
 
-        return self.__pme_init(self.pme_classifiers, 1)
+        with PME_LOCK:
+            return self.__pme_init(self.pme_classifiers, 1)
 
     def _print_settings(self, classifier_id=0):
         print("norm_mode", self.pme_classifiers[classifier_id].norm_mode)
@@ -341,11 +360,165 @@ class PME(Classifier):
         self.__pme_recognize_vector(classifier_id, vector_array, results)
 
         for i in range(0, desired_responses):
-            if results[i].category == 65535:  # unknown response
+            if results[i].category == PME_UNKNOWN_CATEGORY:  # unknown response
                 results[i].category = 0
 
         return results
 
+    def _get_patterns(self, classifier_id=0):
+        """Returns views of the stored pattern vectors, influence fields and categories
+        of the classifier, rows beyond the number of learned patterns are dropped."""
+        classifier = self.pme_classifiers[classifier_id]
+        num_patterns = self.__pme_get_number_patterns(classifier_id)
+
+        if num_patterns == 0:
+            return (
+                np.zeros((0, classifier.pattern_size), dtype=np.uint8),
+                np.zeros(0, dtype=np.uint16),
+                np.zeros(0, dtype=np.uint16),
+            )
+
+        patterns = np.ctypeslib.as_array(
+            ctypes.cast(classifier.stored_patterns, ctypes.POINTER(ctypes.c_uint8)),
+            shape=(num_patterns, PME_MAX_VECTOR_SIZE),
+        )[:, : classifier.pattern_size]
+        attributes = np.ctypeslib.as_array(
+            ctypes.cast(classifier.stored_attributes, ctypes.POINTER(ctypes.c_uint16)),
+            shape=(num_patterns, 2),
+        )
+
+        return patterns, attributes[:, 0], attributes[:, 1]
+
+    def recognize_batch(self, vectors, classifier_id=0):
+        """Recognizes a batch of feature vectors with the same results as submitting
+        them one at a time with _recognize_vector.
+
+        The L1 or Lsup distance of every vector to every stored pattern is computed
+        with numpy in blocks of PME_DISTANCE_BLOCK_SIZE differences. As in the PME,
+        L1 distances wrap around at 16 bits and ties go to the pattern learned first.
+        KNN returns the nearest pattern, RBF returns the nearest pattern whose
+        influence field contains the vector and reports category 0 (distance 0,
+        pattern 0) when there is none. DTW distances are computed by the PME one
+        vector at a time.
+
+        Args:
+            vectors: 2-D integer array with one feature vector per row
+            classifier_id: index of the classifier
+
+        Returns:
+            tuple: (categories, distances, pattern_ids) arrays with one entry per
+            vector
+        """
+        vectors = np.asarray(vectors)
+        classifier = self.pme_classifiers[classifier_id]
+
+        if vectors.ndim == 1 and vectors.size == 0:
+            vectors = vectors.reshape(0, 0)
+
+        if vectors.ndim != 2:
+            raise SizeError("vectors must be a 2-D array!")
+
+        if vectors.shape[1] > classifier.pattern_size:
+            raise SizeError("vector too large!")
+
+        if vectors.size and vectors.dtype.kind not in "biu":
+            raise NonIntegerException(
+                "\nFeature vector contains non integer "
+                + "values. Make sure your pipeline contains a feature transform "
+                + "that scales the feature vectors such as Min Max Scale."
+            )
+
+        num_vectors = vectors.shape[0]
+        categories = np.zeros(num_vectors, dtype=np.uint16)
+        distances = np.zeros(num_vectors, dtype=np.uint16)
+        pattern_ids = np.zeros(num_vectors, dtype=np.uint16)
+
+        if classifier.norm_mode not in [self.DIST_MODE_L1, self.DIST_MODE_LSUP]:
+            for index, vector in enumerate(vectors.tolist()):
+                result = self._recognize_vector(classifier_id, vector)[0]
+                categories[index] = result.category
+                distances[index] = result.distance
+                pattern_ids[index] = result.pattern_id
+
+            return categories, distances, pattern_ids
+
+        patterns, influences, pattern_categories = self._get_patterns(classifier_id)
+        if len(patterns) == 0:
+            return categories, distances, pattern_ids
+
+        # the pme reads pattern_size features, shorter vectors are zero padded
+        batch = np.zeros((num_vectors, classifier.pattern_size), dtype=np.int16)
+        batch[:, : vectors.shape[1]] = vectors.astype(np.uint8)
+        patterns = patterns.astype(np.int16)
+
+        block_size = max(1, PME_DISTANCE_BLOCK_SIZE // patterns.size)
+        for start in range(0, num_vectors, block_size):
+            end = min(start + block_size, num_vectors)
+            differences = np.abs(batch[start:end, np.newaxis, :] - patterns)
+
+            if classifier.norm_mode == self.DIST_MODE_L1:
+                block_distances = differences.sum(axis=2, dtype=np.uint32).astype(
+                    np.uint16
+                )
+            else:
+                block_distances = differences.max(axis=2).astype(np.uint16)
+
+            rows = np.arange(end - start)
+            if classifier.classifier_mode == self.CLASSIF_MODE_KNN:
+                nearest = block_distances.argmin(axis=1)
+                recognized = np.ones(end - start, dtype=bool)
+            else:
+                firing = block_distances < influences
+                nearest = np.where(
+                    firing, block_distances, np.iinfo(np.uint32).max
+                ).argmin(axis=1)
+                recognized = firing[rows, nearest]
+
+            categories[start:end] = np.where(recognized, pattern_categories[nearest], 0)
+            distances[start:end] = np.where(
+                recognized, block_distances[rows, nearest], 0
+            )
+            pattern_ids[start:end] = np.where(recognized, nearest, 0)
+
+        categories[categories == PME_UNKNOWN_CATEGORY] = 0
+
+        return categories, distances, pattern_ids
+
+    def recognize(
+        self,
+        feature_vectors,
+        model_parameters=None,
+        desired_responses=1,
+        classifier_id=0,
+    ):
+        """Recognizes a matrix of feature vectors, the pme only fills in the first of
+        the desired responses of every vector"""
+        feature_vectors = np.asarray(feature_vectors)
+
+        with PME_LOCK:
+            if model_parameters is not None:
+                self.load_model(model_parameters, classifier_id=classifier_id)
+            else:
+                self.__pme_init(self.pme_classifiers, 1)
+
+            categories, distances, pattern_ids = self.recognize_batch(
+                feature_vectors, classifier_id=classifier_id
+            )
+            classes = np.unique(self._get_patterns(classifier_id)[2]).tolist()
+
+        responses = np.zeros((3, len(feature_vectors), max(desired_responses, 1)), int)
+        responses[0, :, 0] = categories
+        responses[1, :, 0] = distances
+        responses[2, :, 0] = pattern_ids
+
+        return RecognitionResult(
+            responses[0],
+            distances=responses[1],
+            ids=responses[2],
+            classes=classes,
+            num_features=feature_vectors.shape[-1],
+        )
+
     def recognize_vectors(
         self, vectors_to_recognize, classifier_id=0, include_predictions=False
     ):
@@ -358,24 +531,19 @@ class PME(Classifier):
         'NIDVector': this [] gets filled in by the code}]
         """
 
-        for i in range(0, len(vectors_to_recognize)):
-            results = self._recognize_vector(
-                classifier_id,
-                vectors_to_recognize[i]["Vector"],
-                vectors_to_recognize[i]["DesiredResponses"],
-            )
+        result = self.recognize(
+            get_feature_matrix(vectors_to_recognize),
+            desired_responses=max(
+                vector["DesiredResponses"] for vector in vectors_to_recognize
+            ),
+            classifier_id=classifier_id,
+        )
+        result.update_vector_dicts(vectors_to_recognize)
 
-            vectors_to_recognize[i]["DistanceVector"] = [
-                int(x.distance) for x in results
-            ]
-            vectors_to_recognize[i]["CategoryVector"] = [
-                int(x.category) for x in results
-            ]
-            vectors_to_recognize[i]["NIDVector"] = [int(x.pattern_id) for x in results]
-
-        # return vectors_to_recognize
-        return self._compute_classification_statistics(
-            vectors_to_recognize, include_predictions=include_predictions
+        return self.compute_statistics(
+            result,
+            [vector["Category"] for vector in vectors_to_recognize],
+            include_predictions=include_predictions,
         )
 
     def dump_model(self, classifier_id=0):
@@ -404,21 +572,23 @@ class PME(Classifier):
     def load_model(self, model_parameters, classifier_id=0):
         """Load a database of patterns into the pme"""
 
-        self._reset_pme_database(classifier_id)
+        with PME_LOCK:
+            self.__pme_init(self.pme_classifiers, 1)
+            self._reset_pme_database(classifier_id)
 
-        vector_array_type = ctypes.c_uint8 * (
-            self.pme_classifiers[classifier_id].pattern_size
-        )
+            vector_array_type = ctypes.c_uint8 * (
+                self.pme_classifiers[classifier_id].pattern_size
+            )
 
-        for pattern in model_parameters:
-            vector_array = vector_array_type()
+            for pattern in model_parameters:
+                vector_array = vector_array_type()
 
-            for i, value in enumerate(pattern["Vector"]):
-                vector_array[i] = ctypes.c_uint8(value)
+                for i, value in enumerate(pattern["Vector"]):
+                    vector_array[i] = ctypes.c_uint8(value)
 
-            self.__pme_add_new_pattern(
-                classifier_id, vector_array, pattern["Category"], pattern["AIF"]
-            )
+                self.__pme_add_new_pattern(
+                    classifier_id, vector_array, pattern["Category"], pattern["AIF"]
+                )
 
         return self.pme_classifiers[0].num_patterns
 
@@ -458,73 +628,33 @@ class PME(Classifier):
 
         return f_cost_dict
 
-    def _compute_classification_statistics(
-        self, recognized_vectors, include_predictions=False
-    ):
-        unknown = 0
-        properclass = 0
-        improperclass = 0
-        actual_category_counts = {}
-        recognized_category_counts = {}  # based only on the first element in vector
-        neuron_counts = {}
-        confusion_matrix = {}
-        temp = {}
-        all_cats = set()
+    def compute_statistics(self, result, y_true, include_predictions=False):
         allow_unknown = True
 
+        y_true = [int(x) for x in y_true]
+        y_pred = result.predictions.tolist()
+        y_dist = result.distances[:, 0].tolist()
+        y_nid = result.ids[:, 0].tolist()
+
         # Create a confusion matrix
-        # Initialize it
-        nrns = self.dump_model()
-        for v in nrns:
-            all_cats.add(int(v["Category"]))
-        for v in recognized_vectors:
-            all_cats.add(int(v["Category"]))
-        all_cats = sorted(all_cats)
+        all_cats = sorted(set(result.classes) | set(y_true))
 
+        confusion_matrix = {}
         for v in all_cats:
-            temp[v] = 0
-        temp["UNC"] = 0
-        temp["UNK"] = 0
-        for v in all_cats:
-            confusion_matrix[v] = dict(temp)
+            confusion_matrix[v] = dict.fromkeys(all_cats + ["UNC", "UNK"], 0)
 
-        for v in recognized_vectors:
-            if v["CategoryVector"][0] == 0:
-                # Report unknowns
-                unknown = unknown + 1
-                confusion_matrix[int(v["Category"])]["UNK"] += 1
-            else:
-                confusion_matrix[int(v["Category"])][v["CategoryVector"][0]] += 1
-                if v["CategoryVector"][0] == int(v["Category"]):
-                    properclass += 1
-                else:
-                    improperclass += 1
-
-            if v["Category"] in actual_category_counts:
-                actual_category_counts[v["Category"]] = (
-                    actual_category_counts[v["Category"]] + 1
-                )
-            else:
-                actual_category_counts[v["Category"]] = 1
+        for (actual, recognized), count in Counter(zip(y_true, y_pred)).items():
+            confusion_matrix[actual]["UNK" if recognized == 0 else recognized] += count
 
-            # These metrics are not too important yet, but might need to be updated for multiple firing neurons
-            if v["CategoryVector"][0] in recognized_category_counts:
-                recognized_category_counts[v["CategoryVector"][0]] = (
-                    recognized_category_counts[v["CategoryVector"][0]] + 1
-                )
-            else:
-                recognized_category_counts[v["CategoryVector"][0]] = 1
-
-            if v["NIDVector"][0] in neuron_counts:
-                neuron_counts[v["NIDVector"][0]] = neuron_counts[v["NIDVector"][0]] + 1
-            else:
-                neuron_counts[v["NIDVector"][0]] = 1
+        unknown = sum(row["UNK"] for row in confusion_matrix.values())
+        properclass = sum(row[v] for v, row in confusion_matrix.items())
+        improperclass = len(y_pred) - unknown - properclass
 
-        # Gather truth and prediction values from recognized vectors
-        y_true = [int(x["Category"]) for x in recognized_vectors]
-        y_pred = [int(x["CategoryVector"][0]) for x in recognized_vectors]
-        y_dist = [int(x["DistanceVector"][0]) for x in recognized_vectors]
-        y_nid = [int(x["NIDVector"][0]) for x in recognized_vectors]
+        actual_category_counts = dict(Counter(y_true))
+        # These metrics are not too important yet, but might need to be updated for
+        # multiple firing neurons
+        recognized_category_counts = dict(Counter(y_pred))
+        neuron_counts = dict(Counter(y_nid))
 
         # Calculate statistics from confusion matrix and y_true, y_pred
 
@@ -542,16 +672,16 @@ class PME(Classifier):
         )
         stats_obj.calc_all_metrics()
         statistics = {
-            "UnknownPercent": 100 * float(unknown) / float(len(recognized_vectors)),
+            "UnknownPercent": 100 * float(unknown) / float(len(y_pred)),
             "ProperClassificationPercent": 100
             * float(properclass)
-            / float(len(recognized_vectors)),
+            / float(len(y_pred)),
             "ImproperClassificationPercent": 100
             * float(improperclass)
-            / float(len(recognized_vectors)),
-            "VectorInTestSet": len(recognized_vectors),
+            / float(len(y_pred)),
+            "VectorInTestSet": len(y_pred),
             # assumption is that they are all the same size
-            "FeaturesPerVector": len(recognized_vectors[0]["Vector"]),
+            "FeaturesPerVector": result.num_features,
             "NeuronsUsed": self.get_number_patterns(),
             "NeuronsUsedPercent": 100
             * self.get_number_patterns()
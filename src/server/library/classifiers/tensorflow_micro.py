@@ -18,7 +18,6 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import binascii
-import copy
 import json
 import os
 from abc import abstractmethod
@@ -31,15 +30,19 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 import tensorflow as tf
 from django.conf import settings
 from django.forms.models import model_to_dict
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
 from library.models import FunctionCost
-from numpy import argmax, array, dtype
+from numpy import dtype
 from pandas import DataFrame
 
 from logger.log_handler import LogHandler
 
 logger = LogHandler(logging.getLogger(__name__))
 
+# Number of feature vectors passed to the interpreter in one invoke when the model
+# input can be resized to a batch
+TFLITE_BATCH_SIZE = 1024
+
 
 class TensorFlowMicro(Classifier):
     @abstractmethod
@@ -91,6 +94,12 @@ class TensorFlowMicro(Classifier):
         self._model = tf.lite.Interpreter(model_content=tflite_model_buffer)
         self._model.allocate_tensors()
 
+        # the details of the unbatched model, the interpreter tensors are resized
+        # when batches of vectors are recognized
+        self._input_details = self._model.get_input_details()[0]
+        self._output_details = self._model.get_output_details()[0]
+        self._batch_inference = None
+
     @staticmethod
     def get_model_profile(tflite_model_buffer, accelerator=None):
         librunner_path = os.path.join(
@@ -203,83 +212,151 @@ class TensorFlowMicro(Classifier):
 
         return f_cost_dict
 
-    def recognize_vectors(
-        self, vectors_to_recognize, model_parameters=None, include_predictions=False
-    ):
-        if model_parameters is not None:
-            self.load_model(model_parameters)
-        else:
-            model_parameters = self.model_parameters
-
-        input_tensor = self._model.tensor(self._model.get_input_details()[0]["index"])
-        num_classes = None
+    def _quantize(self, feature_vectors):
+        """Converts a matrix of feature vectors to model inputs of the unbatched input
+        shape. Single feature vectors fill the whole input."""
+        input_dtype = self._input_details["dtype"]
+        input_shape = tuple(self._input_details["shape"][1:])
 
-        for index, feature_vector in enumerate(vectors_to_recognize):
-            output_tensor = self._model.tensor(
-                self._model.get_output_details()[0]["index"]
+        if feature_vectors.shape[1] == 1:
+            inputs = np.broadcast_to(
+                feature_vectors.reshape((-1,) + (1,) * len(input_shape)),
+                (len(feature_vectors),) + input_shape,
             )
+        elif input_dtype == np.int8:
+            input_scale, input_zero_point = self._input_details["quantization"]
+            inputs = feature_vectors / input_scale + input_zero_point
+        else:
+            inputs = feature_vectors
+
+        return inputs.astype(input_dtype).reshape((len(feature_vectors),) + input_shape)
 
-            if len(feature_vector["Vector"]) == 1:
-                input_tensor().fill(feature_vector["Vector"][0])
-                # self._tflm_model.input(value=feature_vector["Vector"][0])
-            else:
-                if self._model.get_input_details()[0]["dtype"] == np.float32:
-                    fv = array(feature_vector["Vector"], dtype=np.float32)
-                elif self._model.get_input_details()[0]["dtype"] == np.int8:
-                    input_scale, input_zero_point = self._model.get_input_details()[0][
-                        "quantization"
-                    ]
-                    fv = (
-                        np.array(feature_vector["Vector"]) / input_scale
-                        + input_zero_point
-                    ).astype(np.int8)
-                elif self._model.get_input_details()[0]["dtype"] == np.uint8:
-                    fv = array(feature_vector["Vector"], dtype=np.uint8)
-
-                input_tensor()[:] = fv.reshape(
-                    self._model.get_input_details()[0]["shape"]
-                )
-                # self._tflm_model.input(
-                #    value=fv.reshape(self._model.get_input_details()[0]["shape"])
-                # )
+    def _invoke(self, inputs):
+        """Runs the model on every input one at a time."""
+        input_index = self._input_details["index"]
+        output_index = self._output_details["index"]
+        input_shape = self._input_details["shape"]
 
+        outputs = []
+        for model_input in inputs:
+            self._model.set_tensor(input_index, model_input.reshape(input_shape))
             self._model.invoke()
-            distance_vector = copy.deepcopy(output_tensor())
-            # self._tflm_model.invoke()
-            # distance_vector = self._tflm_model.output()
+            outputs.append(self._model.get_tensor(output_index))
+
+        return np.stack(outputs)
+
+    def _invoke_batch(self, inputs):
+        """Runs the model on a batch of inputs with the input tensor resized to the
+        size of the batch."""
+        input_index = self._input_details["index"]
+
+        if self._model.get_input_details()[0]["shape"][0] != len(inputs):
+            self._model.resize_tensor_input(input_index, inputs.shape)
+            self._model.allocate_tensors()
+
+        self._model.set_tensor(input_index, inputs)
+        self._model.invoke()
+        outputs = self._model.get_tensor(self._output_details["index"])
+
+        if outputs.shape[0] != len(inputs):
+            raise ValueError("Model output is not batched")
+
+        # the unbatched outputs keep their leading dimension of 1
+        return outputs.reshape((len(inputs), 1) + outputs.shape[1:])
+
+    def _supports_batch_inference(self, inputs):
+        """Checks once per model that resizing the input tensor to a batch gives the
+        same outputs as invoking the model on every input."""
+        if self._batch_inference is None and len(inputs) > 1:
+            self._batch_inference = False
+
+            if self._input_details["shape"][0] == 1:
+                try:
+                    outputs = self._invoke(inputs[:2])
+                    self._batch_inference = bool(
+                        np.allclose(self._invoke_batch(inputs[:2]), outputs)
+                    )
+                except (RuntimeError, ValueError) as e:
+                    logger.debug(
+                        {
+                            "message": "Model input can not be resized to a batch",
+                            "data": str(e),
+                            "log_type": "classifier",
+                        }
+                    )
+
+            if not self._batch_inference:
+                # restores the unbatched input tensor
+                self.load_model(self.model_parameters)
+                self._batch_inference = False
+
+        return bool(self._batch_inference)
+
+    def predict(self, feature_vectors):
+        """Returns the output vector of the model for every feature vector, as an array
+        of shape (number of vectors, number of outputs).
+
+        Feature vectors are quantized together and passed to the interpreter in
+        batches of TFLITE_BATCH_SIZE when the model input can be resized to a batch,
+        and one at a time otherwise.
+        """
+        feature_vectors = np.asarray(feature_vectors)
+        if feature_vectors.ndim == 1:
+            feature_vectors = feature_vectors.reshape(len(feature_vectors), -1)
+
+        inputs = self._quantize(feature_vectors)
+
+        if self._supports_batch_inference(inputs):
+            outputs = np.concatenate(
+                [
+                    self._invoke_batch(inputs[start : start + TFLITE_BATCH_SIZE])
+                    for start in range(0, len(inputs), TFLITE_BATCH_SIZE)
+                ]
+            )
+        else:
+            outputs = self._invoke(inputs)
 
-            while len(distance_vector.shape) > 1:
-                distance_vector = distance_vector[0]
+        # the output vector is the last dimension of the output tensor
+        while outputs.ndim > 2:
+            outputs = outputs[:, 0]
 
-            distance_vector = distance_vector.tolist()
+        return outputs
 
-            if self.model_parameters["estimator_type"] == "regression":
-                category_vector = distance_vector
-                vectors_to_recognize[index]["DistanceVector"] = distance_vector
-            else:
-                category_vector = int(argmax(distance_vector) + 1)
+    def classify(self, outputs, threshold=0.0):
+        """Returns the category (starting at 1) of every output vector, outputs whose
+        largest value is below threshold are reported as unknown (0)."""
+        categories = outputs.argmax(axis=1) + 1
 
-                if self._model.get_output_details()[0]["dtype"] == np.int8:
-                    max_distance = float((max(distance_vector) + 127) / 256)
-                elif self._model.get_output_details()[0]["dtype"] == np.uint8:
-                    max_distance = float((max(distance_vector)) / 256)
-                else:
-                    max_distance = float((max(distance_vector)))
+        max_distance = outputs.max(axis=1).astype(np.float64)
+        if self._output_details["dtype"] == np.int8:
+            max_distance = (max_distance + 127) / 256
+        elif self._output_details["dtype"] == np.uint8:
+            max_distance = max_distance / 256
 
-                if max_distance < model_parameters.get("threshold", 0.0):
-                    category_vector = 0
+        categories[max_distance < threshold] = 0
 
-                vectors_to_recognize[index]["DistanceVector"] = distance_vector
+        return categories
 
-            vectors_to_recognize[index]["CategoryVector"] = category_vector
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
+        if model_parameters is not None:
+            self.load_model(model_parameters)
+        else:
+            model_parameters = self.model_parameters
 
-            num_classes = output_tensor().shape[-1]
+        feature_vectors = np.asarray(feature_vectors)
+        outputs = self.predict(feature_vectors)
 
         if self.model_parameters["estimator_type"] == "regression":
-            return self._compute_regression_statistics(vectors_to_recognize)
-        else:
-            return self._compute_classification_statistics(
-                range(1, num_classes + 1),
-                vectors_to_recognize,
-                include_predictions=include_predictions,
+            return RecognitionResult(
+                outputs,
+                distances=outputs,
+                num_features=feature_vectors.shape[-1],
+                regression=True,
             )
+
+        return RecognitionResult(
+            self.classify(outputs, model_parameters.get("threshold", 0.0)),
+            distances=outputs,
+            classes=range(1, outputs.shape[-1] + 1),
+            num_features=feature_vectors.shape[-1],
+        )
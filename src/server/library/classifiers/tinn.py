@@ -22,8 +22,9 @@ import os
 import random
 from ctypes import CDLL
 
+import numpy as np
 from django.conf import settings
-from library.classifiers.classifier import Classifier
+from library.classifiers.classifier import Classifier, RecognitionResult
 from numpy import dtype
 from pandas import DataFrame
 
@@ -154,6 +155,25 @@ class Tinn(Classifier):
 
         self.model_parameters = model_parameters
 
+    def recognize(self, feature_vectors, model_parameters=None, desired_responses=1):
+
+        if model_parameters is not None:
+            self.load_model(model_parameters)
+
+        feature_vectors = np.asarray(feature_vectors)
+
+        # shift categories by 1
+        y_pred = np.array(
+            [self.predict(vector) + 1 for vector in feature_vectors.tolist()],
+            dtype=int,
+        )
+
+        return RecognitionResult(
+            y_pred,
+            classes=range(1, self._num_outputs + 1),
+            num_features=feature_vectors.shape[-1],
+        )
+
     def recognize_vectors(
         self, vectors_to_recognize, model_parameters=None, include_predictions=False
     ):
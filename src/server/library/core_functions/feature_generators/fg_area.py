@@ -23,6 +23,7 @@ import library.core_functions.fg_algorithms as fg_algorithms
 from pandas import DataFrame
 
 
+@fg_algorithms.supports_batch
 def fg_area_total_area(
     input_data: DataFrame, sample_rate: int, columns: List[str], **kwargs
 ):
@@ -108,6 +109,7 @@ fg_area_total_area_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_area_absolute_area(
     input_data: DataFrame, sample_rate: int, columns: List[str], **kwargs
 ):
@@ -191,6 +193,7 @@ fg_area_absolute_area_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_area_total_area_low_frequency(
     input_data: DataFrame,
     sample_rate: int,
@@ -291,6 +294,7 @@ fg_area_total_area_low_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_area_absolute_area_low_frequency(
     input_data: DataFrame,
     sample_rate: int,
@@ -390,6 +394,7 @@ fg_area_absolute_area_low_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_area_total_area_high_frequency(
     input_data: DataFrame,
     sample_rate: int,
@@ -490,6 +495,7 @@ fg_area_total_area_high_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_area_absolute_area_high_frequency(
     input_data: DataFrame,
     sample_rate: int,
@@ -591,6 +597,7 @@ fg_area_absolute_area_high_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_area_power_spectrum_density(
     input_data: DataFrame, sample_rate: int, columns: List[str], **kwargs
 ):
@@ -23,6 +23,7 @@ import library.core_functions.fg_algorithms as fg_algorithms
 from pandas import DataFrame
 
 
+@fg_algorithms.supports_batch
 def fg_energy_average_energy(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Average Energy.
@@ -99,6 +100,7 @@ fg_energy_average_energy_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_energy_total_energy(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Total Energy.
@@ -170,6 +172,7 @@ fg_energy_total_energy_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_energy_average_demeaned_energy(
     input_data: DataFrame, columns: List[str], **kwargs
 ):
@@ -23,6 +23,7 @@ import library.core_functions.fg_algorithms as fg_algorithms
 from pandas import DataFrame
 
 
+@fg_algorithms.supports_batch
 def fg_frequency_dominant_frequency(
     input_data: DataFrame, sample_rate: int, columns: List[str], **kwargs
 ):
@@ -246,6 +247,7 @@ fg_frequency_peak_frequencies_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_frequency_spectral_entropy(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Calculate the spectral entropy for each specified signal. For each column,
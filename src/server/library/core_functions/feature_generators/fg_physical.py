@@ -29,6 +29,7 @@ def magnitude(input_data, input_columns):
     return sqrt(square(input_data[input_columns]).sum(axis=1))
 
 
+@fg_algorithms.supports_batch
 def fg_physical_average_movement_intensity(
     input_data: DataFrame, columns: List[str], **kwargs
 ):
@@ -106,6 +107,7 @@ fg_physical_average_movement_intensity_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_physical_variance_movement_intensity(
     input_data: DataFrame, columns: List[str], **kwargs
 ):
@@ -178,6 +180,7 @@ fg_physical_variance_movement_intensity_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_physical_average_signal_magnitude_area(
     input_data: DataFrame, columns: List[str], **kwargs
 ):
@@ -24,6 +24,7 @@ from library.core_functions import MAX_INT_16, MIN_INT_16
 from pandas import DataFrame
 
 
+@fg_algorithms.supports_batch
 def fg_roc_mean_crossing_rate(
     input_data: DataFrame, columns: List[str], **kwargs
 ) -> DataFrame:
@@ -124,6 +125,7 @@ fg_roc_mean_crossing_rate_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_roc_zero_crossing_rate(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Calculates the rate at which zero value is crossed for each specified column.
@@ -205,6 +207,7 @@ fg_roc_zero_crossing_rate_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_roc_sigma_crossing_rate(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Calculates the rate at which standard deviation value (sigma) is crossed for
@@ -301,6 +304,7 @@ fg_roc_sigma_crossing_rate_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_roc_second_sigma_crossing_rate(
     input_data: DataFrame, columns: List[str], **kwargs
 ):
@@ -401,6 +405,7 @@ fg_roc_second_sigma_crossing_rate_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_roc_mean_difference(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Calculate the mean difference of each specified column. Works with grouped data.
@@ -477,6 +482,7 @@ fg_roc_mean_difference_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_roc_threshold_crossing_rate(
     input_data: DataFrame, columns: List[str], threshold: int = 0, **kwargs
 ) -> float:
@@ -538,6 +544,7 @@ fg_roc_threshold_crossing_rate_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_roc_threshold_with_offset_crossing_rate(
     input_data: DataFrame,
     columns: List[str],
@@ -219,6 +219,7 @@ fg_shape_difference_high_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_amplitude_global_p2p_high_frequency(
     input_data: DataFrame, columns: List[str], smoothing_factor: int = 5, **kwargs
 ):
@@ -306,6 +307,7 @@ fg_amplitude_global_p2p_high_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_amplitude_global_p2p_low_frequency(
     input_data: DataFrame, columns: List[str], smoothing_factor: int = 5, **kwargs
 ):
@@ -487,6 +489,7 @@ fg_amplitude_max_p2p_half_high_frequency_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_amplitude_peak_to_peak(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Global Peak to Peak of signal.
@@ -554,6 +557,7 @@ fg_amplitude_peak_to_peak_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_amplitude_min_max_sum(input_data: DataFrame, columns: List[str], **kwargs):
     """
     This function is the sum of the maximum and minimum values. It is also
@@ -24,6 +24,7 @@ from library.core_functions import MAX_INT_16, MIN_INT_16
 from pandas import DataFrame
 
 
+@fg_algorithms.supports_batch
 def fg_stats_mean(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the arithmetic mean of each column in `columns` in the dataframe.
@@ -92,6 +93,7 @@ fg_stats_mean_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_median(input_data: DataFrame, columns: List[str], **kwargs):
     """
     The median of a vector V with N items, is the middle value of a sorted
@@ -169,6 +171,7 @@ fg_stats_median_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_stdev(input_data: DataFrame, columns: List[str], **kwargs):
     """
     The standard deviation of a vector V with N items, is the measure of spread
@@ -239,6 +242,7 @@ fg_stats_stdev_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_skewness(input_data: DataFrame, columns: List[str], **kwargs):
     """
     The skewness is the measure of asymmetry of the distribution of a variable
@@ -311,6 +315,7 @@ fg_stats_skewness_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_kurtosis(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Kurtosis is the degree of 'peakedness' or 'tailedness' in the distribution and
@@ -381,6 +386,7 @@ fg_stats_kurtosis_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_iqr(input_data: DataFrame, columns: List[str], **kwargs):
     """
     The IQR (inter quartile range) of a vector V with N items, is the
@@ -456,6 +462,7 @@ fg_stats_iqr_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_pct025(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the 25th percentile of each column in 'columns' in the dataframe.
@@ -536,6 +543,7 @@ fg_stats_pct025_contracts = {
 
 # input_data (DataFrame) : input data as pandas dataframe
 # group_columns: List of column names for grouping
+@fg_algorithms.supports_batch
 def fg_stats_pct075(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the 75th percentile of each column in 'columns' in the dataframe.
@@ -613,6 +621,7 @@ fg_stats_pct075_contracts = {
 # input_data (DataFrame) : input data as pandas dataframe
 
 
+@fg_algorithms.supports_batch
 def fg_stats_pct100(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the 100th percentile of each column in 'columns' in the dataframe.
@@ -683,6 +692,7 @@ fg_stats_pct100_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_maximum(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the maximum of each column in 'columns' in the dataframe.
@@ -752,6 +762,7 @@ fg_stats_maximum_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_minimum(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the minimum of each column in 'columns' in the dataframe.
@@ -821,6 +832,7 @@ fg_stats_minimum_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_sum(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the cumulative sum of each column in 'columns' in the dataframe.
@@ -889,6 +901,7 @@ fg_stats_sum_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_abs_sum(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the cumulative sum of absolute values in each column in 'columns' in the dataframe.
@@ -958,6 +971,7 @@ fg_stats_abs_sum_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_abs_mean(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the arithmetic mean of absolute value in each column of `columns` in the dataframe.
@@ -1027,6 +1041,7 @@ fg_stats_abs_mean_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_variance(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Computes the variance of desired column(s) in the dataframe.
@@ -1094,6 +1109,7 @@ fg_stats_variance_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_zero_crossings(input_data, columns, threshold=100, **kwargs):
     """
     Computes the number of times the selected input crosses the mean+threshold and mean-threshold values. The threshold value is specified by the user.
@@ -1178,6 +1194,7 @@ fg_stats_zero_crossings_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_positive_zero_crossings(input_data, columns, threshold=100, **kwargs):
     """
     Computes the number of times the selected input crosses the mean+threshold and mean-threshold values with a positive slope. The threshold value is specified by the user.
@@ -1237,6 +1254,7 @@ fg_stats_positive_zero_crossings_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_stats_negative_zero_crossings(input_data, columns, threshold=100, **kwargs):
     """
     Computes the number of times the selected input crosses the mean+threshold and mean-threshold values with a negative slope. The threshold value is specified by the user.
@@ -24,6 +24,7 @@ from library.core_functions import MAX_INT_16, MIN_INT_16
 from pandas import DataFrame
 
 
+@fg_algorithms.supports_batch
 def fg_time_signal_duration(
     input_data: DataFrame, columns: List[str], sample_rate: int, **kwargs
 ):
@@ -107,6 +108,7 @@ fg_time_signal_duration_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_time_pct_time_over_zero(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Percentage of samples in the series that are positive.
@@ -195,6 +197,7 @@ fg_time_pct_time_over_zero_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_time_pct_time_over_sigma(input_data: DataFrame, columns: List[str], **kwargs):
     """
     Percentage of samples in the series that are above the sample mean + one sigma
@@ -281,6 +284,7 @@ fg_time_pct_time_over_sigma_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_time_pct_time_over_second_sigma(
     input_data: DataFrame, columns: List[str], **kwargs
 ):
@@ -370,6 +374,7 @@ fg_time_pct_time_over_second_sigma_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_time_pct_time_over_threshold(
     input_data: DataFrame, columns: List[str], threshold: int = 0, **kwargs
 ):
@@ -461,6 +466,7 @@ fg_time_pct_time_over_threshold_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_time_avg_time_over_threshold(
     input_data: DataFrame, columns: List[str], threshold: int = 0, **kwargs
 ):
@@ -507,6 +513,7 @@ fg_time_avg_time_over_threshold_contracts = {
 }
 
 
+@fg_algorithms.supports_batch
 def fg_time_abs_pct_time_over_threshold(
     input_data: DataFrame, columns: List[str], threshold: int = 0, **kwargs
 ):
@@ -19,134 +19,294 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 import copy
 import os
-from ctypes import c_int
-from functools import wraps
+import tempfile
+from collections import OrderedDict
+from ctypes import c_int, c_void_p, cast
 
 import billiard as multiprocessing
 import numpy as np
 import numpy.ctypeslib as npct
-from datamanager.datasegments import get_datasegment_col_indexes
+from datamanager.datasegments import (
+    ColumnarDataSegments,
+    get_datasegment_col_indexes,
+)
 from django.conf import settings
 from library.exceptions import InputParameterException
 from pandas import DataFrame, concat
 
+# Batches of segments are exchanged with sandboxed workers through files in memory
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
-def parametrized(dec):
-    def layer(*args, **kwargs):
-        def repl(f):
-            return dec(f, *args, **kwargs)
 
-        return repl
+def supports_batch(func):
+    """Marks a feature generator whose only work is a call to run_feature_generator_c,
+    run_feature_generator_c_multiple_columns or one of their sandboxed versions.
+    DataSegments.apply calls these once
+    with all segments of a shard instead of once per segment."""
+    func.supports_batch = True
 
-    return layer
+    return func
 
 
-@parametrized
-def run_function_with_timer(func, allowed_time):
-    @wraps(func)
-    def wrapper(input_data, columns, result_names, in_params, function):
-        recv_end, send_end = multiprocessing.Pipe(False)
-        p = multiprocessing.Process(
-            target=func,
-            args=(input_data, columns, result_names, in_params, function, send_end),
+def map_shared_arrays(buffer, layout):
+    """Returns views of the arrays described by layout on a shared memory buffer."""
+    return [
+        buffer[offset : offset + int(np.prod(shape)) * np.dtype(dtype).itemsize]
+        .view(dtype)
+        .reshape(shape)
+        for offset, dtype, shape in layout
+    ]
+
+
+def run_sandboxed_worker(function, conn):
+    """Main loop of a sandboxed worker, runs the kernel over every segment of the
+    batches it receives until the pipe to the parent is closed."""
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        try:
+            buffer = np.memmap(task["path"], dtype=np.uint8, mode="r+")
+            data, offsets, sizes, params, out_array = map_shared_arrays(
+                buffer, task["layout"]
+            )
+            for index in range(offsets.shape[0]):
+                function(
+                    data[offsets[index] : offsets[index] + sizes[index]],
+                    out_array[index],
+                    params,
+                    len(params),
+                    task["num_cols"],
+                    int(sizes[index]),
+                    out_array.shape[1],
+                )
+            del data, offsets, sizes, params, out_array, buffer
+        except Exception as e:
+            conn.send(e)
+            continue
+
+        conn.send(None)
+
+
+class SandboxedWorker(object):
+    """Long lived process that runs a custom feature generator kernel.
+
+    The kernel is inherited when the process is forked so it does not need to be
+    pickled. Batches of segments are exchanged through a shared memory file, only the
+    layout of the file goes through the pipe. The worker is replaced when a batch
+    exceeds its time budget or the process dies.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.pid = os.getpid()
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=run_sandboxed_worker, args=(function, child_conn)
         )
-        p.start()
-        p.join(allowed_time)
-        if p.is_alive():
-            p.terminate()
-            p.join()
+        self._process.daemon = True
+        self._process.start()
+        child_conn.close()
+
+    def is_alive(self):
+        return self.pid == os.getpid() and self._process.is_alive()
+
+    def run(self, task, allowed_time):
+        self._conn.send(task)
+
+        if not self._conn.poll(allowed_time):
+            self.terminate()
             raise Exception("Function Exceeded Alloted Exceution Time")
-        result = recv_end.recv()
+
+        try:
+            result = self._conn.recv()
+        except EOFError:
+            self.terminate()
+            raise Exception("Function Terminated Unexpectedly")
 
         if isinstance(result, Exception):
             raise result
 
-        result = DataFrame(result)
+    def terminate(self):
+        if self.pid != os.getpid():
+            return
+        self._conn.close()
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
+
+
+# Sandboxed workers of the process by kernel, least recently used first
+sandboxed_workers = OrderedDict()
+
 
-        return result
+def get_sandboxed_worker(function):
+    worker = sandboxed_workers.pop(function, None)
+    if worker is None or not worker.is_alive():
+        worker = SandboxedWorker(function)
+    sandboxed_workers[function] = worker
+
+    while len(sandboxed_workers) > settings.CUSTOM_TRANSFORM_WORKERS:
+        sandboxed_workers.popitem(last=False)[1].terminate()
+
+    return worker
+
+
+def get_batch_time_limit(num_calls):
+    """Seconds a batch of num_calls kernel calls may run: CUSTOM_TRANSFORM_CPU_TIME per
+    call, capped at CUSTOM_TRANSFORM_MAX_BATCH_TIME when it is set."""
+    allowed_time = num_calls * settings.CUSTOM_TRANSFORM_CPU_TIME
+    if settings.CUSTOM_TRANSFORM_MAX_BATCH_TIME > 0:
+        return min(
+            allowed_time,
+            max(
+                settings.CUSTOM_TRANSFORM_MAX_BATCH_TIME,
+                settings.CUSTOM_TRANSFORM_CPU_TIME,
+            ),
+        )
+
+    return allowed_time
+
+
+def run_sandboxed_batch(function, data, offsets, sizes, out_array, in_params, num_cols):
+    """Runs a custom kernel in a sandboxed worker over every segment stored in data,
+    writing the features of segment i to out_array[i]. Segments are sent in batches
+    of CUSTOM_TRANSFORM_BATCH_SIZE, each batch must complete within the time limit
+    of get_batch_time_limit."""
+    params = np.array(in_params, dtype=np.float32)
+    batch_size = max(settings.CUSTOM_TRANSFORM_BATCH_SIZE, 1)
+
+    for start in range(0, len(offsets), batch_size):
+        stop = min(start + batch_size, len(offsets))
+        first, last = offsets[start], offsets[stop - 1] + sizes[stop - 1]
+
+        arrays = [
+            np.ascontiguousarray(data[first:last], dtype=np.int16),
+            np.ascontiguousarray(offsets[start:stop] - first, dtype=np.int64),
+            np.ascontiguousarray(sizes[start:stop], dtype=np.int64),
+            params,
+            np.zeros((stop - start, out_array.shape[1]), dtype=np.float32),
+        ]
+
+        layout = []
+        nbytes = 0
+        for array in arrays:
+            layout.append((nbytes, array.dtype.str, array.shape))
+            nbytes += -(-array.nbytes // 64) * 64
+
+        fd, path = tempfile.mkstemp(prefix="fg_sandbox_", dir=SHARED_MEMORY_DIR)
+        try:
+            os.ftruncate(fd, max(nbytes, 1))
+            buffer = np.memmap(path, dtype=np.uint8, mode="r+", shape=(max(nbytes, 1),))
+            views = map_shared_arrays(buffer, layout)
+            for view, array in zip(views, arrays):
+                view[...] = array
+
+            get_sandboxed_worker(function).run(
+                {"path": path, "layout": layout, "num_cols": num_cols},
+                get_batch_time_limit(stop - start),
+            )
 
-    return wrapper
+            out_array[start:stop] = views[-1]
+            del views, buffer
+        finally:
+            os.close(fd)
+            os.remove(path)
 
 
-@run_function_with_timer(settings.CUSTOM_TRANSFORM_CPU_TIME)
 def run_feature_generator_c_sandboxed(
-    input_data, columns, result_names, in_params, function, send_end
+    input_data, columns, result_names, in_params, function
 ):
-    try:
-
-        if isinstance(result_names, str):
-            result_names = [result_names]
+    """Runs a custom single column feature generator kernel in a sandboxed worker.
+    Accepts a single segment or a ColumnarDataSegments batch."""
+    if isinstance(result_names, str):
+        result_names = [result_names]
 
-        num_outputs = len(result_names)
+    if not columns:
+        return DataFrame()
 
-        result = DataFrame()
+    if isinstance(input_data, ColumnarDataSegments):
+        lengths = input_data.lengths
+        column_data = [input_data.column_data(col) for col in columns]
+    else:
         if len(input_data["data"]) > settings.MAX_SEGMENT_LENGTH:
             raise InputParameterException(
                 "Segment size exceeded length {}.".format(settings.MAX_SEGMENT_LENGTH)
             )
+        lengths = np.array([input_data["data"].shape[1]], dtype=np.int64)
+        column_data = [
+            input_data["data"][input_data["columns"].index(col)] for col in columns
+        ]
 
-        for col in columns:
-            feature_names = [col + x for x in result_names]
-            col_index = input_data["columns"].index(col)
-            data = np.ascontiguousarray(input_data["data"][col_index], dtype=np.int16)
-
-            y = np.zeros(num_outputs, dtype=np.float32)
-            params = np.array(in_params, dtype=np.float32)
-            function(data, y, params, len(params), 1, data.shape[0], y.shape[0])
-
-            result = concat(
-                [
-                    result,
-                    DataFrame(copy.deepcopy(y).reshape(1, -1), columns=feature_names),
-                ],
-                axis=1,
-            )
-    except Exception as e:
-        send_end.send(e)
-        return
+    # one kernel call per column of every segment, ordered by column
+    num_segments = lengths.shape[0]
+    segment_offsets = np.cumsum(lengths) - lengths
+    offsets = (
+        np.arange(len(columns))[:, np.newaxis] * lengths.sum() + segment_offsets
+    ).ravel()
+    sizes = np.tile(lengths, len(columns))
+
+    y = np.zeros((offsets.shape[0], len(result_names)), dtype=np.float32)
+    run_sandboxed_batch(
+        function, np.concatenate(column_data), offsets, sizes, y, in_params, 1
+    )
+
+    features = (
+        y.reshape(len(columns), num_segments, len(result_names))
+        .transpose(1, 0, 2)
+        .reshape(num_segments, -1)
+    )
 
-    send_end.send(result.to_dict())
+    return DataFrame(
+        features, columns=[col + x for col in columns for x in result_names]
+    )
 
 
-@run_function_with_timer(settings.CUSTOM_TRANSFORM_CPU_TIME)
 def run_feature_generator_c_multiple_columns_sandboxed(
-    input_data, columns, result_names, in_params, function, send_end
+    input_data, columns, result_names, in_params, function
 ):
-    try:
-        if isinstance(result_names, str):
-            result_names = [result_names]
-        if len(columns) > settings.MAX_COLS:
-            raise Exception("Too Many Input Columns")
+    """Runs a custom multiple column feature generator kernel in a sandboxed worker.
+    Accepts a single segment or a ColumnarDataSegments batch."""
+    if isinstance(result_names, str):
+        result_names = [result_names]
+    if len(columns) > settings.MAX_COLS:
+        raise Exception("Too Many Input Columns")
+
+    num_cols = len(columns)
+    if isinstance(input_data, ColumnarDataSegments):
+        if input_data.lengths.max() > settings.MAX_SEGMENT_LENGTH:
+            raise InputParameterException(
+                "Segment size exceeded length {}.".format(settings.MAX_SEGMENT_LENGTH)
+            )
+        data, offsets = pack_segment_columns(input_data, columns)
+        sizes = input_data.lengths * num_cols
+    else:
         if len(input_data["data"]) > settings.MAX_SEGMENT_LENGTH:
             raise InputParameterException(
                 "Segment size exceeded length {}.".format(settings.MAX_SEGMENT_LENGTH)
             )
-
-        num_outputs = len(result_names)
-
-        result = DataFrame()
-        data = np.array([], dtype=np.int16)
         col_indexes = get_datasegment_col_indexes(input_data, columns)
         data = input_data["data"][col_indexes].flatten()
+        offsets = np.zeros(1, dtype=np.int64)
+        sizes = np.array([data.shape[0]], dtype=np.int64)
 
-        data = np.ascontiguousarray(data, dtype=np.int16)
-        y = np.zeros(num_outputs, dtype=np.float32)
-        params = np.array(in_params, dtype=np.float32)
-        function(data, y, params, len(params), len(columns), data.shape[0], y.shape[0])
-
-        result = DataFrame(copy.deepcopy(y.reshape(1, -1)), columns=result_names)
+    y = np.zeros((offsets.shape[0], len(result_names)), dtype=np.float32)
+    run_sandboxed_batch(function, data, offsets, sizes, y, in_params, num_cols)
 
-    except Exception as e:
-        send_end.send(e)
-        return
-
-    send_end.send(result.to_dict())
+    return DataFrame(y, columns=result_names)
 
 
 def run_feature_generator_c(input_data, columns, result_names, in_params, function):
     if isinstance(result_names, str):
         result_names = [result_names]
 
+    if isinstance(input_data, ColumnarDataSegments):
+        return run_feature_generator_c_batch(
+            input_data, columns, result_names, in_params, function
+        )
+
     num_outputs = len(result_names)
 
     result = DataFrame()
@@ -179,6 +339,12 @@ def run_feature_generator_c_multiple_columns(
         result_names = [result_names]
     if len(columns) > settings.MAX_COLS:
         raise Exception("Too Many Input Columns")
+
+    if isinstance(input_data, ColumnarDataSegments):
+        return run_feature_generator_c_multiple_columns_batch(
+            input_data, columns, result_names, in_params, function
+        )
+
     if input_data["data"].shape[1] > settings.MAX_SEGMENT_LENGTH:
         raise InputParameterException(
             "Segment size exceeded length {}.".format(settings.MAX_SEGMENT_LENGTH)
@@ -203,12 +369,119 @@ def run_feature_generator_c_multiple_columns(
     return result
 
 
+def run_feature_generator_c_batch(
+    input_data, columns, result_names, in_params, function
+):
+    """Batched version of run_feature_generator_c, computes the features of every
+    segment in a ColumnarDataSegments with one kernel call per column."""
+    offsets = input_data.offsets[:-1]
+    lengths = input_data.lengths.astype(np.int32)
+    params = np.array(in_params, dtype=np.float32)
+
+    results = []
+    feature_names = []
+    for col in columns:
+        feature_names.extend([col + x for x in result_names])
+        data = np.ascontiguousarray(input_data.column_data(col), dtype=np.int16)
+
+        y = np.zeros((len(input_data), len(result_names)), dtype=np.float32)
+        run_batch(function, data, offsets, lengths, y, params, 1)
+
+        results.append(y)
+
+    return DataFrame(np.hstack(results), columns=feature_names)
+
+
+def run_feature_generator_c_multiple_columns_batch(
+    input_data, columns, result_names, in_params, function
+):
+    """Batched version of run_feature_generator_c_multiple_columns."""
+    lengths = input_data.lengths
+    if lengths.max() > settings.MAX_SEGMENT_LENGTH:
+        raise InputParameterException(
+            "Segment size exceeded length {}.".format(settings.MAX_SEGMENT_LENGTH)
+        )
+
+    num_cols = len(columns)
+    data, packed_offsets = pack_segment_columns(input_data, columns)
+
+    y = np.zeros((len(input_data), len(result_names)), dtype=np.float32)
+    params = np.array(in_params, dtype=np.float32)
+    run_batch(
+        function, data, packed_offsets, lengths.astype(np.int32), y, params, num_cols
+    )
+
+    return DataFrame(y, columns=result_names)
+
+
+def pack_segment_columns(input_data, columns):
+    """Packs the selected columns of each segment in a ColumnarDataSegments column
+    major and back to back, so every segment is passed to a kernel in the same layout
+    as the per segment call. Returns the packed data and the offset of each segment."""
+    lengths = input_data.lengths
+    num_cols = len(columns)
+    selected = np.ascontiguousarray(
+        input_data.data[get_datasegment_col_indexes(input_data, columns)],
+        dtype=np.int16,
+    )
+
+    # packed position -> (segment, column, row) -> position in the selected buffer
+    segment_index = np.repeat(np.arange(len(input_data)), lengths * num_cols)
+    packed_offsets = input_data.offsets[:-1] * num_cols
+    position = np.arange(segment_index.shape[0]) - packed_offsets[segment_index]
+    segment_lengths = lengths[segment_index]
+    source = (
+        (position // segment_lengths) * selected.shape[1]
+        + input_data.offsets[:-1][segment_index]
+        + position % segment_lengths
+    )
+
+    return np.ascontiguousarray(selected.ravel()[source]), packed_offsets
+
+
+def run_batch(function, data, offsets, lengths, out_array, params, num_cols):
+    """Runs a feature generator wrapper over every segment stored in data, writing
+    the features of segment i to out_array[i]. Uses a single call into
+    libfg_algorithms when it provides fg_batch_w."""
+    kernel = getattr(libcd, function.__name__, None) if HAS_BATCH_KERNEL else None
+
+    if kernel is not None:
+        libcd.fg_batch_w(
+            cast(kernel, c_void_p),
+            data,
+            np.ascontiguousarray(offsets, dtype=np.int64),
+            np.ascontiguousarray(lengths, dtype=np.int32),
+            len(lengths),
+            out_array,
+            out_array.shape[1],
+            params,
+            len(params),
+            num_cols,
+        )
+        return
+
+    for index, offset in enumerate(offsets):
+        function(
+            data[offset : offset + lengths[index] * num_cols],
+            out_array[index],
+            params,
+            num_cols,
+            lengths[index],
+        )
+
+
 # input type for the feature generator functions
 # must be a double array, with single dimension that is contiguous
 array_1d_int = npct.ndpointer(dtype=np.int16, ndim=1, flags="CONTIGUOUS")
 
 array_1d_float = npct.ndpointer(dtype=np.float32, ndim=1, flags="CONTIGUOUS")
 
+array_1d_int32 = npct.ndpointer(dtype=np.int32, ndim=1, flags="CONTIGUOUS")
+
+array_1d_int64 = npct.ndpointer(dtype=np.int64, ndim=1, flags="CONTIGUOUS")
+
+array_2d_float = npct.ndpointer(dtype=np.float32, ndim=2, flags="C_CONTIGUOUS")
+
 # Our windows build agent doesn't build this library file.
 # This allows it to still load our library (we can look into other solutions)
 
@@ -229,6 +502,23 @@ if os.path.exists(
     )
 else:
     libcd = EmptyLibrary()
+
+# Batched Feature Generator, older builds of the library do not provide it
+HAS_BATCH_KERNEL = not isinstance(libcd, EmptyLibrary) and hasattr(libcd, "fg_batch_w")
+if HAS_BATCH_KERNEL:
+    libcd.fg_batch_w.restype = None
+    libcd.fg_batch_w.argtypes = [
+        c_void_p,
+        array_1d_int,
+        array_1d_int64,
+        array_1d_int32,
+        c_int,
+        array_2d_float,
+        c_int,
+        array_1d_float,
+        c_int,
+        c_int,
+    ]
 # Transpose Signal
 libcd.fg_transpose_signal_w.restype = None
 libcd.fg_transpose_signal_w.argtypes = [
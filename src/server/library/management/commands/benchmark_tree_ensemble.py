@@ -0,0 +1,151 @@
+"""
+Copyright 2017-2024 SensiML Corporation
+
+This file is part of SensiML™ Piccolo AI™.
+
+SensiML Piccolo AI is free software: you can redistribute it and/or
+modify it under the terms of the GNU Affero General Public License
+as published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+SensiML Piccolo AI is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public
+License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+
+import numpy as np
+from django.core.management import BaseCommand
+from library.classifiers.boosted_tree_ensemble import (
+    FlatBoostedTreeEnsemble,
+    boosted_tree_ensemble_classification,
+)
+from library.classifiers.decision_tree_ensemble import (
+    FlatTreeEnsemble,
+    ensemble_classification,
+)
+
+
+def random_decision_trees(rng, num_trees, depth, num_features, num_classes):
+    """Complete random trees in the DecisionTreeEnsemble model format."""
+    num_internal = 2**depth - 1
+    num_nodes = 2 ** (depth + 1) - 1
+
+    model_parameters = []
+    for _ in range(num_trees):
+        children = np.arange(num_internal)
+        model_parameters.append(
+            {
+                "children_left": (2 * children + 1).tolist()
+                + [0] * (num_nodes - num_internal),
+                "children_right": (2 * children + 2).tolist()
+                + [0] * (num_nodes - num_internal),
+                "threshold": rng.randint(0, 256, num_internal).tolist()
+                + [0] * (num_nodes - num_internal),
+                "feature": rng.randint(0, num_features, num_internal).tolist()
+                + rng.randint(0, num_classes, num_nodes - num_internal).tolist(),
+                "classes": list(range(num_classes)),
+                "feature_importances": [1.0 / num_features] * num_features,
+            }
+        )
+
+    return model_parameters
+
+
+def random_boosted_trees(rng, num_trees, depth, num_features):
+    """Complete random trees in the BoostedTreeEnsemble (xgboost dump) format."""
+    num_internal = 2**depth - 1
+    num_nodes = 2 ** (depth + 1) - 1
+
+    model_parameters = []
+    for tree in range(num_trees):
+        for node in range(num_nodes):
+            leaf = node >= num_internal
+            model_parameters.append(
+                {
+                    "Tree": tree,
+                    "Node": node,
+                    "ID": "{}-{}".format(tree, node),
+                    "Feature": (
+                        "Leaf" if leaf else "f{}".format(rng.randint(0, num_features))
+                    ),
+                    "Split": None if leaf else float(rng.randint(0, 256)),
+                    "Yes": None if leaf else "{}-{}".format(tree, 2 * node + 1),
+                    "No": None if leaf else "{}-{}".format(tree, 2 * node + 2),
+                    "Missing": None if leaf else "{}-{}".format(tree, 2 * node + 1),
+                    "Gain": float(rng.uniform(-1, 1)),
+                    "Cover": 1.0,
+                }
+            )
+
+    return model_parameters
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the speed of the per vector C tree ensemble classification with the "
+        "flat numpy tree ensembles on random models and feature vectors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vectors", type=int, default=100000)
+        parser.add_argument("--trees", type=int, default=20)
+        parser.add_argument("--depth", type=int, default=6)
+        parser.add_argument("--features", type=int, default=20)
+        parser.add_argument("--classes", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def benchmark(self, name, reference, flat, feature_vectors):
+        start = time.time()
+        expected = reference(feature_vectors.tolist())
+        reference_time = time.time() - start
+
+        start = time.time()
+        y_pred = flat(feature_vectors)
+        flat_time = time.time() - start
+
+        if not np.array_equal(expected, y_pred):
+            self.stdout.write(
+                self.style.ERROR("{}: numpy results differ from C".format(name))
+            )
+
+        self.stdout.write(
+            "{}: C {:.3f}s, numpy {:.3f}s, speedup {:.1f}x".format(
+                name, reference_time, flat_time, reference_time / flat_time
+            )
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.RandomState(options["seed"])
+        feature_vectors = rng.randint(0, 256, (options["vectors"], options["features"]))
+
+        model_parameters = random_decision_trees(
+            rng,
+            options["trees"],
+            options["depth"],
+            options["features"],
+            options["classes"],
+        )
+        tree_ensemble = FlatTreeEnsemble(model_parameters)
+        self.benchmark(
+            "DecisionTreeEnsemble",
+            lambda x: ensemble_classification(model_parameters, x),
+            tree_ensemble.classify,
+            feature_vectors,
+        )
+
+        boosted_model_parameters = random_boosted_trees(
+            rng, options["trees"], options["depth"], options["features"]
+        )
+        boosted_tree_ensemble = FlatBoostedTreeEnsemble(boosted_model_parameters)
+        self.benchmark(
+            "BoostedTreeEnsemble",
+            lambda x: boosted_tree_ensemble_classification(boosted_model_parameters, x),
+            boosted_tree_ensemble.classify,
+            feature_vectors,
+        )
@@ -33,6 +33,7 @@ class Command(BaseCommand):
         directories = [
             settings.SERVER_DATA_ROOT,
             settings.SERVER_CACHE_ROOT,
+            settings.SERVER_STEP_CACHE_ROOT,
             settings.SERVER_CODEGEN_ROOT,
             settings.SERVER_QUERY_ROOT,
             settings.SERVER_FEATURE_FILE_ROOT,
@@ -18,7 +18,6 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 from library.model_generators.model_generator import ModelGenerator
-from numpy import array
 from sklearn.linear_model import LinearRegression
 
 
@@ -63,13 +62,6 @@ class TrainLinearRegressionOLS(ModelGenerator):
 
         return model_data
 
-    def _test(self, data):
-        """Package set of vectors for the simulator and recognize the tensors returns the stats of the recogntion"""
-        test_data = array(data)
-        reco_vector_list = self._package(test_data)
-
-        return self._classifier.recognize_vectors(reco_vector_list)
-
     def _train(self, train_data, validate_data=None, test_data=None):
         reg = LinearRegression(**self._params)
         label = self._config.get("label_column")
@@ -18,23 +18,38 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 import logging
+import mmap
 
+import billiard as multiprocessing
 import engine.base.utils as utils
+import numpy as np
+from django.conf import settings
 from engine.base.utils import clean_results
 from library.classifiers.classifier import Classifier
 from library.model_validation.validation_method import ValidationMethod
 from logger.log_handler import LogHandler
 from numpy import array
+from pandas import DataFrame, Index
 
 logger = LogHandler(logging.getLogger(__name__))
 
+# Model generator and shared feature arrays inherited by forked fold workers
+_fold_context = {}
+
 
 class ModelGeneratorError(Exception):
     pass
 
 
 class ModelGenerator(object):
-    """Base class for model generators."""
+    """Base class for model generators.
+
+    Generators whose training is self contained and safe to run in a forked process
+    set supports_parallel_folds, their folds are trained by a pool of
+    MODEL_GENERATOR_FOLD_WORKERS processes when it is larger than 1.
+    """
+
+    supports_parallel_folds = False
 
     def __init__(
         self,
@@ -123,13 +138,20 @@ class ModelGenerator(object):
 
         self._classifier.load_model(model_parameters)
 
+    def _get_labels(self, data):
+        """returns the labels in the last column of a packaged data array"""
+        if self._config.get("estimator_type", "classification") == "regression":
+            return data[:, -1].tolist()
+
+        return data[:, -1].astype(int).tolist()
+
     def _test(self, data):
         """recognizes a set of feature vectors using a loaded model on the hardware"""
         test_data = array(data)
 
-        reco_vector_list = self._package(test_data)
+        result = self._classifier.recognize(test_data[:, :-1])
 
-        stats = self._classifier.recognize_vectors(reco_vector_list)
+        stats = self._classifier.compute_statistics(result, self._get_labels(test_data))
 
         return stats
 
@@ -197,45 +219,140 @@ class ModelGenerator(object):
                 compute_feature_stats(test_data)
             )
 
-    def run(self):
-        """calls the algorithm, runs validation, stores results"""
+    def _run_fold(self, key, train_data, validate_data, test_data):
+        """trains the model of a fold and stores its parameters and metrics"""
 
-        self._initialize_validation_method()
+        # Run the traning algorithm
+        model_parameters, training_metrics = self._train(
+            train_data, validate_data=validate_data, test_data=test_data
+        )
 
-        # Generate models and collect results
+        # store the model data
+        self._store_model_data(
+            key,
+            parameters=model_parameters,
+            training_metrics=training_metrics,
+        )
+
+        # set the model as the current loadable model
+        self._write(model_parameters)
+
+        # get the metrics for the train, test and validate data sets for this model
+        self._get_classification_and_metrics(
+            key,
+            train_data=train_data,
+            validate_data=validate_data,
+            test_data=test_data,
+        )
+
+    def _get_fold_key(self, fold):
+        fold_name = (
+            self._validation_method.name if self._validation_method.name else fold
+        )
+
+        return "Fold {0}".format(fold_name)
+
+    def _get_fold_workers(self):
+        if not self.supports_parallel_folds:
+            return 0
+
+        return min(
+            settings.MODEL_GENERATOR_FOLD_WORKERS,
+            self._validation_method.number_of_sets,
+        )
+
+    def _run_folds(self):
         for fold in range(self._validation_method.number_of_sets):
             (
                 train_data,
                 validate_data,
                 test_data,
             ) = self._validation_method.next_validation()
-            fold_name = (
-                self._validation_method.name if self._validation_method.name else fold
+
+            self._run_fold(
+                self._get_fold_key(fold), train_data, validate_data, test_data
+            )
+
+    def _run_parallel_folds(self, processes):
+        """Trains the folds in a pool of forked processes. The feature data is written
+        once to shared memory and each worker slices the rows of its fold from it, the
+        results are merged in fold order so they match a sequential run."""
+        data = self._validation_method.recall_data()[0]
+
+        arrays = [np.asarray(data[column]) for column in data.columns]
+        arrays.append(np.asarray(data.index))
+        if any(column_array.dtype.kind not in "biuf" for column_array in arrays):
+            logger.debug(
+                {
+                    "message": "Training folds sequentially, data is not numeric",
+                    "log_type": "PID",
+                    "UUID": self.pipeline_id,
+                }
+            )
+            return self._run_folds()
+
+        tasks = []
+        for fold in range(self._validation_method.number_of_sets):
+            validation_set = self._validation_method.next_validation_set()
+            tasks.append(
+                (
+                    self._get_fold_key(fold),
+                    validation_set.train,
+                    validation_set.validate,
+                    validation_set.test,
+                )
             )
-            key = "Fold {0}".format(fold_name)
 
-            # Run the traning algorithm
-            model_parameters, training_metrics = self._train(
-                train_data, validate_data=validate_data, test_data=test_data
+        # anonymous shared memory is inherited by the forked workers without a copy
+        offsets = np.cumsum(
+            [0] + [-(-column_array.nbytes // 64) * 64 for column_array in arrays]
+        )
+        buffer = np.frombuffer(mmap.mmap(-1, max(int(offsets[-1]), 1)), dtype=np.uint8)
+        shared_arrays = []
+        for offset, column_array in zip(offsets, arrays):
+            shared_array = (
+                buffer[offset : offset + column_array.nbytes]
+                .view(column_array.dtype)
+                .reshape(column_array.shape)
             )
+            shared_array[...] = column_array
+            shared_arrays.append(shared_array)
 
-            # store the model data
+        _fold_context.update(
+            generator=self, arrays=shared_arrays, columns=list(data.columns)
+        )
+        try:
+            pool = multiprocessing.Pool(processes=processes)
+            try:
+                models = pool.map(run_parallel_fold, tasks)
+                pool.close()
+            except Exception:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        finally:
+            _fold_context.clear()
+
+        for (key, _, _, _), (parameters, training_metrics, model) in zip(tasks, models):
             self._store_model_data(
                 key,
-                parameters=model_parameters,
+                parameters=parameters,
+                model_result_template=model,
                 training_metrics=training_metrics,
             )
 
-            # set the model as the current loadable model
-            self._write(model_parameters)
+    def run(self):
+        """calls the algorithm, runs validation, stores results"""
+
+        self._initialize_validation_method()
 
-            # get the metrics for the train, test and validate data sets for this model
-            self._get_classification_and_metrics(
-                key,
-                train_data=train_data,
-                validate_data=validate_data,
-                test_data=test_data,
-            )
+        # Generate models and collect results
+        processes = self._get_fold_workers()
+        if processes > 1:
+            self._run_parallel_folds(processes)
+        else:
+            self._run_folds()
 
         test_results = [
             (
@@ -270,6 +387,52 @@ class ModelGenerator(object):
         self.results["metrics"] = aggregate_metrics.to_dict("records")
 
 
+def get_shared_fold_data(arrays, columns, indices):
+    """Builds the DataFrame of the rows at indices from the shared column arrays, the
+    same frame ValidationMethod.next_validation slices from the feature data."""
+    indices = np.asarray(indices, dtype=np.int64)
+
+    return DataFrame(
+        {
+            column: column_array[indices]
+            for column, column_array in zip(columns, arrays)
+        },
+        index=Index(arrays[-1][indices]),
+        columns=columns,
+    )
+
+
+def run_parallel_fold(task):
+    """Trains and evaluates a fold in a forked worker. The classifier costs are looked
+    up in the database, so the model data is stored by the parent process."""
+    key, train, validate, test = task
+    generator = _fold_context["generator"]
+    arrays = _fold_context["arrays"]
+    columns = _fold_context["columns"]
+
+    train_data = get_shared_fold_data(arrays, columns, train)
+    validate_data = get_shared_fold_data(arrays, columns, validate)
+    test_data = get_shared_fold_data(arrays, columns, test)
+
+    model_parameters, training_metrics = generator._train(
+        train_data, validate_data=validate_data, test_data=test_data
+    )
+
+    generator.results = {
+        "models": {key: generator._get_model_results_template()},
+        "metrics": {},
+    }
+    generator._write(model_parameters)
+    generator._get_classification_and_metrics(
+        key,
+        train_data=train_data,
+        validate_data=validate_data,
+        test_data=test_data,
+    )
+
+    return model_parameters, training_metrics, generator.results["models"][key]
+
+
 def compute_outliers(d):
     outliers = {}
     for feature in d.columns:
@@ -137,11 +137,14 @@ class PMEBase(ModelGenerator):
         """Package set of vectors for the simulator and recognize the tensor with
         KBEngine."""
         test_data = array(data)
-        reco_vector_list = self._package(test_data)
 
         # As a precaution, reset the classification mode and distance mode before recognizing
         self._set_classifier_settings()
 
-        stats = self._classifier.recognize_vectors(reco_vector_list)
+        result = self._classifier.recognize(test_data[:, :-1].astype(int))
+
+        stats = self._classifier.compute_statistics(
+            result, test_data[:, -1].astype(int).tolist()
+        )
 
         return stats
@@ -23,6 +23,8 @@ from xgboost import XGBClassifier
 
 
 class TrainGradientBoosting(ModelGenerator):
+    supports_parallel_folds = True
+
     def __init__(
         self,
         config,
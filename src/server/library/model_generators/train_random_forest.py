@@ -18,13 +18,15 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 """
 
 from library.model_generators.model_generator import ModelGenerator
-from numpy import argmax, array
+from numpy import argmax
 from sklearn.ensemble import RandomForestClassifier
 
 
 class TrainRandomForest(ModelGenerator):
     """Creates optimal order-agnostic training set and trains with the resulting vector."""
 
+    supports_parallel_folds = True
+
     def __init__(
         self,
         config,
@@ -50,6 +52,7 @@ class TrainRandomForest(ModelGenerator):
             "n_estimators": config.get("n_estimators", 10),
             "max_depth": config.get("max_depth", 3),
             "bootstrap": "True",
+            "random_state": config.get("random_state"),
         }
 
     def _package_model_parameters(self, models):
@@ -72,13 +75,6 @@ class TrainRandomForest(ModelGenerator):
 
         return data
 
-    def _test(self, data):
-        """Package set of vectors for the simulator and recognize the tensors returns the stats of the recogntion"""
-        test_data = array(data)
-        reco_vector_list = self._package(test_data)
-
-        return self._classifier.recognize_vectors(reco_vector_list)
-
     def _train(self, train_data, validate_data=None, test_data=None):
 
         clf = RandomForestClassifier(**self._params)
@@ -350,7 +350,7 @@ class ValidationMethod(object):
         if not number_of_features:
             number_of_features = len(self.feature_columns)
         columns_to_return = list(range(number_of_features)) + [-1]
-        self._current_set = next(self._sets_iterator)
+        self.next_validation_set()
         train_data = self._all_data.iloc[self._current_set.train, columns_to_return]
         validate_data = self._all_data.iloc[
             self._current_set.validate, columns_to_return
@@ -358,6 +358,16 @@ class ValidationMethod(object):
         test_data = self._all_data.iloc[self._current_set.test, columns_to_return]
         return train_data, validate_data, test_data
 
+    def next_validation_set(self):
+        """
+        Advances to the next validation set without slicing the data.
+        Raises a StopIteration exception if there are no further validation sets.
+        :return: the ValidationSet holding the row indices of the next validation set
+        """
+        self._current_set = next(self._sets_iterator)
+
+        return self._current_set
+
     def recall_data(self, number_of_features=0):
         if not number_of_features:
             number_of_features = len(self.feature_columns)
@@ -23,6 +23,8 @@ from pandas import DataFrame
 
 from library.classifiers.boosted_tree_ensemble import (
     BoostedTreeEnsemble,
+    FlatBoostedTreeEnsemble,
+    boosted_tree_ensemble_classification,
     compute_cost,
     get_tree_ensemble,
 )
@@ -232,6 +234,19 @@ class TestBoostedTreeEnseble:
 
         assert results["accuracy"] == 100.0
 
+    def test_flat_tree_ensemble(self, model_parameters):
+
+        feature_vectors = np.random.RandomState(0).randint(0, 256, (1000, 3))
+
+        tree_ensemble = FlatBoostedTreeEnsemble(model_parameters)
+
+        assert np.array_equal(
+            tree_ensemble.classify(feature_vectors),
+            boosted_tree_ensemble_classification(
+                model_parameters, feature_vectors.tolist()
+            ),
+        )
+
     def test_get_tree_ensemble(self, model_parameters):
 
         BoostedTreeEnsemble()
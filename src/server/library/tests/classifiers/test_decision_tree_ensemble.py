@@ -17,8 +17,13 @@ You should have received a copy of the GNU Affero General Public
 License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses/>.
 """
 
+import numpy as np
 import pytest
-from library.classifiers.decision_tree_ensemble import DecisionTreeEnsemble
+from library.classifiers.decision_tree_ensemble import (
+    DecisionTreeEnsemble,
+    FlatTreeEnsemble,
+    ensemble_classification,
+)
 
 pytestmark = pytest.mark.django_db  # All tests use db
 
@@ -75,6 +80,54 @@ def model_parameters():
 
 
 class TestDecisionTreeEnsemble:
+    def test_flat_tree_ensemble(self, model_parameters):
+        feature_vectors = np.random.RandomState(0).randint(0, 256, (1000, 6))
+
+        tree_ensemble = FlatTreeEnsemble(model_parameters)
+
+        assert np.array_equal(
+            tree_ensemble.classify(feature_vectors),
+            ensemble_classification(model_parameters, feature_vectors.tolist()),
+        )
+
+    def test_recognize_vectors(self, model_parameters):
+        feature_vectors = np.random.RandomState(1).randint(0, 256, (100, 6))
+        y_pred = ensemble_classification(model_parameters, feature_vectors.tolist())
+
+        classifier = DecisionTreeEnsemble()
+        classifier.load_model(model_parameters)
+        results = classifier.recognize_vectors(
+            [
+                {"Vector": vector, "Category": int(category)}
+                for vector, category in zip(feature_vectors.tolist(), y_pred)
+            ]
+        )
+
+        assert results["ProperClassificationPercent"] == 100.0
+
+    def test_recognize(self, model_parameters):
+        feature_vectors = np.random.RandomState(2).randint(0, 256, (50, 6))
+        y_pred = ensemble_classification(model_parameters, feature_vectors.tolist())
+
+        classifier = DecisionTreeEnsemble()
+        classifier.load_model(model_parameters)
+        result = classifier.recognize(feature_vectors)
+
+        assert result.categories.tolist() == list(y_pred)
+        assert result.num_features == 6
+        assert result.to_vector_dicts()[0] == {
+            "CategoryVector": int(y_pred[0]),
+            "DistanceVector": [0],
+            "NIDVector": [],
+        }
+
+        vector_dicts = [{"Vector": vector, "Category": 1} for vector in feature_vectors]
+        assert classifier.recognize_vectors(
+            vector_dicts, include_predictions=True
+        ) == classifier.compute_statistics(
+            result, [1] * len(feature_vectors), include_predictions=True
+        )
+
     @pytest.mark.django_db
     def test_compute_cost(self, model_parameters, loaddata):
         loaddata("test_classifier_costs")
@@ -19,6 +19,10 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 # coding=utf-8
 
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
 from library.classifiers.pme import PME
 
 MAX_AIF = 1000
@@ -105,3 +109,103 @@ class TestPME:
         assert results[0].category == 1
         assert results[0].distance == 0
         assert results[0].pattern_id == 0
+
+    @pytest.mark.parametrize(
+        "classifier_mode", [PME.CLASSIF_MODE_RBF, PME.CLASSIF_MODE_KNN]
+    )
+    @pytest.mark.parametrize("distance_mode", [PME.DIST_MODE_L1, PME.DIST_MODE_LSUP])
+    def test_recognize_batch(self, classifier_mode, distance_mode):
+        rng = np.random.RandomState(0)
+
+        pme = PME()
+        pme.set_max_aif(MAX_AIF)
+        pme.initialize_model(100, 300)
+        pme.set_classification_mode(classifier_mode)
+        pme.set_distance_mode(distance_mode)
+
+        for _ in range(20):
+            vector = rng.randint(0, 256, 300)
+            vector[rng.rand(300) < 0.5] = 0
+            pme._learn_vector(0, vector.tolist(), int(rng.randint(1, 4)))
+
+        # includes duplicated patterns (distance ties), vectors outside of every
+        # influence field and L1 distances that do not fit in 16 bits
+        vectors = np.vstack(
+            [
+                np.array([x["Vector"] for x in pme.dump_model()[:5]]),
+                rng.randint(0, 256, (50, 300)),
+                np.full((2, 300), 255),
+            ]
+        ).astype(np.uint8)
+
+        categories, distances, pattern_ids = pme.recognize_batch(vectors)
+
+        for index, vector in enumerate(vectors.tolist()):
+            result = pme._recognize_vector(0, vector)[0]
+            assert categories[index] == result.category
+            assert distances[index] == result.distance
+            assert pattern_ids[index] == result.pattern_id
+
+    def test_recognize(self):
+        pme = PME()
+        pme.set_max_aif(100)
+        pme.initialize_model(10, 2)
+        pme._learn_vector(0, [10, 10], 1)
+        pme._learn_vector(0, [200, 200], 2)
+
+        vectors = np.array([[10, 12], [200, 200], [100, 100]])
+        result = pme.recognize(vectors, desired_responses=2)
+
+        assert result.categories.tolist() == [[1, 0], [2, 0], [0, 0]]
+        assert result.distances.tolist() == [[2, 0], [0, 0], [0, 0]]
+        assert result.ids.tolist() == [[0, 0], [1, 0], [0, 0]]
+        assert result.predictions.tolist() == [1, 2, 0]
+
+        vector_dicts = [
+            {"Vector": vector, "Category": category, "DesiredResponses": responses}
+            for vector, category, responses in zip(
+                vectors.tolist(), [1, 2, 1], [2, 1, 1]
+            )
+        ]
+        statistics = pme.recognize_vectors(vector_dicts)
+
+        assert [x["CategoryVector"] for x in vector_dicts] == [[1, 0], [2], [0]]
+        assert [x["NIDVector"] for x in vector_dicts] == [[0, 0], [1], [0]]
+        assert statistics == pme.compute_statistics(result, [1, 2, 1])
+        assert statistics["ConfusionMatrix"][1] == {1: 1, 2: 0, "UNC": 0, "UNK": 1}
+
+    def test_recognize_after_loading_another_model(self):
+        first_model = [
+            {"Vector": [50, 14], "Category": 3, "AIF": 9},
+            {"Vector": [74, 64], "Category": 2, "AIF": 6},
+        ]
+        second_model = [
+            {"Vector": [5 * i, 50 + 3 * i], "Category": 1 + i % 2, "AIF": 20}
+            for i in range(20)
+        ]
+        vectors = np.array([[50, 14], [74, 64]])
+
+        first = PME()
+        first.initialize_model(len(first_model) + 1, 2)
+        first.load_model(first_model)
+
+        second = PME()
+        second.initialize_model(len(second_model) + 1, 2)
+        second.load_model(second_model)
+
+        # libpmeclassifier recognizes with the last initialized pattern database
+        # unless the PME selects its own
+        result = first.recognize(vectors)
+        assert result.predictions.tolist() == [3, 2]
+        assert result.classes == [2, 3]
+
+        with ThreadPoolExecutor(4) as executor:
+            results = list(
+                executor.map(
+                    lambda pme: pme.recognize(vectors).predictions.tolist(),
+                    [first, second] * 20,
+                )
+            )
+
+        assert results[::2] == [[3, 2]] * 20
+        assert results[1::2] == [second.recognize(vectors).predictions.tolist()] * 20
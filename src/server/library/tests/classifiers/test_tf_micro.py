@@ -201,3 +201,32 @@ def package(data):
         vector_list.append(pkg_dict)
 
     return vector_list
+
+
+def test_predict_batch(model_parameters_regression, feature_vectors_regression):
+    feature_vectors = feature_vectors_regression.values[:, :1].astype(int)
+
+    classifier = TensorFlowMicro(config={})
+    classifier.load_model(model_parameters_regression)
+    outputs = classifier.predict(feature_vectors)
+
+    assert classifier._batch_inference
+    assert outputs.shape == (len(feature_vectors), 1)
+
+    single = TensorFlowMicro(config={})
+    single.load_model(model_parameters_regression)
+    for feature_vector, output in zip(feature_vectors, outputs):
+        assert np.allclose(single.predict([feature_vector]), output)
+
+
+def test_predict_unbatched_model(
+    model_parameters_classification, feature_vectors_classification
+):
+    feature_vectors = feature_vectors_classification.values[:, :-1]
+
+    classifier = TensorFlowMicro(config={})
+    classifier.load_model(model_parameters_classification)
+    outputs = classifier.predict(feature_vectors)
+
+    assert not classifier._batch_inference
+    assert classifier.classify(outputs).tolist() == [1, 1, 2, 2]
@@ -19,18 +19,20 @@ License along with SensiML Piccolo AI. If not, see <https://www.gnu.org/licenses
 
 import time
 
+import pytest
 from datamanager.datasegments import dataframe_to_datasegments
 from library.core_functions.fg_algorithms import (
+    get_batch_time_limit,
     run_feature_generator_c_multiple_columns_sandboxed,
     run_feature_generator_c_sandboxed,
 )
-from pandas import DataFrame
+from pandas import DataFrame, concat
 
 
 def sleep_function(
     in_array, out_array, params, num_params, num_cols, num_rows, num_results
 ):
-    time.sleep(params[0])
+    time.sleep(float(params[0]))
     return
 
 
@@ -101,3 +103,109 @@ def test_run_feature_generator_c_multiple_columns_sandboxed():
         failed = True
 
     assert failed
+
+
+def test_run_feature_generator_c_batch():
+    from datamanager.datasegments import ColumnarDataSegments, DataSegments
+    from library.core_functions.feature_generators import fg_stats
+    from pandas import concat
+
+    data = DataFrame(
+        {
+            "X": list(range(-20, 30)),
+            "Y": [1] * 20 + [-2] * 15 + [3] * 10 + [4] * 5,
+            "Subject": ["A"] * 12 + ["B"] * 30 + ["C"] * 8,
+        },
+        columns=["X", "Y", "Subject"],
+    )
+
+    segments = dataframe_to_datasegments(
+        data, data_columns=["X", "Y"], group_columns=["Subject"]
+    )
+    columnar = ColumnarDataSegments.from_segments(segments)
+
+    for function in [fg_stats.fg_stats_mean, fg_stats.fg_stats_sum]:
+        expected = concat(
+            [function(segment, columns=["X", "Y"]) for segment in segments]
+        ).reset_index(drop=True)
+        result = function(columnar, columns=["X", "Y"])
+
+        assert expected.equals(result)
+
+    expected = DataSegments(segments).apply(fg_stats.fg_stats_mean, columns=["X"])
+    result = DataSegments(columnar).apply(fg_stats.fg_stats_mean, columns=["X"])
+
+    assert expected.equals(result)
+
+
+def sum_function(
+    in_array, out_array, params, num_params, num_cols, num_rows, num_results
+):
+    out_array[0] = in_array.sum() * params[0]
+    out_array[1] = num_rows
+    return
+
+
+def test_run_feature_generator_c_sandboxed_batch(settings):
+    from datamanager.datasegments import ColumnarDataSegments
+
+    settings.CUSTOM_TRANSFORM_BATCH_SIZE = 2
+
+    data = DataFrame(
+        {
+            "X": list(range(-20, 30)),
+            "Y": [1] * 20 + [-2] * 15 + [3] * 10 + [4] * 5,
+            "Subject": ["A"] * 12 + ["B"] * 30 + ["C"] * 8,
+        },
+        columns=["X", "Y", "Subject"],
+    )
+
+    segments = dataframe_to_datasegments(
+        data, data_columns=["X", "Y"], group_columns=["Subject"]
+    )
+    columnar = ColumnarDataSegments.from_segments(segments)
+
+    for function, columns in [
+        (run_feature_generator_c_sandboxed, ["X", "Y"]),
+        (run_feature_generator_c_multiple_columns_sandboxed, ["Y", "X"]),
+    ]:
+        expected = concat(
+            [
+                function(segment, columns, ["_sum", "_rows"], [2], sum_function)
+                for segment in segments
+            ]
+        ).reset_index(drop=True)
+        result = function(columnar, columns, ["_sum", "_rows"], [2], sum_function)
+
+        assert expected.equals(result)
+
+
+def test_sandboxed_batch_time_limit(settings):
+    from datamanager.datasegments import ColumnarDataSegments
+
+    settings.CUSTOM_TRANSFORM_CPU_TIME = 1
+    settings.CUSTOM_TRANSFORM_BATCH_SIZE = 4
+    settings.CUSTOM_TRANSFORM_MAX_BATCH_TIME = 0
+
+    assert get_batch_time_limit(4) == 4
+    settings.CUSTOM_TRANSFORM_MAX_BATCH_TIME = 2
+    assert get_batch_time_limit(4) == 2
+    assert get_batch_time_limit(1) == 1
+
+    data = DataFrame({"X": list(range(12)), "Subject": ["A", "B", "C"] * 4})
+    columnar = ColumnarDataSegments.from_segments(
+        dataframe_to_datasegments(data, data_columns=["X"], group_columns=["Subject"])
+    )
+
+    # every call is within its budget although the batch takes longer than one call
+    settings.CUSTOM_TRANSFORM_MAX_BATCH_TIME = 0
+    result = run_feature_generator_c_sandboxed(
+        columnar, ["X"], ["_out"], [0.5], sleep_function
+    )
+    assert len(result) == 3
+
+    settings.CUSTOM_TRANSFORM_MAX_BATCH_TIME = 1
+    with pytest.raises(Exception, match="Exceeded"):
+        run_feature_generator_c_sandboxed(
+            columnar, ["X"], ["_out"], [0.5], sleep_function
+        )
@@ -187,3 +187,43 @@ class TestTrainRandomForest:
         model_generator._classifier.load_model(model_parameters)
 
         model_generator._test(feature_vectors_2k)
+
+    @pytest.mark.django_db
+    def test_train_random_forest_parallel_folds(
+        self, feature_vectors, settings, loaddata
+    ):
+        loaddata("test_classifier_costs")
+        config = {
+            "classifier": "Decision Tree Ensemble",
+            "validation_method": "Stratified K-Fold Cross-Validation",
+            "optimizer": "Random Forest",
+            "label_column": "Label",
+            "number_of_folds": 3,
+            "max_depth": 5,
+            "n_estimators": 10,
+            "random_state": 0,
+        }
+
+        feature_vectors.columns = ["gen_0001", "gen_0002", "gen_0003", "Label"]
+
+        results = []
+        for fold_workers in [0, 3]:
+            settings.MODEL_GENERATOR_FOLD_WORKERS = fold_workers
+            _, _, model_generator = self.setup_model(config, feature_vectors.copy())
+            model_generator.run()
+            results.append(model_generator.results)
+
+        sequential, parallel = results
+
+        # folds are merged in order and hold the same data as a sequential run
+        assert list(parallel["models"]) == list(sequential["models"])
+        for key, model in parallel["models"].items():
+            assert model["feature_statistics"] == (
+                sequential["models"][key]["feature_statistics"]
+            )
+            assert model["metrics"]["validation"]["accuracy"] == (
+                sequential["models"][key]["metrics"]["validation"]["accuracy"]
+            )
+            assert len(model["parameters"]) == 10
+
+        assert len(parallel["metrics"]) == len(sequential["metrics"])
@@ -127,6 +127,10 @@ env = environ.Env(
     BONSAI=(str, "/home/sml-app/EdgeML/"),
     CLASSIFIER_LIBS=(str, "/home/sml-app/install/lib/"),
     MAX_BATCH_SIZE=(int, 2),
+    CACHE_FILE_FORMAT=(str, "csv"),
+    STEP_CACHE_MAX_SIZE=(int, 0),
+    MODEL_CACHE_MAX_SIZE=(int, 500),
+    MODEL_GENERATOR_FOLD_WORKERS=(int, 0),
     USE_S3_BUCKET=(bool, False),
     SLACK_WEBHOOK_API_URL=(str, ""),
     ACTIVATION_CODE_AUTH=(str, "11111"),
@@ -156,6 +160,10 @@ env = environ.Env(
     RANDOM_TEST_DATABASE=(bool, True),
     LOCAL_INSTALLERS_JSON=(str, ""),
     CUSTOM_TRANSFORM_CPU_TIME=(int, 5),
+    CUSTOM_TRANSFORM_BATCH_SIZE=(int, 1000),
+    CUSTOM_TRANSFORM_WORKERS=(int, 8),
+    CUSTOM_TRANSFORM_MAX_BATCH_TIME=(int, 0),
+    TRANSFORM_CACHE_TIMEOUT=(int, 60),
     CELERY_RDB_PORT=(int, 6899),
     DOCKER_HOST_SML_DATA_DIR=(str, ""),
     INSIDE_LOCAL_DOCKER=(bool, True),
@@ -262,6 +270,19 @@ appdirs = AppDirs("server", appauthor="SensiML")
 
 CUSTOM_TRANSFORM_PATH_VARIABLES = ":/home/sml-app/emsdk/upstream/bin:/home/sml-app/emsdk/upstream/emscripten:/home/sml-app/wabt/build/"
 CUSTOM_TRANSFORM_CPU_TIME = env("CUSTOM_TRANSFORM_CPU_TIME")
+# Custom feature generators run in long lived sandboxed worker processes, one per
+# kernel. Segments are sent in batches of at most CUSTOM_TRANSFORM_BATCH_SIZE kernel
+# calls, a batch may run for CUSTOM_TRANSFORM_CPU_TIME seconds per call, capped at
+# CUSTOM_TRANSFORM_MAX_BATCH_TIME seconds when it is not 0. CUSTOM_TRANSFORM_WORKERS is
+# the number of workers kept alive by each process.
+CUSTOM_TRANSFORM_BATCH_SIZE = env("CUSTOM_TRANSFORM_BATCH_SIZE")
+CUSTOM_TRANSFORM_WORKERS = env("CUSTOM_TRANSFORM_WORKERS")
+CUSTOM_TRANSFORM_MAX_BATCH_TIME = env("CUSTOM_TRANSFORM_MAX_BATCH_TIME")
+
+# Transforms looked up by the pipeline drivers are kept by each worker process until a
+# transform or library pack changes. Changes made by another worker are noticed within
+# TRANSFORM_CACHE_TIMEOUT seconds, the interval at which the shared version is read.
+TRANSFORM_CACHE_TIMEOUT = env("TRANSFORM_CACHE_TIMEOUT")
 MODEL_PROFILER = env("MODEL_PROFILER")
 
 # registration success url for sensiml.com
@@ -686,6 +707,7 @@ SERVER_CUSTOM_TRANSFORM_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "custom_trans
 SERVER_DATA_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "datafile")
 SERVER_MODEL_STORE_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "model_store")
 SERVER_CACHE_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "pipelinecache")
+SERVER_STEP_CACHE_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "stepcache")
 SERVER_QUERY_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "querydata")
 SERVER_FEATURE_FILE_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "featurefile")
 SERVER_CODEGEN_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "codegen")
@@ -694,9 +716,34 @@ SERVER_CODEGEN_ROOT = os.path.join(SERVER_BASE_DIRECTORY, "codegen")
 
 MAX_BATCH_SIZE = env("MAX_BATCH_SIZE")
 
+# Storage format of DataFrames and data segments in the pipeline and query cache.
+# "csv" writes gzipped csv and pickle files, "npz" writes typed columns to a compressed
+# numpy zip archive and "mmap" writes them uncompressed so that workers memory map the
+# sample buffer of a shard instead of loading it. Entries keep their .csv.gz/.pkl names
+# in every format and any of them can be read back.
+CACHE_FILE_FORMAT = env("CACHE_FILE_FORMAT")
+
+# Size in MB of the project level store of pipeline step results shared between
+# sandboxes, least recently used results are evicted first. The store keeps a copy of
+# every cached step result under SERVER_STEP_CACHE_ROOT in addition to the sandbox
+# caches, so it uses up to this much extra disk per project. 0 (default) disables it.
+STEP_CACHE_MAX_SIZE = env("STEP_CACHE_MAX_SIZE")
+
+# Size in MB of the per worker cache of knowledgepack classifiers that are loaded and
+# ready to recognize, least recently used models are evicted first. 0 disables it.
+# Model sizes are estimated from the stored model, so the bound is approximate: a
+# loaded TensorFlow Lite interpreter may use more memory than its flatbuffer and
+# tensor arena.
+MODEL_CACHE_MAX_SIZE = env("MODEL_CACHE_MAX_SIZE")
+
+# Number of processes a worker forks to train the validation folds of a model
+# generator in parallel, used by generators that support it. 0 trains folds sequentially.
+MODEL_GENERATOR_FOLD_WORKERS = env("MODEL_GENERATOR_FOLD_WORKERS")
+
 # Maximum shard (DataFrame) size in MB
 MAX_SHARD_MEMORY_SIZE = 400
-SHARD_MEMORY_SPLIT_SIZE = 10
+# Memory mapped shards are only paged in as they are read, so they can be larger
+SHARD_MEMORY_SPLIT_SIZE = 100 if CACHE_FILE_FORMAT == "mmap" else 10
 # Number of segments to allow per query split
 MAX_SHARD_SEGMENT_SIZE = 500  # sql limit, can increase but need to change query format
 SHARD_SEGMENT_SPLIT_SIZE = 400